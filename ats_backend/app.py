@@ -1,17 +1,30 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_file, abort
 import pymysql
 from pymysql.err import Error, IntegrityError
 from flask_cors import CORS
 import uuid
 import os
+import mimetypes
+import threading
 import re
 from datetime import datetime
 from pathlib import Path
 from werkzeug.utils import secure_filename
 from utils.event_notifier import notify_event
-from utils.auth import get_current_user
-from utils.db import get_db_connection, db_config
+from utils.auth import get_current_user, get_session_user, invalidate_session, invalidate_user_sessions
+from utils.db import get_db_connection, db_config, release_thread_connection, get_pool_stats
+from utils.migrations import run_migrations
+from utils.cache import TTLCache
+from utils.llm_transport import get_llm_metrics
+from services.chat_context import invalidate_user_context
+from services.candidate_index import refresh_candidate, remove_candidate
+from services.match_engine import invalidate_match_engine
+from services.skill_catalog import load_skill_aliases, sync_candidate_skills, sync_requirement_skills
+from services.resume_text import schedule_resume_extraction
+from services.requirement_funnel import track_funnel
+from utils.resume_store import save_resume, record_resume_file, resolve_resume_path, parse_cas_name
 from controllers.reports_controller import reports_bp
+from controllers.candidates_controller import candidates_bp
 try:
     from dotenv import load_dotenv
 except ImportError:
@@ -21,6 +34,13 @@ except ImportError:
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}}, supports_credentials=True)
 app.register_blueprint(reports_bp)
+app.register_blueprint(candidates_bp)
+
+
+@app.teardown_request
+def _release_db_connection(exc):
+    """Return any pooled DB connection a handler forgot to close (e.g. early returns)."""
+    release_thread_connection()
 
 # -------------------------------------
 # Environment loading (.env preferred; fallback to config.env for local dev)
@@ -44,335 +64,19 @@ else:
 # Moved to utils/db.py
 
 def initialize_database():
-    """Create tables if they do not exist."""
+    """
+    Bring the schema up to date via the versioned migrations in utils/migrations.py.
+    Once the database is current this is a single version check.
+    """
     try:
-        conn = get_db_connection()
-        if not conn:
-            print("❌ DB connection failed")
-            return
-
-        cursor = conn.cursor()
-
-        # ---------------------------
-        # USERS TABLE
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                email VARCHAR(150) NOT NULL UNIQUE,
-                password_hash VARCHAR(255) NOT NULL,
-                role ENUM('ADMIN','DELIVERY_MANAGER','TEAM_LEAD','RECRUITER','CLIENT','CANDIDATE') DEFAULT 'RECRUITER',
-                phone VARCHAR(20),
-                status VARCHAR(20) DEFAULT 'ACTIVE',
-                session_token VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-
-        # Add session_token column if not exists
-        cursor.execute("SHOW COLUMNS FROM users LIKE 'session_token'")
-        if not cursor.fetchone():
-            print("⚠️ Adding 'session_token' column to users...")
-            cursor.execute("ALTER TABLE users ADD COLUMN session_token VARCHAR(255)")
-
-        # ---------------------------
-        # USERSDATA TABLE
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS usersdata (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100),
-                email VARCHAR(150) UNIQUE,
-                phone VARCHAR(20),
-                role VARCHAR(50),
-                status VARCHAR(20) DEFAULT 'ACTIVE',
-                password_hash VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-
-        # ---------------------------
-        # CLIENTS TABLE
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS clients (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                contact_person VARCHAR(255),
-                email VARCHAR(255),
-                phone VARCHAR(50),
-                address TEXT,
-                status ENUM('ACTIVE','INACTIVE') DEFAULT 'ACTIVE',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        #----------------------------
-        #Interviewers TABLE
-        #----------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS interviews (
-                       id INT AUTO_INCREMENT PRIMARY KEY,
-                candidate_id INT NOT NULL,
-                requirement_id VARCHAR(64),
-                category VARCHAR(50),
-                stage VARCHAR(100),
-                date DATE,
-                time TIME,
-                duration VARCHAR(50),
-                mode VARCHAR(50),
-                location VARCHAR(255),
-                interviewer VARCHAR(255),
-                notes TEXT,
-                status VARCHAR(50),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)    
-
-        # ---------------------------
-        # REQUIREMENTS TABLE
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS requirements (
-                id VARCHAR(50) PRIMARY KEY,
-                client_id INT,
-                title VARCHAR(255),
-                description TEXT,
-                location VARCHAR(100),
-                skills_required VARCHAR(255),
-                experience_required FLOAT,
-                ctc_range VARCHAR(100),
-                no_of_rounds INT DEFAULT 1,
-                status VARCHAR(50) DEFAULT 'OPEN',
-                amount INT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_by VARCHAR(100),
-                FOREIGN KEY (client_id) REFERENCES clients(id)
-            );
-        """)
-
-        # Check for no_of_rounds column in requirements
-        cursor.execute("SHOW COLUMNS FROM requirements LIKE 'no_of_rounds'")
-        if not cursor.fetchone():
-            print("⚠️ Adding 'no_of_rounds' column to requirements...")
-            try:
-                cursor.execute("ALTER TABLE requirements ADD COLUMN no_of_rounds INT DEFAULT 1")
-            except Exception as e:
-                print(f"❌ Error adding no_of_rounds: {e}")
-
-
-        # Check for no_of_rounds column in requirements
-        cursor.execute("SHOW COLUMNS FROM requirements LIKE 'amount'")
-        if not cursor.fetchone():
-            print("⚠️ Adding 'amount' column to requirements...")
-            try:
-                cursor.execute("ALTER TABLE requirements ADD COLUMN amount INT")
-            except Exception as e:
-                print(f"❌ Error adding amount for requirements: {e}")        
-
-        # ---------------------------
-        # REQUIREMENT_ALLOCATIONS
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS requirement_allocations (
-                id VARCHAR(50) PRIMARY KEY,
-                requirement_id VARCHAR(50),
-                recruiter_id INT,
-                assigned_by INT,
-                status VARCHAR(20) DEFAULT 'ASSIGNED',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (requirement_id) REFERENCES requirements(id),
-                FOREIGN KEY (recruiter_id) REFERENCES users(id),
-                FOREIGN KEY (assigned_by) REFERENCES users(id)
-            );
-        """)
-
-        # Migration check for requirement_allocations cols
-        cursor.execute("SHOW COLUMNS FROM requirement_allocations LIKE 'status'")
-        if not cursor.fetchone():
-            print("⚠️ Adding 'status' column to requirement_allocations...")
-            cursor.execute("ALTER TABLE requirement_allocations ADD COLUMN status VARCHAR(20) DEFAULT 'ASSIGNED'")
-        
-        cursor.execute("SHOW COLUMNS FROM requirement_allocations LIKE 'created_at'")
-        if not cursor.fetchone():
-            print("⚠️ Adding 'created_at' column to requirement_allocations...")
-            cursor.execute("ALTER TABLE requirement_allocations ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-        conn.commit()
-
-        # ---------------------------
-        # CANDIDATES TABLE
-        # ---------------------------
-        cursor.execute("""
-    CREATE TABLE IF NOT EXISTS candidates (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        name VARCHAR(255),
-        email VARCHAR(255),
-        phone VARCHAR(20),
-        skills TEXT,
-        education TEXT,
-        experience TEXT,
-        ctc VARCHAR(50),          
-        ectc VARCHAR(50),         
-        resume_filename VARCHAR(255),
-        created_by INT,
-        source VARCHAR(50),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (created_by) REFERENCES users(id)
-    );
-""")
-
-
-        # ---------------------------
-        # REQUIREMENT STAGES (NEW)
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS requirement_stages (
-                id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                requirement_id VARCHAR(50),
-                stage_order INT,
-                stage_name VARCHAR(255),
-                is_mandatory BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (requirement_id) REFERENCES requirements(id)
-            );
-        """)
-
-        # ---------------------------
-        # CANDIDATE PROGRESS (UPDATED)
-        # ---------------------------
-        # Check if table exists to decide on creation or update
-        cursor.execute("SHOW TABLES LIKE 'candidate_progress'")
-        if not cursor.fetchone():
-            cursor.execute("""
-                CREATE TABLE candidate_progress (
-                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                    candidate_id INT,
-                    requirement_id VARCHAR(50),
-                    stage_id BIGINT,
-                    stage_name VARCHAR(255),
-                    status ENUM('PENDING','IN_PROGRESS','COMPLETED','REJECTED','REVIEW_REQUIRED') DEFAULT 'PENDING',
-                    decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE',
-                    manual_decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE',
-                    category VARCHAR(50),
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    UNIQUE KEY uniq_progress_stage (candidate_id, requirement_id, stage_id),
-                    FOREIGN KEY (candidate_id) REFERENCES candidates(id),
-                    FOREIGN KEY (requirement_id) REFERENCES requirements(id),
-                    FOREIGN KEY (stage_id) REFERENCES requirement_stages(id)
-                );
-            """)
+        applied = run_migrations()
+        if applied:
+            print(f"✅ Applied {len(applied)} schema migration(s); now at version {applied[-1].version}")
         else:
-            # Table exists, attempt to add new columns if they don't exist
-            print("⚠️ 'candidate_progress' exists. Checking for schema updates...")
-            
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'stage_id'")
-            if not cursor.fetchone():
-                print("   -> Adding 'stage_id' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN stage_id BIGINT")
-                    cursor.execute("ALTER TABLE candidate_progress ADD CONSTRAINT fk_cp_stage FOREIGN KEY (stage_id) REFERENCES requirement_stages(id)")
-                except Exception as e:
-                    print(f"   ❌ Error adding stage_id: {e}")
-
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'stage_name'")
-            if not cursor.fetchone():
-                print("   -> Adding 'stage_name' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN stage_name VARCHAR(255)")
-                except Exception as e:
-                    print(f"   ❌ Error adding stage_name: {e}")
-
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'decision'")
-            if not cursor.fetchone():
-                print("   -> Adding 'decision' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE'")
-                except Exception as e:
-                    print(f"   ❌ Error adding decision: {e}")
-
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'manual_decision'")
-            if not cursor.fetchone():
-                print("   -> Adding 'manual_decision' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN manual_decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE'")
-                except Exception as e:
-                    print(f"   ❌ Error adding manual_decision: {e}")
-
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'category'")
-            if not cursor.fetchone():
-                print("   -> Adding 'category' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN category VARCHAR(50)")
-                except Exception as e:
-                    print(f"   ❌ Error adding category: {e}")
-
-            # Fix Unique Key for candidate_progress
-            print("   -> Checking unique key constraints...")
-            try:
-                # Try to drop the old unique key if it exists
-                cursor.execute("ALTER TABLE candidate_progress DROP INDEX uniq_progress")
-                print("   ✅ Dropped old unique key 'uniq_progress'")
-            except Exception:
-                pass # Key might not exist
-
-            try:
-                # Add the correct unique key
-                cursor.execute("ALTER TABLE candidate_progress ADD UNIQUE KEY uniq_progress_stage (candidate_id, requirement_id, stage_id)")
-                print("   ✅ Added unique key 'uniq_progress_stage'")
-            except Exception as e:
-                # print(f"   ℹ️ Unique key 'uniq_progress_stage' might already exist: {e}")
-                pass
-
-        # ---------------- CANDIDATE SCREENING ----------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS candidate_screening (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                candidate_id INT,
-                requirement_id VARCHAR(64),
-                ai_score FLOAT,
-                ai_rationale TEXT,
-                recommend VARCHAR(32),
-                red_flags TEXT,
-                model_version VARCHAR(50),
-                status ENUM('PENDING','DONE','ERROR') DEFAULT 'PENDING',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (candidate_id) REFERENCES candidates(id),
-                FOREIGN KEY (requirement_id) REFERENCES requirements(id)
-            );
-        """)
-
-        # ---------------- ASSESSMENT QUEUE ----------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS assesment_queue (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                candidate_id INT NOT NULL,
-                requirement_id VARCHAR(64) NOT NULL,
-                status VARCHAR(32) DEFAULT 'PENDING',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (candidate_id) REFERENCES candidates(id),
-                FOREIGN KEY (requirement_id) REFERENCES requirements(id)
-            );
-        """)
-
-        # ---------------- INTERACTION LOGS (AVATAR) ----------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS interaction_logs (
-                id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                session_id VARCHAR(64),
-                user_id INT,
-                user_role VARCHAR(50),
-                message_in TEXT,
-                message_out TEXT,
-                emotion VARCHAR(32),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        print("✅ All required tables checked/created successfully")
+            print("✅ Database schema is up to date")
+        load_skill_aliases()
+        roles = load_allowed_roles()
+        print(f"✅ User roles loaded ({len(roles)})")
 
     except Exception as e:
         print("❌ Error initializing DB:", e)
@@ -383,30 +87,58 @@ print(f"🔧 DB Config: host={db_config['host']}, user={db_config['user']}, data
 
 app.config["UPLOAD_FOLDER"] = "./uploads/resumes"
 os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+
+# Resume serving: "" (Flask streams the file), "x-sendfile" (Apache/lighttpd) or
+# "x-accel" (nginx internal location RESUME_ACCEL_PREFIX aliased to UPLOAD_FOLDER)
+RESUME_OFFLOAD_MODE = os.getenv("RESUME_OFFLOAD_MODE", "").strip().lower()
+RESUME_ACCEL_PREFIX = os.getenv("RESUME_ACCEL_PREFIX", "/protected/resumes").rstrip("/")
+app.config["USE_X_SENDFILE"] = RESUME_OFFLOAD_MODE == "x-sendfile"
+# Content-addressed files never change; resumes are personal data, so private caches only
+RESUME_IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+RESUME_LEGACY_CACHE_CONTROL = "private, no-cache"
 ALLOWED_EXTENSIONS = {"pdf", "doc", "docx"}
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def get_allowed_roles():
-    import re
-    conn = get_db_connection()
-    if not conn:
-        return []
-    cursor = conn.cursor()
-    cursor.execute("SHOW COLUMNS FROM users LIKE 'role'")
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
+# users.role ENUM values, read once instead of SHOW COLUMNS (metadata lock) per call.
+# initialize_database() reloads them after migrations, which may alter the enum.
+_roles_cache = {"roles": None, "etag": None}
+_roles_lock = threading.Lock()
+
+
+def load_allowed_roles():
+    """Read users.role's ENUM values into the process-wide cache. Keeps the previous set on failure."""
+    try:
+        conn = get_db_connection()
+        if not conn:
+            return list(_roles_cache["roles"] or [])
+        cursor = conn.cursor()
+        cursor.execute("SHOW COLUMNS FROM users LIKE 'role'")
+        row = cursor.fetchone()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Could not load user roles: {e}")
+        return list(_roles_cache["roles"] or [])
 
     if not row:
         return []
 
     # row[1] contains: "enum('ADMIN','RECRUITER',...)"
-    enum_type = row[1]
-    roles = re.findall(r"'(.*?)'", enum_type)
-    return roles
+    roles = tuple(re.findall(r"'(.*?)'", row[1]))
+    with _roles_lock:
+        _roles_cache["roles"] = roles
+        _roles_cache["etag"] = hashlib.sha256(",".join(roles).encode("utf-8")).hexdigest()[:32]
+    return list(roles)
+
+
+def get_allowed_roles():
+    roles = _roles_cache["roles"]
+    if roles is None:
+        return load_allowed_roles()
+    return list(roles)
 
 
 # -------------------------------------
@@ -421,6 +153,23 @@ def get_allowed_roles():
 def home():
     return 'ATS Backend is Running! 🚀'
 
+
+@app.route('/db-pool-stats', methods=['GET'])
+def db_pool_stats():
+    """Connection pool health: open/idle/in-use sockets, waiters and checkout wait times."""
+    try:
+        return jsonify(get_pool_stats()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/llm-metrics', methods=['GET'])
+def llm_metrics():
+    """Gemini transport metrics per call type: latency, retries, errors and token usage."""
+    try:
+        return jsonify(get_llm_metrics()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # @app.route('/testdb')
 # def test_db():
 #     try:
@@ -470,29 +219,6 @@ def ensure_admin_exists():
         print("❌ Error ensuring admin:", e)
 
 
-def ensure_user_status_defaults():
-    """Normalize users.status and enforce default at DB level."""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return
-        cursor = conn.cursor()
-        # Normalize existing rows
-        cursor.execute("UPDATE users SET status = 'ACTIVE' WHERE status IS NULL OR status = ''")
-        conn.commit()
-        # Enforce default at schema level
-        try:
-            cursor.execute("ALTER TABLE users MODIFY status VARCHAR(20) NOT NULL DEFAULT 'ACTIVE'")
-            conn.commit()
-        except Exception:
-            # Ignore if permissions or already set
-            pass
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        print("⚠️ Could not enforce user status defaults:", e)
-
-
 @app.route("/roles", methods=["GET"])
 def roles_endpoint():
     """
@@ -501,7 +227,15 @@ def roles_endpoint():
     """
     try:
         roles = get_allowed_roles()
-        return jsonify({"roles": roles}), 200
+        etag = _roles_cache["etag"]
+        if etag and request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = jsonify({"roles": roles})
+        if etag:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+        return response
     except Exception as e:
         return jsonify({"roles": [], "error": str(e)}), 500
 
@@ -529,10 +263,10 @@ def submit_candidate():
             return jsonify({"message": "Name and email are required"}), 400
 
         # ------------------- Resume Upload -------------------
-        filename = None
+        # Content-addressed: stored as aa/bb/<sha256>.<ext>, identical files kept once
+        stored = None
         if resume and allowed_file(resume.filename):
-            filename = secure_filename(resume.filename)
-            resume.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
+            stored = save_resume(resume, app.config["UPLOAD_FOLDER"])
         elif resume:
             return jsonify({"message": "Invalid file type"}), 400
 
@@ -542,6 +276,8 @@ def submit_candidate():
             return jsonify({"message": "Database connection failed"}), 500
 
         cursor = conn.cursor()
+        filename = stored.filename if stored else None
+        resume_hash = stored.content_hash if stored else None
 
         # Insert WITH created_by
         if created_by:
@@ -551,33 +287,48 @@ def submit_candidate():
                 cursor.execute("""
                     INSERT INTO candidates
                     (name, email, phone, skills, education, experience, resume_filename,
-                     created_by, ctc, ectc)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                     resume_hash, created_by, ctc, ectc)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
                 """, (name, email, phone, skills, education, experience,
-                      filename, created_by, ctc, ectc))
+                      filename, resume_hash, created_by, ctc, ectc))
             else:
                 print(f"⚠️ User ID {created_by} not found. Inserting candidate without created_by.")
                 cursor.execute("""
                     INSERT INTO candidates
                     (name, email, phone, skills, education, experience, resume_filename,
-                     ctc, ectc)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                     resume_hash, ctc, ectc)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
                 """, (name, email, phone, skills, education, experience,
-                      filename, ctc, ectc))
+                      filename, resume_hash, ctc, ectc))
         else:
             # Insert WITHOUT created_by
             cursor.execute("""
                 INSERT INTO candidates
                 (name, email, phone, skills, education, experience, resume_filename,
-                 ctc, ectc)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                 resume_hash, ctc, ectc)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
             """, (name, email, phone, skills, education, experience,
-                  filename, ctc, ectc))
+                  filename, resume_hash, ctc, ectc))
 
+        candidate_id = cursor.lastrowid
+        if stored:
+            record_resume_file(cursor, stored, secure_filename(resume.filename))
+        sync_candidate_skills(cursor, candidate_id, skills)
         conn.commit()
+        invalidate_user_context(created_by)
+        refresh_candidate(candidate_id)
+        invalidate_match_engine()
         cursor.close()
         conn.close()
 
+        # Text extraction runs in the background; the upload response doesn't wait for it
+        if stored:
+            schedule_resume_extraction(
+                candidate_id,
+                os.path.join(app.config["UPLOAD_FOLDER"], stored.relative_path),
+                content_hash=stored.content_hash,
+            )
+
         return jsonify({"message": f"✅ Candidate '{name}' submitted successfully!"}), 201
 
     except Exception as e:
@@ -591,77 +342,23 @@ def get_candidates():
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        # 1️⃣ Ensure correct database
-        cursor.execute("SELECT DATABASE()")
-        db_row = cursor.fetchone()
-        print("🟢 Current DB check:", db_row)
+        # Schema (table, ctc/ectc columns, created_by index) is guaranteed once
+        # at startup by utils/migrations.py, so this is a single indexed query.
 
-        db_name = db_row.get("DATABASE()") if db_row else None
-
-        if not db_name or db_name.lower() != "ats_system":
-            print("⚠ Switching to ats database...")
-            cursor.execute("USE ats_system")
-            conn.commit()
-
-        # 2️⃣ Create table if it doesn't exist
-        cursor.execute("SHOW TABLES LIKE 'candidates'")
-        if not cursor.fetchone():
-            print("⚠ 'candidates' table not found — creating now...")
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS candidates (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    email VARCHAR(100) NOT NULL,
-                    phone VARCHAR(20),
-                    skills TEXT,
-                    education TEXT,
-                    experience TEXT,
-                    resume_filename VARCHAR(255),
-                    ctc VARCHAR(50),
-                    ectc VARCHAR(50),
-                    created_by INT DEFAULT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES users(id)
-                )
-            """)
-            conn.commit()
-            print("✅ 'candidates' table created successfully!")
-
-        # 3️⃣ Ensure ctc + ectc columns exist
-        cursor.execute("""
-            SELECT COLUMN_NAME 
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA='ats_system'
-            AND TABLE_NAME='candidates'
-        """)
-        cols = [row["COLUMN_NAME"] for row in cursor.fetchall()]
-
-        if "ctc" not in cols:
-            print("⚠ Adding 'ctc' column")
-            cursor.execute("ALTER TABLE candidates ADD COLUMN ctc VARCHAR(50)")
-            conn.commit()
-
-        if "ectc" not in cols:
-            print("⚠ Adding 'ectc' column")
-            cursor.execute("ALTER TABLE candidates ADD COLUMN ectc VARCHAR(50)")
-            conn.commit()
-
-        # 4️⃣ Role-based filtering
+        # Role-based filtering
         user_id = request.args.get("user_id", type=int)
         user_role = request.args.get("user_role", "").upper()
 
         if user_role == "RECRUITER" and user_id:
+            # Served by idx_candidates_created_by (created_by, id)
             cursor.execute(
                 "SELECT * FROM candidates WHERE created_by=%s ORDER BY id DESC",
                 (user_id,)
             )
-        elif user_role in ["ADMIN", "DELIVERY_MANAGER"]:
-            cursor.execute("SELECT * FROM candidates ORDER BY id DESC")
         else:
             cursor.execute("SELECT * FROM candidates ORDER BY id DESC")
 
         rows = cursor.fetchall()
-        print(f"✅ Found {len(rows)} candidates")
 
         cursor.close()
         conn.close()
@@ -697,17 +394,19 @@ def update_candidate(id):
             return jsonify({"message": "Database connection failed"}), 500
 
         cursor = conn.cursor()
+        stored = None
 
         if resume and allowed_file(resume.filename):
-            filename = secure_filename(resume.filename)
-            resume.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
+            stored = save_resume(resume, app.config["UPLOAD_FOLDER"])
+            record_resume_file(cursor, stored, secure_filename(resume.filename))
 
             cursor.execute("""
                 UPDATE candidates 
                 SET name=%s, email=%s, phone=%s, skills=%s, education=%s, experience=%s,
-                    ctc=%s, ectc=%s, resume_filename=%s
+                    ctc=%s, ectc=%s, resume_filename=%s, resume_hash=%s
                 WHERE id=%s
-            """, (name, email, phone, skills, education, experience, ctc, ectc, filename, id))
+            """, (name, email, phone, skills, education, experience, ctc, ectc,
+                  stored.filename, stored.content_hash, id))
 
         else:
             cursor.execute("""
@@ -717,10 +416,21 @@ def update_candidate(id):
                 WHERE id=%s
             """, (name, email, phone, skills, education, experience, ctc, ectc, id))
 
+        sync_candidate_skills(cursor, id, skills)
         conn.commit()
+        invalidate_user_context()
+        refresh_candidate(id)
+        invalidate_match_engine()
         cursor.close()
         conn.close()
 
+        if stored:
+            schedule_resume_extraction(
+                id,
+                os.path.join(app.config["UPLOAD_FOLDER"], stored.relative_path),
+                content_hash=stored.content_hash,
+            )
+
         return jsonify({"message": "✅ Candidate updated successfully!"}), 200
 
     except Exception as e:
@@ -802,6 +512,9 @@ def delete_candidate(id):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM candidates WHERE id=%s", (id,))
         conn.commit()
+        invalidate_user_context()
+        remove_candidate(id)
+        invalidate_match_engine()
 
         cursor.close()
         conn.close()
@@ -877,6 +590,7 @@ def create_user():
         """, (name, email, phone, role, password_hash))
 
         conn.commit()
+        invalidate_user_context()
         cursor.close()
         conn.close()
 
@@ -1092,6 +806,7 @@ def login():
             # Store token in DB
             cursor.execute("UPDATE users SET session_token = %s WHERE id = %s", (token, user['id']))
             conn.commit()
+            invalidate_user_sessions(user['id'])  # the previous token is no longer valid
             
             # Attach token to response user object
             user['token'] = token
@@ -1117,20 +832,11 @@ def verify_session():
         if not token:
             return jsonify({"valid": False, "message": "No token provided"}), 401
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        # Same cached lookup as get_current_user (utils/auth.py)
+        session_user = get_session_user(token)
         
-        cursor.execute("""
-            SELECT id, name, email, role, status 
-            FROM users 
-            WHERE session_token = %s AND status = 'ACTIVE'
-        """, (token,))
-        user = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        if user:
+        if session_user and session_user.get('status') == 'ACTIVE':
+            user = {key: session_user[key] for key in ('id', 'name', 'email', 'role', 'status')}
             user['token'] = token  # Ensure token is returned to persist in frontend
             return jsonify({"valid": True, "user": user}), 200
         else:
@@ -1151,6 +857,7 @@ def logout():
             cursor = conn.cursor()
             cursor.execute("UPDATE users SET session_token = NULL WHERE session_token = %s", (token,))
             conn.commit()
+            invalidate_session(token)
             cursor.close()
             conn.close()
 
@@ -1209,6 +916,7 @@ def signup():
             VALUES (%s, %s, %s, %s, 'ACTIVE')
         """, (name, email, hashed_pw, existing_user['role']))
         conn.commit()
+        invalidate_user_context()
 
         cursor.close()
         conn.close()
@@ -1265,6 +973,8 @@ def update_user_status(user_id: int):
             (new_status, user_id)
         )
         conn.commit()
+        invalidate_user_context(user_id)
+        invalidate_user_sessions(user_id)
 
         cursor.close()
         conn.close()
@@ -1465,7 +1175,11 @@ def create_requirement():
                 VALUES (%s, %s, %s, TRUE)
             """, (req_id, i, stage_name))
 
+        sync_requirement_skills(cursor, req_id, skills_value)
         conn.commit()
+        invalidate_user_context()
+        invalidate_match_engine()
+        invalidate_dashboard_stats()
         cursor.close()
         conn.close()
 
@@ -1595,23 +1309,25 @@ def update_stage_status():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Get stage name
-        cursor.execute("SELECT stage_name FROM requirement_stages WHERE id=%s", (stage_id,))
-        s_row = cursor.fetchone()
-        stage_name = s_row[0] if s_row else "Unknown"
-        
-        # Use INSERT ON DUPLICATE KEY UPDATE to handle both insert and update
-        # Note: Using explicit column names instead of VALUES() for MySQL 8.0+ compatibility
-        cursor.execute("""
-            INSERT INTO candidate_progress 
-            (candidate_id, requirement_id, stage_id, stage_name, status, decision)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE 
-                status = %s,
-                decision = %s,
-                updated_at = CURRENT_TIMESTAMP
-        """, (candidate_id, requirement_id, stage_id, stage_name, status, decision or 'NONE',
-              status, decision or 'NONE'))  # Repeat status and decision for UPDATE clause
+        # The stage lookup runs inside track_funnel so its snapshot is the transaction's first read
+        with track_funnel(cursor, [(candidate_id, requirement_id)]):
+            # Get stage name
+            cursor.execute("SELECT stage_name FROM requirement_stages WHERE id=%s", (stage_id,))
+            s_row = cursor.fetchone()
+            stage_name = s_row[0] if s_row else "Unknown"
+            
+            # Use INSERT ON DUPLICATE KEY UPDATE to handle both insert and update
+            # Note: Using explicit column names instead of VALUES() for MySQL 8.0+ compatibility
+            cursor.execute("""
+                INSERT INTO candidate_progress 
+                (candidate_id, requirement_id, stage_id, stage_name, status, decision)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE 
+                    status = %s,
+                    decision = %s,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (candidate_id, requirement_id, stage_id, stage_name, status, decision or 'NONE',
+                  status, decision or 'NONE'))  # Repeat status and decision for UPDATE clause
             
         conn.commit()
         cursor.close()
@@ -1671,6 +1387,8 @@ def assign_requirement():
             VALUES (%s, %s, %s, %s, %s)
         """, (alloc_id, requirement_id, recruiter_id, assigned_by, status))
         conn.commit()
+        invalidate_user_context(recruiter_id)
+        invalidate_dashboard_stats()
 
         # ---------- NEW PART: build payload for n8n ----------
 
@@ -1897,6 +1615,9 @@ def delete_requirement(req_id):
         )
 
         conn.commit()
+        invalidate_user_context()
+        invalidate_match_engine()
+        invalidate_dashboard_stats()
 
         return jsonify({"message": "Requirement and all related records deleted successfully"}), 200
 
@@ -1947,63 +1668,70 @@ def recent_requirements():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/dashboard-stats', methods=['GET'])
-def dashboard_stats():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # Use your database
-        cursor.execute("USE ats_system")
+# Dashboard counters are read on every TL/DM/Recruiter dashboard load but only
+# change on requirement/allocation writes, which clear this cache.
+DASHBOARD_STATS_TTL_SECONDS = int(os.getenv("DASHBOARD_STATS_TTL_SECONDS", "30"))
+_dashboard_stats_cache = TTLCache(maxsize=4, ttl=DASHBOARD_STATS_TTL_SECONDS)
 
-        # Total requirements
-        cursor.execute("SELECT COUNT(*) AS total FROM requirements")
-        total = cursor.fetchone()['total'] or 0
 
-        # Open requirements
-        cursor.execute("SELECT COUNT(*) AS open_count FROM requirements WHERE status = 'Open'")
-        open_req = cursor.fetchone()['open_count'] or 0
+def invalidate_dashboard_stats():
+    _dashboard_stats_cache.clear()
 
-        # Closed requirements
-        cursor.execute("SELECT COUNT(*) AS closed_count FROM requirements WHERE status = 'Closed'")
-        closed_req = cursor.fetchone()['closed_count'] or 0
 
-        # Assigned requirements
-        cursor.execute("SELECT COUNT(*) AS assigned_count FROM requirement_allocations")
-        assigned_req = cursor.fetchone()['assigned_count'] or 0
+def _load_dashboard_stats(start_of_month):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # One scan of requirements with conditional aggregation; allocations via scalar subqueries
+        cursor.execute("""
+            SELECT
+                COUNT(*) AS total,
+                SUM(status = 'Open') AS open_count,
+                SUM(status = 'Closed') AS closed_count,
+                SUM(status = 'Open' AND no_of_rounds > 5) AS urgent_count,
+                SUM(status = 'Closed' AND created_at >= %s) AS closed_this_month,
+                (SELECT COUNT(*) FROM requirement_allocations) AS assigned_count,
+                (SELECT COUNT(*) FROM requirement_allocations WHERE status = 'Pending') AS pending_review
+            FROM requirements
+        """, (start_of_month,))
+        row = cursor.fetchone() or {}
+    finally:
+        cursor.close()
+        conn.close()
 
-        # Urgent requirements (example: open and no_of_rounds > 5)
-        cursor.execute("SELECT COUNT(*) AS urgent_count FROM requirements WHERE status = 'Open' AND no_of_rounds > 5")
-        urgent_req = cursor.fetchone()['urgent_count'] or 0
+    # SUM() is NULL (and Decimal otherwise) when there are no rows
+    counts = {key: int(value or 0) for key, value in row.items()}
+    total = counts.get("total", 0)
+    return {
+        "totalRequirements": total,
+        "openRequirements": counts.get("open_count", 0),
+        "closedRequirements": counts.get("closed_count", 0),
+        "assignedRequirements": counts.get("assigned_count", 0),
+        "urgent": counts.get("urgent_count", 0),
+        "pendingReview": counts.get("pending_review", 0),
+        # Closed growth percent (closed this month / total)
+        "closedGrowthPercent": round((counts.get("closed_this_month", 0) / total) * 100, 2) if total else 0
+    }
 
-        # Pending review
-        cursor.execute("SELECT COUNT(*) AS pending_review FROM requirement_allocations WHERE status = 'Pending'")
-        pending_review = cursor.fetchone()['pending_review'] or 0
 
-        # Closed growth percent (closed this month / total)
+@app.route('/dashboard-stats', methods=['GET'])
+def dashboard_stats():
+    try:
         start_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        cursor.execute(
-            "SELECT COUNT(*) AS closed_this_month FROM requirements "
-            "WHERE status = 'Closed' AND created_at >= %s",
-            (start_of_month,)
-        )
-        closed_this_month = cursor.fetchone()['closed_this_month'] or 0
-        closed_growth_percent = round((closed_this_month / total) * 100, 2) if total else 0
-
-        cursor.close()
-        conn.close()
+        # Keyed by month so "closed this month" rolls over without waiting for the TTL
+        cache_key = start_of_month.strftime("%Y-%m")
 
-        stats = {
-            "totalRequirements": total,
-            "openRequirements": open_req,
-            "closedRequirements": closed_req,
-            "assignedRequirements": assigned_req,
-            "urgent": urgent_req,
-            "pendingReview": pending_review,
-            "closedGrowthPercent": closed_growth_percent
-        }
+        stats, age = _dashboard_stats_cache.get_entry(cache_key)
+        if stats is None:
+            stats = _load_dashboard_stats(start_of_month)
+            _dashboard_stats_cache.set(cache_key, stats)
+            age = 0.0
 
-        return jsonify({"stats": stats})
+        return jsonify({
+            "stats": stats,
+            "cached": age > 0,
+            "cacheAgeSeconds": round(age, 1),
+        })
 
     except Exception as e:
         print("❌ Error fetching dashboard stats:", e)
@@ -2050,8 +1778,12 @@ def update_requirement(req_id):
         amount_value,
         req_id
     ))
+    sync_requirement_skills(cursor, req_id, data["skills_required"])
 
     conn.commit()
+    invalidate_user_context()
+    invalidate_match_engine()
+    invalidate_dashboard_stats()
     cursor.close()
     conn.close()
     return jsonify({"message": "Requirement updated"})
@@ -2088,6 +1820,7 @@ def create_client():
     """, (name, contact_person, email, phone, address))
 
     conn.commit()
+    invalidate_user_context()
     cursor.close()
     conn.close()
 
@@ -2132,6 +1865,7 @@ def update_client(id):
             WHERE id=%s
         """, (name, email, contact_person, phone, address, status, id))
         conn.commit()
+        invalidate_user_context()
 
         return jsonify({
             "id": id,
@@ -2195,6 +1929,9 @@ def delete_client(id):
         # 3. Finally delete the client
         cursor.execute("DELETE FROM clients WHERE id = %s", (id,))
         conn.commit()
+        invalidate_user_context()
+        invalidate_match_engine()
+        invalidate_dashboard_stats()
 
         return jsonify({
             "id": id,
@@ -2278,6 +2015,7 @@ def add_user():
             (name, email, phone, password_hash, role, status)
         )
         conn.commit()
+        invalidate_user_context()
         cursor.close()
         conn.close()
 
@@ -2367,6 +2105,8 @@ def update_user(id):
             )
 
         conn.commit()
+        invalidate_user_context(id)
+        invalidate_user_sessions(id)
         cursor.close()
         conn.close()
         return jsonify({"message": f"✅ User '{name}' updated successfully!"}), 200
@@ -2448,6 +2188,8 @@ def delete_user(id):
         # Delete user
         cursor.execute("DELETE FROM users WHERE id=%s", (id,))
         conn.commit()
+        invalidate_user_context(id)
+        invalidate_user_sessions(id)
         cursor.close()
         conn.close()
         return jsonify({"message": "🗑 User deleted successfully!"}), 200
@@ -2568,23 +2310,64 @@ def get_candidate_progress():
 # -------------------------------------
 @app.route('/uploads/resumes/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    # <sha256>.<ext> names live in shards; older flat names are resolved via resume_files
+    path = resolve_resume_path(app.config['UPLOAD_FOLDER'], filename)
+    if not path:
+        abort(404)
+
+    # The content hash is a strong validator; legacy names fall back to Flask's mtime/size ETag
+    cas = parse_cas_name(filename)
+    etag = cas[0] if cas else True
+    cache_control = RESUME_IMMUTABLE_CACHE_CONTROL if cas else RESUME_LEGACY_CACHE_CONTROL
+
+    if RESUME_OFFLOAD_MODE == "x-accel":
+        if cas and request.if_none_match.contains(cas[0]):
+            response = Response(status=304)
+        else:
+            # nginx serves the bytes (including Range requests) from its internal location
+            relative = os.path.relpath(path, os.path.abspath(app.config['UPLOAD_FOLDER'])).replace(os.sep, "/")
+            response = Response(mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream")
+            response.headers["X-Accel-Redirect"] = f"{RESUME_ACCEL_PREFIX}/{relative}"
+        if cas:
+            response.set_etag(cas[0])
+    else:
+        # conditional=True answers If-None-Match / If-Modified-Since with 304 and Range with 206
+        response = send_file(path, conditional=True, etag=etag)
+
+    response.headers["Cache-Control"] = cache_control
+    return response
 
 
 
 # -------------------------------------
-# Run Server
+# Startup (shared by `python app.py` and server.py)
 # -------------------------------------
-if __name__ == '__main__':
+_started = False
+
+
+def startup():
+    """Migrate the schema, load caches, register the AI routes and resume screening jobs. Runs once."""
+    global _started
+    if _started:
+        return
+    _started = True
     # Import AI routes after env loading (to avoid circular import issues)
     from controllers.ai_chat_controller import register_ai_routes
     from controllers.ai_jd_controller import jd_bp
     from controllers.ai_screening import screening_bp
+    from services.screening_jobs import resume_screening_jobs
     initialize_database()
     ensure_admin_exists()
-    ensure_user_status_defaults()
     # Register AI assistant routes without altering existing endpoints
     register_ai_routes(app)
     app.register_blueprint(jd_bp)
     app.register_blueprint(screening_bp)
+    resume_screening_jobs()
+
+
+# -------------------------------------
+# Run Server
+# -------------------------------------
+if __name__ == '__main__':
+    startup()
     app.run(debug=True, port=5001)
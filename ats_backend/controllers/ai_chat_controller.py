@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
-from typing import Any, Dict, Optional
-
-from utils.llm_client import call_llm
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from typing import Any, Dict, Iterator, Optional, Tuple
+import json
+import re
+
+from utils.db import get_db_connection
+from utils.llm_client import call_llm, stream_llm
+from services.chat_context import fetch_parallel, get_user_self_context
 from services.ai_data_service import (
-	get_candidate_by_name_for_user,
+	find_candidate_in_message_for_user,
 	get_candidate_track_for_user,
 	get_interviews_for_user,
 	get_requirement_by_id_for_user,
@@ -19,7 +23,6 @@ from services.ai_data_service import (
     list_candidates_for_user,
     list_requirement_allocations,
     list_usersdata,
-    build_user_self_context,
     get_candidate_progress_for_requirement,
     get_candidates_in_last_round,
     get_qualified_candidates,
@@ -82,148 +85,162 @@ def _detect_intent(message: str) -> str:
 	return "general"
 
 
-def _process_chat_request(user: Dict[str, Any], message: str, system_prompt: str) -> Dict[str, Any]:
-	"""
-	Core logic to gather context and call LLM.
-	Returns a dict with 'answer' and 'context'.
-	"""
-	# 1) Simple routing/intent
-	intent = _detect_intent(message)
-
+def _base_chat_context(user: Dict[str, Any], message: str) -> Dict[str, Any]:
 	context: Dict[str, Any] = {"user": {"id": user.get("id"), "role": user.get("role"), "client_id": user.get("client_id")}, "query": message}
-	self_context = build_user_self_context(user)
+	self_context = get_user_self_context(user)
 	if self_context:
 		context.update(self_context)
+	return context
 
-	try:
-		# 2) Fetch ATS data with role-based filtering
-		if intent == "requirement":
-			# try to extract a requirement id pattern like R-123
-			req_id = None
-			for tok in message.replace("#", " ").replace(",", " ").split():
-				if tok.upper().startswith("R-") or tok.upper().startswith("REQ-"):
-					req_id = tok.upper().replace("REQ-", "R-")
-					break
+
+def _gather_chat_context(user: Dict[str, Any], message: str, context: Dict[str, Any]) -> str:
+	"""Fetch ATS data for the message's intent into `context`, with role-based filtering. Returns the intent."""
+	intent = _detect_intent(message)
+
+	if intent == "requirement":
+		# try to extract a requirement id pattern like R-123
+		req_id = None
+		for tok in message.replace("#", " ").replace(",", " ").split():
+			if tok.upper().startswith("R-") or tok.upper().startswith("REQ-"):
+				req_id = tok.upper().replace("REQ-", "R-")
+				break
+		
+		# If no explicit ID found, try to match by Title/Client from user's accessible list
+		if not req_id:
+			all_reqs = []
+			role = user.get("role", "").upper()
+			if role == "ADMIN":
+				all_reqs = list_requirements_for_admin()
+			elif role == "RECRUITER":
+				all_reqs = list_requirements_for_recruiter(user.get("id"))
+			elif role == "CLIENT":
+				all_reqs = list_requirements_for_client(user.get("client_id"))
 			
-			# If no explicit ID found, try to match by Title/Client from user's accessible list
-			if not req_id:
-				all_reqs = []
-				role = user.get("role", "").upper()
-				if role == "ADMIN":
-					all_reqs = list_requirements_for_admin()
-				elif role == "RECRUITER":
-					all_reqs = list_requirements_for_recruiter(user.get("id"))
-				elif role == "CLIENT":
-					all_reqs = list_requirements_for_client(user.get("client_id"))
-				
-				msg_lower = message.lower()
-				best_match = None
+			msg_lower = message.lower()
+			best_match = None
+			
+			for r in all_reqs:
+				title = (r.get("title") or "").lower()
+				client = (r.get("client_name") or "").lower()
 				
-				for r in all_reqs:
-					title = (r.get("title") or "").lower()
-					client = (r.get("client_name") or "").lower()
-					
-					score = 0
-					if title and title in msg_lower:
-						score += 2
-					if client and client in msg_lower:
-						score += 3
-					
-					if score > 0:
-						if best_match is None or score > best_match[1]:
-							best_match = (r["id"], score)
+				score = 0
+				if title and title in msg_lower:
+					score += 2
+				if client and client in msg_lower:
+					score += 3
 				
-				if best_match:
-					req_id = best_match[0]
-
-			# if explicit id present fetch exact, else leave None and let LLM summarize available lists
-			context["requirement"] = get_requirement_by_id_for_user(req_id, user) if req_id else None
-			if req_id:
-				context["allocations"] = get_allocations_for_requirement(req_id)
+				if score > 0:
+					if best_match is None or score > best_match[1]:
+						best_match = (r["id"], score)
+			
+			if best_match:
+				req_id = best_match[0]
+
+		# if explicit id present fetch exact, else leave None and let LLM summarize available lists
+		context["requirement"] = None
+		if req_id:
+			tasks = {
+				"requirement": lambda: get_requirement_by_id_for_user(req_id, user),
+				"allocations": lambda: get_allocations_for_requirement(req_id),
 				# Add tracking data for the requirement
-				context["candidate_progress"] = get_candidate_progress_for_requirement(req_id, user)
-				context["tracking_stats"] = get_tracking_stats_for_requirement(req_id, user)
-				# Check if asking about last round or qualified candidates
-				if any(k in message.lower() for k in ["last round", "final round", "qualified", "passed", "selected", "completed"]):
-					context["candidates_in_last_round"] = get_candidates_in_last_round(req_id, user)
-					context["qualified_candidates"] = get_qualified_candidates(req_id, user)
-			# For admins, if no specific requirement id, include full list
-			if not req_id and (user.get("role", "").upper() == "ADMIN"):
-				context["requirements"] = list_requirements_for_admin()
-
-		elif intent == "client":
-			# extract numeric/id after 'client'
-			client_id = None
-			parts = message.split()
-			if "client" in [p.lower() for p in parts]:
-				idx = [p.lower() for p in parts].index("client")
-				if idx + 1 < len(parts):
-					client_id = parts[idx + 1]
-			# Specific client details
-			context["client"] = get_client_by_id_for_user(client_id, user) if client_id else None
-			# Also include this client's requirements for convenience
-			if context.get("client"):
-				context["requirements"] = list_requirements_for_client(client_id)
-			# Generic client listing
-			if any(k in (message.lower()) for k in ["clients", "all clients", "list clients", "get clients"]) and not context.get("client"):
-				context["clients"] = list_clients_for_user(user)
-
-		elif intent == "allocations":
-			# recruiter scope
-			if user.get("role", "").upper() == "RECRUITER":
-				context["requirements"] = list_requirements_for_recruiter(user.get("id"))
-			else:
-				context["requirements"] = []
-
-		elif intent == "candidates":
-			# Fetch candidates list for admin and delivery manager
-			context["candidates"] = list_candidates_for_user(user)
-			# Also try to extract candidate name if mentioned
-			ml = message.lower()
-			for word in message.split():
-				if len(word) > 2:  # Skip very short words
-					candidate = get_candidate_by_name_for_user(word, user)
-					if candidate:
-						context["candidate"] = candidate
-						break
-
-
-		elif intent == "interview":
-			from services.ai_data_service import get_interviews_for_user
-			context["interviews"] = get_interviews_for_user(user)
-
-		elif intent == "screening":
-			from services.ai_data_service import get_candidate_screening_for_user
-			context["screenings"] = get_candidate_screening_for_user(user)
-
-		elif intent == "logs":
-			from services.ai_data_service import get_interaction_logs_for_admin
-			if user.get("role", "").upper() == "ADMIN":
-				context["logs"] = get_interaction_logs_for_admin()
-			else:
-				context["logs"] = "Access Denied. Only Admin can view logs."
+				"candidate_progress": lambda: get_candidate_progress_for_requirement(req_id, user),
+				"tracking_stats": lambda: get_tracking_stats_for_requirement(req_id, user),
+			}
+			# Check if asking about last round or qualified candidates
+			if any(k in message.lower() for k in ["last round", "final round", "qualified", "passed", "selected", "completed"]):
+				tasks["candidates_in_last_round"] = lambda: get_candidates_in_last_round(req_id, user)
+				tasks["qualified_candidates"] = lambda: get_qualified_candidates(req_id, user)
+			context.update(fetch_parallel(tasks))
+		# For admins, if no specific requirement id, include full list
+		if not req_id and (user.get("role", "").upper() == "ADMIN"):
+			context["requirements"] = list_requirements_for_admin()
+
+	elif intent == "client":
+		# extract numeric/id after 'client'
+		client_id = None
+		parts = message.split()
+		if "client" in [p.lower() for p in parts]:
+			idx = [p.lower() for p in parts].index("client")
+			if idx + 1 < len(parts):
+				client_id = parts[idx + 1]
+		# Specific client details
+		context["client"] = get_client_by_id_for_user(client_id, user) if client_id else None
+		# Also include this client's requirements for convenience
+		if context.get("client"):
+			context["requirements"] = list_requirements_for_client(client_id)
+		# Generic client listing
+		if any(k in (message.lower()) for k in ["clients", "all clients", "list clients", "get clients"]) and not context.get("client"):
+			context["clients"] = list_clients_for_user(user)
+
+	elif intent == "allocations":
+		# recruiter scope
+		if user.get("role", "").upper() == "RECRUITER":
+			context["requirements"] = list_requirements_for_recruiter(user.get("id"))
+		else:
+			context["requirements"] = []
+
+	elif intent == "candidates":
+		# Fetch candidates list for admin and delivery manager
+		context["candidates"] = list_candidates_for_user(user)
+		# Also try to extract candidate name/email if mentioned (single index lookup for the whole message)
+		candidate = find_candidate_in_message_for_user(message, user)
+		if candidate:
+			context["candidate"] = candidate
+
+
+	elif intent == "interview":
+		from services.ai_data_service import get_interviews_for_user
+		context["interviews"] = get_interviews_for_user(user)
+
+	elif intent == "screening":
+		from services.ai_data_service import get_candidate_screening_for_user
+		context["screenings"] = get_candidate_screening_for_user(user)
+
+	elif intent == "logs":
+		from services.ai_data_service import get_interaction_logs_for_admin
+		if user.get("role", "").upper() == "ADMIN":
+			context["logs"] = get_interaction_logs_for_admin()
+		else:
+			context["logs"] = "Access Denied. Only Admin can view logs."
+
+	elif intent == "users":
+		# If admin wants users/recruiters, include list; else scope appropriately
+		role = (user.get("role") or "").upper()
+		if role == "ADMIN":
+			context["users"] = list_users_for_admin()
+			context["usersdata"] = list_usersdata()
+		else:
+			context["recruiters"] = list_recruiters_for_user(user)
+
+	# If admin or delivery manager with a general question, provide broad context to answer freely
+	if (user.get("role", "").upper() in ["ADMIN", "DELIVERY_MANAGER"]) and intent == "general":
+		# Load key datasets so LLM can answer "anything" within ATS
+		datasets = {
+			"clients": lambda: list_clients_for_user(user),
+			"users": list_users_for_admin,
+			"usersdata": list_usersdata,
+			"requirements": list_requirements_for_admin,
+			"candidates": lambda: list_candidates_for_user(user),
+			"allocations": list_requirement_allocations,
+		}
+		missing = {name: fetch for name, fetch in datasets.items() if not context.get(name)}
+		context.update(fetch_parallel(missing))
+
+	return intent
 
-		elif intent == "users":
-			# If admin wants users/recruiters, include list; else scope appropriately
-			role = (user.get("role") or "").upper()
-			if role == "ADMIN":
-				context["users"] = list_users_for_admin()
-				context["usersdata"] = list_usersdata()
-			else:
-				context["recruiters"] = list_recruiters_for_user(user)
-
-		# If admin or delivery manager with a general question, provide broad context to answer freely
-		if (user.get("role", "").upper() in ["ADMIN", "DELIVERY_MANAGER"]) and intent == "general":
-			# Load key datasets so LLM can answer "anything" within ATS
-			context["clients"] = context.get("clients") or list_clients_for_user(user)
-			context["users"] = context.get("users") or list_users_for_admin()
-			context["usersdata"] = context.get("usersdata") or list_usersdata()
-			context["requirements"] = context.get("requirements") or list_requirements_for_admin()
-			context["candidates"] = context.get("candidates") or list_candidates_for_user(user)
-			context["allocations"] = context.get("allocations") or list_requirement_allocations()
-
-		# 3) Call LLM with system prompt, original question, and structured context
-		answer = call_llm(system_prompt, context, message)
+
+def _process_chat_request(user: Dict[str, Any], message: str, system_prompt: str) -> Dict[str, Any]:
+	"""
+	Core logic to gather context and call LLM.
+	Returns a dict with 'answer' and 'context'.
+	"""
+	context = _base_chat_context(user, message)
+
+	try:
+		intent = _gather_chat_context(user, message, context)
+
+		# Call LLM with system prompt, original question, and structured context
+		answer = call_llm(system_prompt, context, message, intent=intent)
 		return {"answer": answer, "context": context}
 
 	except Exception as e:
@@ -245,6 +262,33 @@ def chat() -> Any:
 	return jsonify(result), 200
 
 
+_EMOTION_TAG_RE = re.compile(r"^\s*\[(HAPPY|NEUTRAL|THINKING|CONCERNED|EXCITED|SAD)\]", re.IGNORECASE)
+
+
+def _split_emotion(raw_answer: str):
+	"""Return (emotion, text) with the leading emotion tag removed. Defaults to NEUTRAL."""
+	match = _EMOTION_TAG_RE.search(raw_answer)
+	if match:
+		return match.group(1).upper(), raw_answer[match.end():].strip()
+	return "NEUTRAL", raw_answer
+
+
+def _log_interaction(session_id, user: Dict[str, Any], message: str, text: str, emotion: str) -> None:
+	try:
+		conn = get_db_connection()
+		if conn:
+			cursor = conn.cursor()
+			cursor.execute("""
+				INSERT INTO interaction_logs (session_id, user_id, user_role, message_in, message_out, emotion)
+				VALUES (%s, %s, %s, %s, %s, %s)
+			""", (session_id, user.get("id"), user.get("role"), message, text, emotion))
+			conn.commit()
+			cursor.close()
+			conn.close()
+	except Exception as e:
+		print(f"Failed to log interaction: {e}")
+
+
 @ai_bp.route("/avatar-chat", methods=["POST"])
 def avatar_chat() -> Any:
 	"""
@@ -264,31 +308,8 @@ def avatar_chat() -> Any:
 	result = _process_chat_request(user, message, AVATAR_SYSTEM_PROMPT)
 	raw_answer = result.get("answer", "I'm having trouble connecting to my brain right now.")
 	
-	# Extract emotion tag
-	emotion = "NEUTRAL"
-	clean_text = raw_answer
-	
-	import re
-	match = re.search(r"^\s*\[(HAPPY|NEUTRAL|THINKING|CONCERNED|EXCITED|SAD)\]", raw_answer, re.IGNORECASE)
-	if match:
-		emotion = match.group(1).upper()
-		clean_text = re.sub(r"^\s*\[(HAPPY|NEUTRAL|THINKING|CONCERNED|EXCITED|SAD)\]", "", raw_answer, flags=re.IGNORECASE).strip()
-	
-	# TODO: Log interaction with session_id
-	try:
-		from utils.db import get_db_connection
-		conn = get_db_connection()
-		if conn:
-			cursor = conn.cursor()
-			cursor.execute("""
-				INSERT INTO interaction_logs (session_id, user_id, user_role, message_in, message_out, emotion)
-				VALUES (%s, %s, %s, %s, %s, %s)
-			""", (session_id, user.get("id"), user.get("role"), message, clean_text, emotion))
-			conn.commit()
-			cursor.close()
-			conn.close()
-	except Exception as e:
-		print(f"Failed to log interaction: {e}")
+	emotion, clean_text = _split_emotion(raw_answer)
+	_log_interaction(session_id, user, message, clean_text, emotion)
 	
 	return jsonify({
 		"text": clean_text,
@@ -296,6 +317,134 @@ def avatar_chat() -> Any:
 	}), 200
 
 
+# --------------------- Streaming (Server-Sent Events) ---------------------
+#
+# Events:  chunk {"text"}  ->  done {"answer"} / {"text", "emotion"}
+# Avatar streams also send a single emotion {"emotion"} event before the first chunk.
+# An error {"error"} event replaces everything if the ATS context can't be loaded.
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+	return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_response(events: Iterator[str]) -> Response:
+	return Response(
+		stream_with_context(events),
+		mimetype="text/event-stream",
+		# X-Accel-Buffering stops nginx from holding chunks back
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
+
+
+def _stream_answer(user: Dict[str, Any], message: str, system_prompt: str) -> Iterator[str]:
+	"""Gather context, then yield raw LLM text chunks. Raises if the context can't be built."""
+	context = _base_chat_context(user, message)
+	intent = _gather_chat_context(user, message, context)
+	yield from stream_llm(system_prompt, context, message, intent=intent)
+
+
+def _with_emotion(chunks: Iterator[str]) -> Iterator[Tuple[str, str]]:
+	"""
+	Yield ("emotion", TAG) once, then ("text", chunk) pieces with the leading
+	emotion tag stripped. Buffers only until the tag is known (usually the
+	first chunk).
+	"""
+	buffer = ""
+	emotion_sent = False
+	strip_leading = True
+
+	for chunk in chunks:
+		if not emotion_sent:
+			buffer += chunk
+			head = buffer.lstrip()
+			match = _EMOTION_TAG_RE.match(buffer)
+			# Undecided while the buffer could still become a tag, e.g. "[HAP"
+			if not match and head.startswith("[") and "]" not in head and len(head) < 12:
+				continue
+			emotion_sent = True
+			if match:
+				yield "emotion", match.group(1).upper()
+				chunk = buffer[match.end():]
+			else:
+				yield "emotion", "NEUTRAL"
+				chunk = buffer
+				strip_leading = False
+
+		if strip_leading:
+			chunk = chunk.lstrip()
+			if not chunk:
+				continue
+			strip_leading = False
+		yield "text", chunk
+
+	if not emotion_sent:
+		emotion, text = _split_emotion(buffer)
+		yield "emotion", emotion
+		if text:
+			yield "text", text
+
+
+@ai_bp.route("/chat/stream", methods=["POST"])
+def chat_stream() -> Any:
+	"""Same request as /chat; the answer is streamed as SSE chunk events."""
+	data = request.get_json() or {}
+	message = (data.get("message") or "").strip()
+	user = data.get("user") or {}
+
+	if not user or not user.get("role"):
+		return jsonify({"answer": "Unauthorized: missing user/role.", "context": None}), 401
+	if not message:
+		return jsonify({"answer": "Please provide a message.", "context": None}), 400
+
+	def events():
+		parts = []
+		try:
+			for chunk in _stream_answer(user, message, DEFAULT_SYSTEM_PROMPT):
+				parts.append(chunk)
+				yield _sse("chunk", {"text": chunk})
+		except Exception as e:
+			yield _sse("error", {"error": f"AI processing failed: {e}"})
+			return
+		yield _sse("done", {"answer": "".join(parts)})
+
+	return _sse_response(events())
+
+
+@ai_bp.route("/avatar-chat/stream", methods=["POST"])
+def avatar_chat_stream() -> Any:
+	"""Same request as /avatar-chat; streams an emotion event, then text chunks. Logged once complete."""
+	data = request.get_json() or {}
+	message = (data.get("message") or "").strip()
+	user = data.get("user") or {}
+	session_id = data.get("session_id")
+
+	if not user or not user.get("role"):
+		return jsonify({"text": "I need to know who you are first.", "emotion": "NEUTRAL"}), 401
+	if not message:
+		return jsonify({"text": "I'm listening...", "emotion": "NEUTRAL"}), 400
+
+	def events():
+		emotion = "NEUTRAL"
+		parts = []
+		try:
+			for kind, value in _with_emotion(_stream_answer(user, message, AVATAR_SYSTEM_PROMPT)):
+				if kind == "emotion":
+					emotion = value
+					yield _sse("emotion", {"emotion": emotion})
+				else:
+					parts.append(value)
+					yield _sse("chunk", {"text": value})
+		except Exception as e:
+			yield _sse("error", {"error": f"AI processing failed: {e}"})
+			return
+
+		text = "".join(parts).strip()
+		yield _sse("done", {"text": text, "emotion": emotion})
+		_log_interaction(session_id, user, message, text, emotion)
+
+	return _sse_response(events())
+
+
 def register_ai_routes(app) -> None:
 	# Attach blueprint to the Flask app without changing existing routes
 	app.register_blueprint(ai_bp)
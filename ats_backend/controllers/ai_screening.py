@@ -1,13 +1,24 @@
-from flask import Blueprint, request, jsonify
-from utils.gemini import run_gemini_screening
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from utils.gemini import run_gemini_screening
+from utils.prescreen import prescreen, REJECT as PRESCREEN_REJECT
+from utils.event_notifier import notify_event
 from services.ai_data_service import get_db_connection
+from services.screening_jobs import enqueue_screening_job, get_screening_job
+from services.match_engine import get_match_engine
+from services.resume_text import get_resume_excerpt
+from services.requirement_funnel import track_funnel
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pymysql.cursors
 import requests
 import json
+import os
+import time
 
 screening_bp = Blueprint('screening', __name__, url_prefix="/api")
 
+# Stored in candidate_screening.model_version when the AI output doesn't name its model
+DEFAULT_MODEL_VERSION = "gemini-2.5"
+
 
 @screening_bp.route("/screen-candidate", methods=["POST"])
 def screen_candidate():
@@ -21,128 +32,474 @@ def screen_candidate():
         if not requirement_ref:
             return jsonify({"error": "requirement identifier is required"}), 400
 
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({"error": "Database connection failed"}), 500
-        
-        # Use DictCursor explicitly to avoid tuple index errors
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        # Job mode: enqueue and return immediately; a bounded worker pool runs Gemini
+        if body.get("async") or request.args.get("mode") == "async":
+            conn = get_db_connection()
+            if not conn:
+                return jsonify({"error": "Database connection failed"}), 500
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                cursor.execute("SELECT id FROM candidates WHERE id = %s", (candidate_id,))
+                candidate = cursor.fetchone()
+                requirement = _resolve_requirement(cursor, requirement_ref)
+            finally:
+                cursor.close()
+                conn.close()
+
+            if not candidate:
+                return jsonify({"error": "Candidate not found"}), 404
+            if not requirement:
+                return jsonify({"error": "Requirement not found"}), 404
+
+            job_id = enqueue_screening_job(candidate_id, requirement["id"])
+            return jsonify({
+                "message": "⏳ Screening queued",
+                "job_id": job_id,
+                "status": "QUEUED",
+                "status_url": f"/api/screening-jobs/{job_id}",
+            }), 202
+
+        outcome = screen_candidate_now(candidate_id, requirement_ref)
+        if outcome.get("error"):
+            return jsonify({"error": outcome["error"]}), outcome.get("http_status", 500)
+        return jsonify(_screening_response(outcome)), 200
+
+    except Exception as e:
+        print("❌ Screening error:", e)
+        return jsonify({"error": str(e)}), 500
 
+
+@screening_bp.route("/screening-jobs/<job_id>", methods=["GET"])
+def screening_job_status(job_id):
+    try:
+        job = get_screening_job(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        print("❌ screening_job_status error:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+def screen_candidate_now(candidate_id, requirement_ref):
+    """
+    Screen one candidate against one requirement and record the outcome.
+
+    The DB connection is only held while reading inputs and writing results,
+    not during the Gemini round trip. Returns {"candidate_id", "requirement_id",
+    "ai_success", "result", "ai_error"} or {"error", "http_status"}.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return {"error": "Database connection failed", "http_status": 500}
+    # Use DictCursor explicitly to avoid tuple index errors
+    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    try:
         cursor.execute("SELECT * FROM candidates WHERE id = %s", (candidate_id,))
         candidate = cursor.fetchone()
-
         requirement = _resolve_requirement(cursor, requirement_ref)
+    finally:
+        cursor.close()
+        conn.close()
 
-        if not candidate:
-            return jsonify({"error": "Candidate not found"}), 404
-        if not requirement:
-            return jsonify({"error": "Requirement not found"}), 404
+    if not candidate:
+        return {"error": "Candidate not found", "http_status": 404}
+    if not requirement:
+        return {"error": "Requirement not found", "http_status": 404}
 
-        # --- AI Screening ---
-        ai_success = False
-        ai_error_msg = None
-        normalized_output = {}
+    outcome = _score_candidate(candidate, requirement)
 
-        try:
-            ai_output = run_gemini_screening(candidate, requirement)
-            normalized_output, normalize_error = _normalize_ai_output(ai_output)
-            if normalize_error:
-                ai_error_msg = normalize_error
-            else:
-                ai_success = True
-        except Exception as ai_e:
-            ai_error_msg = str(ai_e)
-            print(f"⚠️ Gemini screening failed: {ai_e}")
+    conn = get_db_connection()
+    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    try:
+        _record_screening(cursor, candidate_id, requirement, outcome)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
 
-        # --- Tracker / Progress Update (RUNS EVEN IF AI FAILS) ---
-        
-        # 1. Insert Screening Record (only if success, or maybe partial?)
-        # For now, we only insert screening record if AI succeeded, 
-        # but we ALWAYS update candidate_progress to avoid "hanging" state.
-        
-        if ai_success:
-            cursor.execute("""
-                INSERT INTO candidate_screening
-                (candidate_id, requirement_id, ai_score, ai_rationale, recommend, red_flags, model_version)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                candidate_id,
-                requirement["id"],
-                normalized_output["score"],
-                json.dumps(normalized_output["rationale"]),
-                normalized_output["recommend"],
-                json.dumps(normalized_output["red_flags"]),
-                "gemini-2.5"
-            ))
-            
-            # Update progress for success case
-            _touch_candidate_progress(
-                cursor,
-                candidate_id,
-                requirement["id"],
-                requirement.get("category", "IT"),
-                stage="Manual Review",
-                status="PENDING", # Was REVIEW_REQUIRED (invalid enum)
-                decision="NONE"
-            )
-            
-            # Queue for assessment
-            cursor.execute("SHOW TABLES LIKE 'assesment_queue'")
-            if cursor.fetchone():
-                cursor.execute("""
-                    INSERT INTO assesment_queue (candidate_id, requirement_id, status)
-                    VALUES (%s, %s, 'PENDING')
-                """, (candidate_id, requirement["id"]))
-                
+    if outcome["ai_success"]:
+        _notify_screen_complete(candidate_id, requirement["id"], outcome["result"])
+
+    return {
+        "candidate_id": candidate_id,
+        "requirement_id": requirement["id"],
+        **outcome,
+    }
+
+
+def _score_candidate(candidate, requirement):
+    """
+    Run AI screening (no DB access). Returns {"ai_success", "result", "ai_error"}.
+
+    Clear-cut candidates are decided by the local pre-screen and never reach
+    Gemini; their result carries "prescreen": "REJECT" or "QUEUE".
+    """
+    try:
+        decided = prescreen(candidate, requirement)
+        if decided:
+            ai_output = decided
         else:
-            # AI Failed Case - Update tracker to indicate failure/manual need
-            print(f"⚠️ Updating tracker for failed screening: {ai_error_msg}")
+            # Extracted resume text (if any) goes into the prompt alongside the typed fields
+            candidate = dict(candidate, resume_excerpt=get_resume_excerpt(candidate))
+            ai_output = run_gemini_screening(candidate, requirement)
+        normalized_output, normalize_error = _normalize_ai_output(ai_output)
+        if normalize_error:
+            return {"ai_success": False, "result": {}, "ai_error": normalize_error}
+        if decided:
+            normalized_output["prescreen"] = decided["prescreen"]
+        return {"ai_success": True, "result": normalized_output, "ai_error": None}
+    except Exception as ai_e:
+        print(f"⚠️ Gemini screening failed: {ai_e}")
+        return {"ai_success": False, "result": {}, "ai_error": str(ai_e)}
+
+
+def _record_screening(cursor, candidate_id, requirement, outcome):
+    """
+    Persist a screening outcome. The tracker/progress row is updated even if
+    AI failed, so the candidate never sits in a "hanging" state.
+    """
+    if outcome["ai_success"]:
+        normalized_output = outcome["result"]
+        cursor.execute("""
+            INSERT INTO candidate_screening
+            (candidate_id, requirement_id, ai_score, ai_rationale, recommend, red_flags, model_version)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (
+            candidate_id,
+            requirement["id"],
+            normalized_output["score"],
+            json.dumps(normalized_output["rationale"]),
+            normalized_output["recommend"],
+            json.dumps(normalized_output["red_flags"]),
+            normalized_output["model_version"]
+        ))
+
+        if normalized_output.get("prescreen") == PRESCREEN_REJECT:
+            # Clearly outside the requirement: close it out without an assessment
             _touch_candidate_progress(
                 cursor,
                 candidate_id,
                 requirement["id"],
                 requirement.get("category", "IT"),
-                stage="Screening Failed", 
-                status="PENDING",  # Was REVIEW_REQUIRED (invalid enum)
-                decision="HOLD"            # Valid ENUM (instead of RETRY_NEEDED)
+                stage="Screening Rejected",
+                status="REJECTED",
+                decision="REJECT"
             )
+            return
 
-        conn.commit()
-        
-        # Webhook Notification (Best Effort)
-        if ai_success:
+        # Update progress for success case
+        _touch_candidate_progress(
+            cursor,
+            candidate_id,
+            requirement["id"],
+            requirement.get("category", "IT"),
+            stage="Manual Review",
+            status="PENDING", # Was REVIEW_REQUIRED (invalid enum)
+            decision="NONE"
+        )
+
+        # Queue for assessment (table is guaranteed by utils/migrations.py)
+        cursor.execute("""
+            INSERT INTO assesment_queue (candidate_id, requirement_id, status)
+            VALUES (%s, %s, 'PENDING')
+        """, (candidate_id, requirement["id"]))
+
+    else:
+        # AI Failed Case - Update tracker to indicate failure/manual need
+        print(f"⚠️ Updating tracker for failed screening: {outcome['ai_error']}")
+        _touch_candidate_progress(
+            cursor,
+            candidate_id,
+            requirement["id"],
+            requirement.get("category", "IT"),
+            stage="Screening Failed",
+            status="PENDING",  # Was REVIEW_REQUIRED (invalid enum)
+            decision="HOLD"            # Valid ENUM (instead of RETRY_NEEDED)
+        )
+
+
+def _notify_screen_complete(candidate_id, requirement_id, normalized_output):
+    # Webhook Notification (Best Effort)
+    try:
+        requests.post(
+            "http://localhost:5678/webhook/screen_complete",
+            json={
+                "candidate_id": candidate_id,
+                "requirement_id": requirement_id,
+                "ai_score": normalized_output.get("score"),
+                "recommend": normalized_output.get("recommend")
+            },
+            timeout=3
+        )
+    except requests.RequestException:
+        print("⚠️ Could not send event to n8n (server offline).")
+
+
+def _screening_response(outcome):
+    if outcome["ai_success"] and outcome["result"].get("prescreen"):
+        return {
+            "message": "✅ Candidate decided by local pre-screen (AI screening skipped).",
+            "result": outcome["result"]
+        }
+    if outcome["ai_success"]:
+        return {
+            "message": "✅ Candidate screened successfully!",
+            "result": outcome["result"]
+        }
+    # Return success (200) even if AI failed, because we successfully created a manual tracker entry.
+    # This allows the frontend to refresh and show the "Screening Failed" status in the tracker.
+    return {
+        "message": f"⚠️ AI Screening failed ({outcome['ai_error']}), but tracker was created for manual review.",
+        "result": {"score": 0, "recommend": "MANUAL_REVIEW"}
+    }
+
+
+# ---------- Bulk screening: one requirement, many candidates ----------
+SCREENING_BULK_CONCURRENCY = max(1, int(os.getenv("SCREENING_BULK_CONCURRENCY", "4")))
+SCREENING_BULK_MAX = max(1, int(os.getenv("SCREENING_BULK_MAX", "500")))
+_BULK_FLUSH_SIZE = 25
+
+
+@screening_bp.route("/screen-candidates/bulk", methods=["POST"])
+def screen_candidates_bulk():
+    """
+    Screen many candidates against one requirement.
+
+    Body: {"requirement_id": ..., "candidate_ids": [1, 2, ...]}
+       or {"requirement_id": ..., "all_unscreened": true}
+    Optional: "concurrency" (capped by SCREENING_BULK_CONCURRENCY),
+              "top_k" (pre-rank locally with the match engine; only the best k go to Gemini).
+
+    Streams newline-delimited JSON: one line per candidate as its Gemini call
+    completes, then a final {"summary": ...} line. Results are written with
+    executemany in batches rather than one round trip per candidate.
+    """
+    try:
+        body = request.json or {}
+        requirement_ref = body.get("requirement_id") or body.get("requirement_ref")
+        candidate_ids = body.get("candidate_ids") or []
+        all_unscreened = bool(body.get("all_unscreened"))
+
+        if not requirement_ref:
+            return jsonify({"error": "requirement identifier is required"}), 400
+        if not isinstance(candidate_ids, list):
+            return jsonify({"error": "candidate_ids must be a list"}), 400
+        if not candidate_ids and not all_unscreened:
+            return jsonify({"error": "candidate_ids or all_unscreened is required"}), 400
+        try:
+            candidate_ids = list(dict.fromkeys(int(cid) for cid in candidate_ids))
+        except (TypeError, ValueError):
+            return jsonify({"error": "candidate_ids must be integers"}), 400
+        if len(candidate_ids) > SCREENING_BULK_MAX:
+            return jsonify({"error": f"At most {SCREENING_BULK_MAX} candidates per call"}), 400
+
+        try:
+            concurrency = int(body.get("concurrency") or SCREENING_BULK_CONCURRENCY)
+        except (TypeError, ValueError):
+            concurrency = SCREENING_BULK_CONCURRENCY
+        concurrency = max(1, min(concurrency, SCREENING_BULK_CONCURRENCY))
+
+        top_k = body.get("top_k")
+        if top_k is not None:
             try:
-                requests.post(
-                    "http://localhost:5678/webhook/screen_complete",
-                    json={
-                        "candidate_id": candidate_id,
-                        "requirement_id": requirement["id"],
-                        "ai_score": normalized_output.get("score"),
-                        "recommend": normalized_output.get("recommend")
-                    },
-                    timeout=3
-                )
-            except requests.RequestException:
-                print("⚠️ Could not send event to n8n (server offline).")
+                top_k = int(top_k)
+            except (TypeError, ValueError):
+                return jsonify({"error": "top_k must be an integer"}), 400
+            if top_k < 1:
+                return jsonify({"error": "top_k must be at least 1"}), 400
+
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({"error": "Database connection failed"}), 500
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        try:
+            requirement = _resolve_requirement(cursor, requirement_ref)
+            if not requirement:
+                return jsonify({"error": "Requirement not found"}), 404
 
+            if candidate_ids:
+                placeholders = ",".join(["%s"] * len(candidate_ids))
+                cursor.execute(f"SELECT * FROM candidates WHERE id IN ({placeholders})", tuple(candidate_ids))
+            else:
+                cursor.execute("""
+                    SELECT c.* FROM candidates c
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM candidate_screening cs
+                        WHERE cs.candidate_id = c.id AND cs.requirement_id = %s
+                    )
+                    ORDER BY c.id
+                    LIMIT %s
+                """, (requirement["id"], SCREENING_BULK_MAX))
+            candidates = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+        found_ids = {c["id"] for c in candidates}
+        missing_ids = [cid for cid in candidate_ids if cid not in found_ids]
+
+        ranked_out = 0
+        if top_k is not None and len(candidates) > top_k:
+            ranked = get_match_engine().top_candidates_for_requirement(
+                requirement["id"], k=top_k, candidate_ids=found_ids,
+            ) or []
+            by_id = {c["id"]: c for c in candidates}
+            kept = [by_id[r["candidate_id"]] for r in ranked if r["candidate_id"] in by_id]
+            if kept:
+                ranked_out = len(candidates) - len(kept)
+                candidates = kept
+
+        return Response(
+            stream_with_context(_stream_bulk_screening(requirement, candidates, missing_ids, concurrency, ranked_out)),
+            mimetype="application/x-ndjson",
+        )
+
+    except Exception as e:
+        print("❌ Bulk screening error:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+def _stream_bulk_screening(requirement, candidates, missing_ids, concurrency, ranked_out=0):
+    started = time.monotonic()
+    pending_writes = []
+    counts = {"screened": 0, "failed": 0, "not_found": len(missing_ids), "ranked_out": ranked_out, "prescreened": 0}
+
+    for cid in missing_ids:
+        yield json.dumps({"candidate_id": cid, "error": "Candidate not found"}) + "\n"
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk-screening") as pool:
+        futures = {pool.submit(_score_candidate, c, requirement): c["id"] for c in candidates}
+        for future in as_completed(futures):
+            candidate_id = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = {"ai_success": False, "result": {}, "ai_error": str(e)}
+
+            counts["screened" if outcome["ai_success"] else "failed"] += 1
+            if outcome["result"].get("prescreen"):
+                counts["prescreened"] += 1
+            pending_writes.append((candidate_id, outcome))
+            if len(pending_writes) >= _BULK_FLUSH_SIZE:
+                write_error = _flush_bulk_writes(requirement, pending_writes)
+                if write_error:
+                    yield json.dumps({"write_error": write_error, "candidate_ids": [cid for cid, _ in pending_writes]}) + "\n"
+                pending_writes = []
+
+            yield json.dumps({
+                "candidate_id": candidate_id,
+                "ai_success": outcome["ai_success"],
+                "result": outcome["result"] if outcome["ai_success"] else {"score": 0, "recommend": "MANUAL_REVIEW"},
+                "error": outcome["ai_error"],
+            }, default=str) + "\n"
+
+    if pending_writes:
+        write_error = _flush_bulk_writes(requirement, pending_writes)
+        if write_error:
+            yield json.dumps({"write_error": write_error, "candidate_ids": [cid for cid, _ in pending_writes]}) + "\n"
+
+    summary = {
+        "requirement_id": requirement["id"],
+        "total": len(candidates) + len(missing_ids) + ranked_out,
+        **counts,
+        "elapsed_ms": round((time.monotonic() - started) * 1000),
+    }
+    # One batch event instead of a webhook per candidate
+    notify_event("screening_batch_completed", summary)
+    yield json.dumps({"summary": summary}) + "\n"
+
+
+def _flush_bulk_writes(requirement, outcomes):
+    """Persist a batch of (candidate_id, outcome) pairs with executemany. Returns an error message or None."""
+    req_id = requirement["id"]
+    category = requirement.get("category", "IT")
+    screened = [(cid, o["result"]) for cid, o in outcomes if o["ai_success"]]
+    rejected = [cid for cid, r in screened if r.get("prescreen") == PRESCREEN_REJECT]
+    succeeded = [(cid, r) for cid, r in screened if r.get("prescreen") != PRESCREEN_REJECT]
+    failed = [cid for cid, o in outcomes if not o["ai_success"]]
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if screened:
+            cursor.executemany("""
+                INSERT INTO candidate_screening
+                (candidate_id, requirement_id, ai_score, ai_rationale, recommend, red_flags, model_version)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, [
+                (cid, req_id, r["score"], json.dumps(r["rationale"]), r["recommend"],
+                 json.dumps(r["red_flags"]), r["model_version"])
+                for cid, r in screened
+            ])
+        if succeeded:
+            cursor.executemany("""
+                INSERT INTO assesment_queue (candidate_id, requirement_id, status)
+                VALUES (%s, %s, 'PENDING')
+            """, [(cid, req_id) for cid, _ in succeeded])
+
+        _touch_candidate_progress_many(cursor, (
+            [(cid, req_id, category, "Manual Review", "PENDING", "NONE") for cid, _ in succeeded]
+            + [(cid, req_id, category, "Screening Rejected", "REJECTED", "REJECT") for cid in rejected]
+            + [(cid, req_id, category, "Screening Failed", "PENDING", "HOLD") for cid in failed]
+        ))
+        conn.commit()
+        return None
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Bulk screening write failed for {len(outcomes)} candidate(s): {e}")
+        return str(e)
+    finally:
         cursor.close()
         conn.close()
 
-        if ai_success:
-            return jsonify({
-                "message": "✅ Candidate screened successfully!",
-                "result": normalized_output
-            }), 200
-        else:
-            # Return success (200) even if AI failed, because we successfully created a manual tracker entry.
-            # This allows the frontend to refresh and show the "Screening Failed" status in the tracker.
-            return jsonify({
-                "message": f"⚠️ AI Screening failed ({ai_error_msg}), but tracker was created for manual review.",
-                "result": {"score": 0, "recommend": "MANUAL_REVIEW"} 
-            }), 200
 
+# ---------- Local match ranking (no Gemini) ----------
+MATCH_MAX_K = 500
+
+
+@screening_bp.route("/requirements/<req_id>/top-candidates", methods=["GET"])
+def top_candidates_for_requirement(req_id):
+    """
+    Rank all candidates against a requirement with the vectorized fallback
+    formula (services/match_engine.py).
+    Query: k (default 20), min_score, user_id + user_role (recruiters see their own candidates).
+    """
+    try:
+        k = max(1, min(request.args.get("k", 20, type=int) or 20, MATCH_MAX_K))
+        min_score = request.args.get("min_score", type=float)
+        owner = None
+        if (request.args.get("user_role") or "").upper() == "RECRUITER":
+            owner = request.args.get("user_id", type=int)
+
+        ranked = get_match_engine().top_candidates_for_requirement(req_id, k=k, owner=owner, min_score=min_score)
+        if ranked is None:
+            return jsonify({"error": "Requirement not found"}), 404
+        return jsonify({"requirement_id": req_id, "results": ranked}), 200
     except Exception as e:
-        print("❌ Screening error:", e)
+        print("❌ Top candidates error:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@screening_bp.route("/candidates/<int:candidate_id>/top-requirements", methods=["GET"])
+def top_requirements_for_candidate(candidate_id):
+    """
+    Rank requirements for a candidate with the same formula.
+    Query: k (default 10), status (e.g. OPEN).
+    """
+    try:
+        k = max(1, min(request.args.get("k", 10, type=int) or 10, MATCH_MAX_K))
+        status = (request.args.get("status") or "").strip() or None
+
+        ranked = get_match_engine().top_requirements_for_candidate(candidate_id, k=k, status=status)
+        if ranked is None:
+            return jsonify({"error": "Candidate not found"}), 404
+        return jsonify({"candidate_id": candidate_id, "results": ranked}), 200
+    except Exception as e:
+        print("❌ Top requirements error:", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -314,31 +671,17 @@ def recruiter_decision():
         req_id = requirement["id"]
         category = requirement.get("category", "IT")
 
-        # Apply decision updates
-        if decision == "REJECT":
-            cursor.execute("""
-                UPDATE candidate_progress
-                SET status='REJECTED', manual_decision='REJECT', stage_name='Rejected'
-                WHERE candidate_id=%s AND requirement_id=%s
-            """, (candidate_id, req_id))
-
-        elif decision == "HOLD":
-            cursor.execute("""
-                UPDATE candidate_progress
-                SET status='PENDING', manual_decision='HOLD', stage_name='On Hold'
-                WHERE candidate_id=%s AND requirement_id=%s
-            """, (candidate_id, req_id))
+        if decision == "MOVE_NEXT" and not next_stage:
+            return jsonify({"error": "next_stage required for MOVE_NEXT"}), 400
 
-        elif decision == "MOVE_NEXT":
-            if not next_stage:
-                return jsonify({"error": "next_stage required for MOVE_NEXT"}), 400
+        # End the lookup's read view; track_funnel's snapshots must see the latest rows
+        conn.commit()
 
-            cursor.execute("""
-                UPDATE candidate_progress
-                SET status='IN_PROGRESS', manual_decision='MOVE_NEXT', stage_name=%s
-                WHERE candidate_id=%s AND requirement_id=%s
-            """, (next_stage, candidate_id, req_id))
+        # Apply decision updates (and the matching requirement_funnel deltas)
+        with track_funnel(cursor, [(candidate_id, req_id)]):
+            _apply_recruiter_decision(cursor, candidate_id, req_id, decision, next_stage)
 
+        if decision == "MOVE_NEXT":
             cursor.execute("""
                 INSERT INTO interviews (candidate_id, requirement_id, category, stage, status)
                 VALUES (%s, %s, %s, %s, 'Scheduled')
@@ -400,6 +743,8 @@ def assign_candidate():
         # If it exists, we might not want to reset it unless user explicit. 
         # For now, we'll just ensure it exists.
         
+        # End the lookup's read view; track_funnel's snapshots must see the latest rows
+        conn.commit()
         _touch_candidate_progress(
             cursor,
             candidate_id,
@@ -492,17 +837,55 @@ def get_candidate_progress(candidate_id, req_ref):
 
 # --------------------- Helper functions ---------------------
 
+# Using stage_name instead of current_stage to match app.py schema
+_TOUCH_PROGRESS_SQL = """
+    INSERT INTO candidate_progress (candidate_id, requirement_id, category, stage_name, status, manual_decision)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        category=VALUES(category),
+        stage_name=VALUES(stage_name),
+        status=VALUES(status),
+        manual_decision=VALUES(manual_decision)
+"""
+
+
 def _touch_candidate_progress(cursor, candidate_id, requirement_id, category, stage, status="PENDING", decision="NONE"):
-    # Using stage_name instead of current_stage to match app.py schema
-    cursor.execute("""
-        INSERT INTO candidate_progress (candidate_id, requirement_id, category, stage_name, status, manual_decision)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            category=VALUES(category),
-            stage_name=VALUES(stage_name),
-            status=VALUES(status),
-            manual_decision=VALUES(manual_decision)
-    """, (candidate_id, requirement_id, category or "IT", stage, status, decision or "NONE"))
+    with track_funnel(cursor, [(candidate_id, requirement_id)]):
+        cursor.execute(_TOUCH_PROGRESS_SQL, (candidate_id, requirement_id, category or "IT", stage, status, decision or "NONE"))
+
+
+def _touch_candidate_progress_many(cursor, rows):
+    """rows: iterable of (candidate_id, requirement_id, category, stage, status, decision)."""
+    params = [
+        (candidate_id, requirement_id, category or "IT", stage, status, decision or "NONE")
+        for candidate_id, requirement_id, category, stage, status, decision in rows
+    ]
+    if params:
+        with track_funnel(cursor, [(p[0], p[1]) for p in params]):
+            cursor.executemany(_TOUCH_PROGRESS_SQL, params)
+
+
+def _apply_recruiter_decision(cursor, candidate_id, req_id, decision, next_stage):
+    if decision == "REJECT":
+        cursor.execute("""
+            UPDATE candidate_progress
+            SET status='REJECTED', manual_decision='REJECT', stage_name='Rejected'
+            WHERE candidate_id=%s AND requirement_id=%s
+        """, (candidate_id, req_id))
+
+    elif decision == "HOLD":
+        cursor.execute("""
+            UPDATE candidate_progress
+            SET status='PENDING', manual_decision='HOLD', stage_name='On Hold'
+            WHERE candidate_id=%s AND requirement_id=%s
+        """, (candidate_id, req_id))
+
+    elif decision == "MOVE_NEXT":
+        cursor.execute("""
+            UPDATE candidate_progress
+            SET status='IN_PROGRESS', manual_decision='MOVE_NEXT', stage_name=%s
+            WHERE candidate_id=%s AND requirement_id=%s
+        """, (next_stage, candidate_id, req_id))
 
 
 def _resolve_requirement(cursor, identifier):
@@ -567,9 +950,13 @@ def _normalize_ai_output(ai_output):
     if recommend not in {"SHORTLISTED", "REJECTED", "NEEDS_INTERVIEW"}:
         recommend = "NEEDS_INTERVIEW"
 
+    # Cache hits are tagged "<model>+cache" by run_gemini_screening, pre-screen decisions "prescreen-v1"
+    model_version = str(ai_output.get("model_version") or DEFAULT_MODEL_VERSION)[:50]
+
     return {
         "score": round(score, 2),
         "rationale": rationale,
         "red_flags": red_flags,
-        "recommend": recommend
+        "recommend": recommend,
+        "model_version": model_version
     }, None
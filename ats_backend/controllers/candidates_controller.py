@@ -0,0 +1,253 @@
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, jsonify, request
+
+from services.candidate_index import FIELD_WEIGHTS, get_candidate_index
+from utils.db import get_db_connection
+
+candidates_bp = Blueprint('candidates', __name__)
+
+# Columns a client may ask for via ?fields=. The large TEXT columns are only
+# returned when requested explicitly (or with fields=*).
+CANDIDATE_FIELDS = (
+    "id", "name", "email", "phone", "skills", "education", "experience",
+    "ctc", "ectc", "resume_filename", "created_by", "source", "created_at",
+)
+HEAVY_FIELDS = {"skills", "education", "experience"}
+DEFAULT_FIELDS = tuple(f for f in CANDIDATE_FIELDS if f not in HEAVY_FIELDS)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+def _parse_fields(raw):
+    if not raw:
+        return list(DEFAULT_FIELDS)
+    if raw.strip() == "*":
+        return list(CANDIDATE_FIELDS)
+    requested = [f.strip().lower() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in CANDIDATE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # id is always returned so the client can build the next cursor
+    return ["id"] + [f for f in CANDIDATE_FIELDS if f in requested and f != "id"]
+
+
+def _parse_datetime(raw, name):
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        raise ValueError(f"Invalid {name}; expected YYYY-MM-DD or ISO-8601 datetime")
+
+
+def _escape_like(value):
+    """Match `value` literally inside a LIKE pattern (backslash is MySQL's default escape)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _is_date_only(raw):
+    try:
+        date.fromisoformat(raw)
+        return True
+    except ValueError:
+        return False
+
+
+def _build_filters(args):
+    """Translate query args into a WHERE clause + params (cursor not included)."""
+    clauses, params = [], []
+
+    # Same role scoping as /get-candidates: recruiters only see their own candidates
+    user_id = args.get("user_id", type=int)
+    user_role = (args.get("user_role") or "").upper()
+    if user_role == "RECRUITER" and user_id:
+        clauses.append("created_by = %s")
+        params.append(user_id)
+
+    created_by = args.get("created_by", type=int)
+    if created_by:
+        clauses.append("created_by = %s")
+        params.append(created_by)
+
+    source = (args.get("source") or "").strip()
+    if source:
+        clauses.append("source = %s")
+        params.append(source)
+
+    skill = (args.get("skill") or "").strip()
+    if skill:
+        clauses.append("skills LIKE %s")
+        params.append(f"%{_escape_like(skill)}%")
+
+    created_from = _parse_datetime(args.get("created_from"), "created_from")
+    if created_from:
+        clauses.append("created_at >= %s")
+        params.append(created_from)
+
+    created_to_raw = (args.get("created_to") or "").strip()
+    created_to = _parse_datetime(created_to_raw, "created_to")
+    if created_to:
+        if _is_date_only(created_to_raw):
+            # A bare date covers that whole day: created_at < the next midnight
+            clauses.append("created_at < %s")
+            params.append(created_to + timedelta(days=1))
+        else:
+            clauses.append("created_at <= %s")
+            params.append(created_to)
+
+    return clauses, params
+
+
+@candidates_bp.route('/api/candidates', methods=['GET'])
+def list_candidates_page():
+    """
+    Keyset-paginated candidate list.
+
+    Query params:
+      limit         page size (default 50, max 200)
+      cursor        id of the last row of the previous page; returns rows with id < cursor
+      fields        comma-separated projection (default excludes skills/education/experience; * for all)
+      created_by, source, skill (substring), created_from, created_to   server-side filters
+      user_id, user_role   role scoping, same as /get-candidates
+      include_total  1/0; defaults to 1 on the first page only
+
+    Response: { items, next_cursor, has_more, total, limit }
+    """
+    try:
+        try:
+            fields = _parse_fields(request.args.get("fields"))
+            clauses, params = _build_filters(request.args)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+
+        limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        cursor_id = request.args.get("cursor", type=int) or request.args.get("last_id", type=int)
+
+        include_total_raw = request.args.get("include_total")
+        if include_total_raw is None:
+            include_total = cursor_id is None
+        else:
+            include_total = include_total_raw.lower() in ("1", "true", "yes")
+
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({"error": "Database connection failed"}), 500
+        cursor = conn.cursor(dictionary=True)
+
+        total = None
+        if include_total:
+            where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+            cursor.execute(f"SELECT COUNT(*) AS total FROM candidates{where}", tuple(params))
+            total = cursor.fetchone()["total"]
+
+        page_clauses, page_params = list(clauses), list(params)
+        if cursor_id:
+            page_clauses.append("id < %s")
+            page_params.append(cursor_id)
+        where = f" WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+
+        # Fetch one extra row to know whether another page exists
+        cursor.execute(
+            f"SELECT {', '.join(fields)} FROM candidates{where} ORDER BY id DESC LIMIT %s",
+            tuple(page_params) + (limit + 1,),
+        )
+        rows = cursor.fetchall()
+
+        cursor.close()
+        conn.close()
+
+        has_more = len(rows) > limit
+        items = rows[:limit]
+        return jsonify({
+            "items": items,
+            "next_cursor": items[-1]["id"] if has_more and items else None,
+            "has_more": has_more,
+            "total": total,
+            "limit": limit,
+        }), 200
+
+    except Exception as e:
+        print("❌ Error listing candidates page:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@candidates_bp.route('/api/candidates/search', methods=['GET'])
+def search_candidates():
+    """
+    Ranked candidate search (BM25 over name, email, phone and skills; see
+    services/candidate_index.py). Prefixes match too, so this works as you type.
+
+    Query params:
+      q           search text (required)
+      limit       max results (default 20, max 100)
+      in          comma-separated fields to search: name,email,phone,skills (default all)
+      fields      projection, same as /api/candidates
+      user_id, user_role   role scoping, same as /get-candidates
+
+    Response: { items (each with "score"), total_matches, query }
+    """
+    try:
+        query = (request.args.get("q") or "").strip()
+        if not query:
+            return jsonify({"error": "q is required"}), 400
+
+        try:
+            fields = _parse_fields(request.args.get("fields"))
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+
+        search_in = [f.strip().lower() for f in (request.args.get("in") or "").split(",") if f.strip()]
+        unknown = [f for f in search_in if f not in FIELD_WEIGHTS]
+        if unknown:
+            return jsonify({"error": f"Unknown search fields: {', '.join(unknown)}"}), 400
+
+        limit = request.args.get("limit", DEFAULT_SEARCH_LIMIT, type=int) or DEFAULT_SEARCH_LIMIT
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+        # Recruiters only see their own candidates
+        owner = None
+        user_id = request.args.get("user_id", type=int)
+        if (request.args.get("user_role") or "").upper() == "RECRUITER" and user_id:
+            owner = user_id
+
+        ranked, total_matches = get_candidate_index().search(
+            query,
+            limit=limit,
+            fields=tuple(search_in) or tuple(FIELD_WEIGHTS),
+            owner=owner,
+        )
+        if not ranked:
+            return jsonify({"items": [], "total_matches": 0, "query": query}), 200
+
+        ids = [cid for cid, _ in ranked]
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({"error": "Database connection failed"}), 500
+        cursor = conn.cursor(dictionary=True)
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(
+            f"SELECT {', '.join(fields)} FROM candidates WHERE id IN ({placeholders})",
+            tuple(ids),
+        )
+        rows = {row["id"]: row for row in cursor.fetchall()}
+        cursor.close()
+        conn.close()
+
+        items = []
+        for cid, score in ranked:
+            row = rows.get(cid)
+            if row:  # deleted by another process since the index was built
+                row["score"] = score
+                items.append(row)
+
+        return jsonify({"items": items, "total_matches": total_matches, "query": query}), 200
+
+    except Exception as e:
+        print("❌ Error searching candidates:", e)
+        return jsonify({"error": str(e)}), 500
@@ -50,35 +50,29 @@ def get_requirement_stats(req_id):
             conn.close()
             return jsonify({"error": "Requirement not found"}), 404
 
-        # Get stats from candidate_progress
+        # Stage/status counts from the materialized funnel (services/requirement_funnel.py)
         cursor.execute("""
-            SELECT cp.stage_name, cp.status, COUNT(*) as count, rs.stage_order 
-            FROM candidate_progress cp
-            LEFT JOIN requirement_stages rs ON rs.id = cp.stage_id
-            WHERE cp.requirement_id=%s 
-            AND cp.stage_name NOT IN ('Manual Review', 'Manual Assignments', 'Manual Assignment')
-            GROUP BY cp.stage_name, cp.status, rs.stage_order
+            SELECT f.stage_name, NULLIF(f.status, '') AS status,
+                   CAST(SUM(f.progress_count) AS SIGNED) AS count, rs.stage_order
+            FROM requirement_funnel f
+            LEFT JOIN requirement_stages rs ON rs.id = f.stage_id
+            WHERE f.requirement_id=%s
+            AND f.progress_count > 0
+            AND f.stage_name <> ''
+            AND f.stage_name NOT IN ('Manual Review', 'Manual Assignments', 'Manual Assignment')
+            GROUP BY f.stage_name, f.status, rs.stage_order
             ORDER BY rs.stage_order
         """, (req_id,))
         progress_stats = cursor.fetchall()
         
-        # Get total candidates applied/mapped
-        cursor.execute("SELECT COUNT(DISTINCT candidate_id) as total FROM candidate_progress WHERE requirement_id=%s", (req_id,))
-        total_res = cursor.fetchone()
-        total_candidates = total_res['total'] if total_res else 0
-
-        # Get selections (candidates who are hired/selected - Completed LAST round)
-        cursor.execute("""
-            SELECT COUNT(DISTINCT cp.candidate_id) as count
-            FROM candidate_progress cp
-            JOIN requirements r ON r.id = cp.requirement_id
-            JOIN requirement_stages rs ON rs.id = cp.stage_id
-            WHERE cp.requirement_id = %s
-              AND cp.status = 'COMPLETED'
-              AND rs.stage_order = r.no_of_rounds
-        """, (req_id,))
-        sel_res = cursor.fetchone()
-        selected_count = sel_res['count'] if sel_res else 0
+        # Total candidates applied/mapped and selections (completed the LAST round)
+        cursor.execute(
+            "SELECT candidates, qualified FROM requirement_funnel_totals WHERE requirement_id=%s",
+            (req_id,)
+        )
+        totals = cursor.fetchone()
+        total_candidates = totals['candidates'] if totals else 0
+        selected_count = totals['qualified'] if totals else 0
 
         cursor.close()
         conn.close()
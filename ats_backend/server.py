@@ -1,5 +1,5 @@
 from waitress import serve
-from app import app
+from app import app, startup
 from utils.logger import setup_logger
 
 logger = setup_logger("server")
@@ -7,6 +7,9 @@ logger = setup_logger("server")
 if __name__ == "__main__":
     logger.info("Starting ATS Backend with Waitress (Production Mode)...")
     logger.info("Serving on http://0.0.0.0:5001")
+
+    # Schema migrations, cache warm-up, AI routes and pending screening jobs
+    startup()
     
     # Run the server
     # threads=6 ensures we can handle multiple async screening requests efficiently
@@ -9,6 +9,7 @@ import pymysql
 import pymysql.cursors
 
 from utils.db import get_db_connection
+from services.candidate_index import get_candidate_index
 
 # Removed local get_db_connection to use shared logic from utils.db
 
@@ -86,6 +87,20 @@ def get_candidate_by_name_for_user(name: str, user: UserDict) -> Optional[Dict[s
 	)
 
 
+def find_candidate_in_message_for_user(message: str, user: UserDict) -> Optional[Dict[str, Any]]:
+	"""Resolve the candidate a chat message refers to: one in-memory index lookup over all words, then one row fetch."""
+	if not (_is_admin(user) or (user or {}).get("role", "").upper() == "DELIVERY_MANAGER"):
+		return None
+
+	matches = get_candidate_index().match(message, limit=1)
+	if not matches:
+		return None
+	return _fetch_one(
+		"SELECT id, name, email, phone, skills, education, experience, resume_filename FROM candidates WHERE id = %s",
+		(matches[0][0],),
+	)
+
+
 def get_candidate_track_for_user(candidate_id: str, user: UserDict) -> List[Dict[str, Any]]:
 
 	# Current schema has no candidate_track table; return empty safely
@@ -569,20 +584,18 @@ def get_org_stats_snapshot() -> Dict[str, int]:
 		return stats
 	cursor = conn.cursor(pymysql.cursors.DictCursor)
 	try:
-		cursor.execute("SELECT COUNT(*) AS total_requirements FROM requirements")
-		stats["total_requirements"] = cursor.fetchone().get("total_requirements", 0)
-
-		cursor.execute("SELECT COUNT(*) AS open_requirements FROM requirements WHERE status = 'OPEN'")
-		stats["open_requirements"] = cursor.fetchone().get("open_requirements", 0)
-
-		cursor.execute("SELECT COUNT(*) AS total_candidates FROM candidates")
-		stats["total_candidates"] = cursor.fetchone().get("total_candidates", 0)
-
-		cursor.execute("SELECT COUNT(*) AS total_users FROM users")
-		stats["total_users"] = cursor.fetchone().get("total_users", 0)
-
-		cursor.execute("SELECT COUNT(*) AS total_clients FROM clients")
-		stats["total_clients"] = cursor.fetchone().get("total_clients", 0)
+		# One round trip instead of five
+		cursor.execute("""
+			SELECT
+				(SELECT COUNT(*) FROM requirements) AS total_requirements,
+				(SELECT COUNT(*) FROM requirements WHERE status = 'OPEN') AS open_requirements,
+				(SELECT COUNT(*) FROM candidates) AS total_candidates,
+				(SELECT COUNT(*) FROM users) AS total_users,
+				(SELECT COUNT(*) FROM clients) AS total_clients
+		""")
+		row = cursor.fetchone() or {}
+		for key in stats:
+			stats[key] = int(row.get(key) or 0)
 
 		return stats
 	finally:
@@ -590,26 +603,6 @@ def get_org_stats_snapshot() -> Dict[str, int]:
 		conn.close()
 
 
-def build_user_self_context(user: UserDict) -> Dict[str, Any]:
-
-	if not user or not user.get("id"):
-		return {}
-
-	user_id = user.get("id")
-	role = (user.get("role") or "").upper()
-
-	context = {
-		"self_profile": get_user_profile_summary(user_id),
-		"self_assignments": list_assignments_for_user(user_id),
-		"self_candidates": list_candidates_created_by_user(user_id),
-	}
-
-	if role in ("ADMIN", "DELIVERY_MANAGER"):
-		context["self_org_stats"] = get_org_stats_snapshot()
-
-	return context
-
-
 def get_candidate_progress_for_requirement(requirement_id: str, user: UserDict) -> List[Dict[str, Any]]:
 	"""Get all candidate progress for a specific requirement with stage details."""
 	if not (_is_admin(user) or _is_recruiter(user) or (user or {}).get("role", "").upper() == "DELIVERY_MANAGER"):
@@ -709,42 +702,15 @@ def get_tracking_stats_for_requirement(requirement_id: str, user: UserDict) -> D
 		)
 		total_screened = cursor.fetchone().get("total", 0)
 		
-		# Get candidates in progress
-		cursor.execute(
-			"""
-			SELECT COUNT(DISTINCT cp.candidate_id) AS total
-			FROM candidate_progress cp
-			WHERE cp.requirement_id = %s AND cp.status IN ('PENDING', 'IN_PROGRESS')
-			""",
-			(requirement_id,)
-		)
-		in_progress = cursor.fetchone().get("total", 0)
-		
-		# Get qualified (completed last round)
+		# In progress / qualified (completed last round) / rejected, from the materialized funnel
 		cursor.execute(
-			"""
-			SELECT COUNT(DISTINCT cp.candidate_id) AS total
-			FROM candidate_progress cp
-			JOIN requirement_stages rs ON rs.id = cp.stage_id
-			JOIN requirements r ON r.id = cp.requirement_id
-			WHERE cp.requirement_id = %s 
-			  AND rs.stage_order = r.no_of_rounds
-			  AND cp.status = 'COMPLETED'
-			""",
-			(requirement_id,)
-		)
-		qualified = cursor.fetchone().get("total", 0)
-		
-		# Get rejected
-		cursor.execute(
-			"""
-			SELECT COUNT(DISTINCT candidate_id) AS total
-			FROM candidate_progress
-			WHERE requirement_id = %s AND status = 'REJECTED'
-			""",
+			"SELECT in_progress, qualified, rejected FROM requirement_funnel_totals WHERE requirement_id = %s",
 			(requirement_id,)
 		)
-		rejected = cursor.fetchone().get("total", 0)
+		totals = cursor.fetchone() or {}
+		in_progress = totals.get("in_progress", 0)
+		qualified = totals.get("qualified", 0)
+		rejected = totals.get("rejected", 0)
 		
 		return {
 			"total_screened": total_screened,
@@ -0,0 +1,326 @@
+"""
+In-process candidate search index.
+
+An inverted index over candidate name, email, phone and skills with BM25
+scoring (per field, weighted). It backs /api/candidates/search and the AI
+assistant's "which candidate is this message about" lookup, replacing
+LIKE '%x%' scans. Built lazily from `candidates`, updated by the candidate
+write routes, and fully reloaded every CANDIDATE_INDEX_REFRESH_SECONDS
+(default 300) to pick up writes made by other processes.
+"""
+import bisect
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pymysql.cursors
+
+from utils.db import db_connection
+from utils.skills import canonical_skill
+
+
+CANDIDATE_INDEX_REFRESH_SECONDS = float(os.getenv("CANDIDATE_INDEX_REFRESH_SECONDS", "300"))
+
+# Field weights: a name hit says more about relevance than a skills hit
+FIELD_WEIGHTS = {"name": 3.0, "email": 2.0, "phone": 2.0, "skills": 1.0}
+IDENTITY_FIELDS = ("name", "email")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Prefix expansions only for query words at least this long, at a discount
+MIN_PREFIX_LENGTH = 3
+PREFIX_WEIGHT = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_SKILL_SPLIT_RE = re.compile(r"[,/|;\n]")
+
+# Spellings that the plain [a-z0-9]+ tokenizer would mangle ("c++" -> "c")
+_SKILL_REWRITES = (
+    (re.compile(r"c\+\+"), "cpp"),
+    (re.compile(r"c#"), "csharp"),
+    (re.compile(r"f#"), "fsharp"),
+    (re.compile(r"(?<![a-z0-9])\.net\b"), "dotnet"),
+    (re.compile(r"([a-z0-9])\.(js|ts)\b"), r"\1\2"),  # node.js -> nodejs
+)
+
+# Words that show up in questions about candidates but never identify one
+STOP_WORDS = {
+    "the", "and", "for", "with", "about", "who", "what", "which", "show", "find", "list",
+    "tell", "give", "get", "details", "detail", "info", "information", "candidate",
+    "candidates", "applicant", "applicants", "profile", "please", "can", "you", "all",
+    "has", "have", "his", "her", "their", "is", "are", "of", "me", "any", "does",
+}
+
+
+def tokenize(text: Any) -> List[str]:
+    return _TOKEN_RE.findall(str(text or "").lower())
+
+
+def normalize_skill_text(text: Any) -> str:
+    value = str(text or "").lower()
+    for pattern, replacement in _SKILL_REWRITES:
+        value = pattern.sub(replacement, value)
+    return value
+
+
+def _email_tokens(email: Any) -> List[str]:
+    email = str(email or "").lower().strip()
+    if not email:
+        return []
+    return tokenize(email) + [email, email.split("@", 1)[0]]
+
+
+def _phone_tokens(phone: Any) -> List[str]:
+    digits = re.sub(r"\D", "", str(phone or ""))
+    if not digits:
+        return []
+    tokens = [digits]
+    if len(digits) > 10:
+        tokens.append(digits[-10:])  # national number without country code
+    return tokens
+
+
+def _skill_tokens(skills: Any) -> List[str]:
+    tokens = []
+    for phrase in _SKILL_SPLIT_RE.split(normalize_skill_text(skills)):
+        words = tokenize(phrase)
+        tokens.extend(words)
+        if len(words) > 1:
+            tokens.append("".join(words))  # "machine learning" also matches "machinelearning"
+        canonical = canonical_skill(phrase)
+        if canonical and canonical not in words:
+            tokens.append(canonical)  # "ReactJS" is also indexed as "react"
+    return tokens
+
+
+def _query_tokens(text: str) -> List[str]:
+    tokens = tokenize(normalize_skill_text(text))
+    tokens += [c for c in map(canonical_skill, tokens) if c and c not in tokens]
+    digits = re.sub(r"\D", "", text or "")
+    if len(digits) >= 6:
+        tokens.append(digits)  # "+91 98765-43210" typed with separators
+    return list(dict.fromkeys(tokens))
+
+
+def document_fields(row: Dict[str, Any]) -> Dict[str, Counter]:
+    return {
+        "name": Counter(tokenize(row.get("name"))),
+        "email": Counter(_email_tokens(row.get("email"))),
+        "phone": Counter(_phone_tokens(row.get("phone"))),
+        "skills": Counter(_skill_tokens(row.get("skills"))),
+    }
+
+
+class CandidateIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs: Dict[int, Dict[str, Counter]] = {}
+        self._lengths: Dict[int, Dict[str, int]] = {}
+        self._owners: Dict[int, Any] = {}
+        self._postings: Dict[str, Dict[str, Dict[int, int]]] = {f: defaultdict(dict) for f in FIELD_WEIGHTS}
+        self._sorted_terms: Dict[str, List[str]] = {f: [] for f in FIELD_WEIGHTS}
+        self._total_length: Dict[str, int] = {f: 0 for f in FIELD_WEIGHTS}
+        self._loaded_at: Optional[float] = None
+        self._reload_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _add_locked(self, candidate_id: int, row: Dict[str, Any], keep_sorted: bool = True) -> None:
+        fields = document_fields(row)
+        self._docs[candidate_id] = fields
+        self._lengths[candidate_id] = {f: sum(c.values()) for f, c in fields.items()}
+        self._owners[candidate_id] = row.get("created_by")
+        for field, counts in fields.items():
+            postings = self._postings[field]
+            self._total_length[field] += self._lengths[candidate_id][field]
+            for term, tf in counts.items():
+                posting = postings[term]
+                if not posting and keep_sorted:
+                    bisect.insort(self._sorted_terms[field], term)
+                posting[candidate_id] = tf
+
+    def _remove_locked(self, candidate_id: int) -> None:
+        fields = self._docs.pop(candidate_id, None)
+        lengths = self._lengths.pop(candidate_id, None)
+        self._owners.pop(candidate_id, None)
+        if not fields:
+            return
+        for field, counts in fields.items():
+            postings = self._postings[field]
+            self._total_length[field] -= lengths[field]
+            for term in counts:
+                posting = postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(candidate_id, None)
+                if not posting:
+                    del postings[term]
+                    terms = self._sorted_terms[field]
+                    i = bisect.bisect_left(terms, term)
+                    if i < len(terms) and terms[i] == term:
+                        del terms[i]
+
+    def _load_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._docs.clear()
+            self._lengths.clear()
+            self._owners.clear()
+            self._postings = {f: defaultdict(dict) for f in FIELD_WEIGHTS}
+            self._sorted_terms = {f: [] for f in FIELD_WEIGHTS}
+            self._total_length = {f: 0 for f in FIELD_WEIGHTS}
+            for row in rows:
+                self._add_locked(int(row["id"]), row, keep_sorted=False)
+            self._sorted_terms = {f: sorted(p) for f, p in self._postings.items()}
+            self._loaded_at = time.monotonic()
+
+    def reload(self) -> None:
+        with db_connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                cursor.execute("SELECT id, name, email, phone, skills, created_by FROM candidates")
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        self._load_rows(rows)
+        print(f"🔎 Candidate index loaded ({len(rows)} candidates)")
+
+    def ensure_fresh(self) -> None:
+        with self._lock:
+            loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at <= CANDIDATE_INDEX_REFRESH_SECONDS:
+            return
+        # First build: everyone waits for it. Periodic refresh: one thread reloads,
+        # the others keep serving the slightly stale index.
+        if not self._reload_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            with self._lock:
+                stale = self._loaded_at is None or time.monotonic() - self._loaded_at > CANDIDATE_INDEX_REFRESH_SECONDS
+            if stale:
+                self.reload()
+        finally:
+            self._reload_lock.release()
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return  # built on first use; it will read this row then
+            candidate_id = int(row["id"])
+            self._remove_locked(candidate_id)
+            self._add_locked(candidate_id, row)
+
+    def remove(self, candidate_id: int) -> None:
+        with self._lock:
+            self._remove_locked(candidate_id)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _expand_locked(self, field: str, word: str) -> List[Tuple[str, float]]:
+        """(term, weight) pairs for a query word: the exact term, plus discounted prefix matches."""
+        expansions = []
+        if word in self._postings[field]:
+            expansions.append((word, 1.0))
+        if len(word) >= MIN_PREFIX_LENGTH:
+            terms = self._sorted_terms[field]
+            i = bisect.bisect_left(terms, word)
+            while i < len(terms) and terms[i].startswith(word):
+                if terms[i] != word:
+                    expansions.append((terms[i], PREFIX_WEIGHT))
+                i += 1
+        return expansions
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        fields: Sequence[str] = tuple(FIELD_WEIGHTS),
+        owner: Any = None,
+        stop_words: bool = False,
+    ) -> Tuple[List[Tuple[int, float]], int]:
+        """
+        BM25 search. Returns ([(candidate_id, score)] best first, total_matches).
+        `owner` restricts results to candidates with that created_by.
+        """
+        self.ensure_fresh()
+
+        words = _query_tokens(query)
+        if stop_words:
+            words = [w for w in words if len(w) > 2 and w not in STOP_WORDS]
+
+        scores: Dict[int, float] = defaultdict(float)
+        with self._lock:
+            n_docs = len(self._docs) or 1
+            for field in fields:
+                weight = FIELD_WEIGHTS[field]
+                postings = self._postings[field]
+                avg_len = (self._total_length[field] / n_docs) or 1.0
+                for word in words:
+                    for term, term_weight in self._expand_locked(field, word):
+                        posting = postings[term]
+                        idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                        for cid, tf in posting.items():
+                            doc_len = self._lengths[cid][field]
+                            norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc_len / avg_len))
+                            scores[cid] += weight * term_weight * idf * norm
+
+            if owner is not None:
+                owner_key = str(owner)
+                scores = {cid: s for cid, s in scores.items() if str(self._owners.get(cid)) == owner_key}
+
+        ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return [(cid, round(score, 4)) for cid, score in ranked[:limit]], len(ranked)
+
+    def match(self, text: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """Candidates named in free text (chat): name/email fields only, question words ignored."""
+        results, _ = self.search(text, limit=limit, fields=IDENTITY_FIELDS, stop_words=True)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "terms": {f: len(p) for f, p in self._postings.items()},
+                "age_seconds": None if self._loaded_at is None else round(time.monotonic() - self._loaded_at, 1),
+            }
+
+
+_index = CandidateIndex()
+
+
+def get_candidate_index() -> CandidateIndex:
+    return _index
+
+
+def refresh_candidate(candidate_id: int) -> None:
+    """Re-read one candidate after an insert/update (removes it if the row is gone). Never raises."""
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                cursor.execute(
+                    "SELECT id, name, email, phone, skills, created_by FROM candidates WHERE id = %s",
+                    (candidate_id,),
+                )
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        if row:
+            _index.upsert(row)
+        else:
+            _index.remove(int(candidate_id))
+    except Exception as e:
+        print(f"⚠️ Candidate index refresh failed for {candidate_id}: {e}")
+
+
+def remove_candidate(candidate_id: int) -> None:
+    _index.remove(int(candidate_id))
@@ -0,0 +1,116 @@
+"""
+Chat context assembly for the AI assistant.
+
+Independent ai_data_service fetches run concurrently on a small thread pool
+(CHAT_CONTEXT_WORKERS, default 4) instead of one after another, and the
+per-user self-context is cached for CHAT_CONTEXT_TTL_SECONDS (default 30).
+Write routes call invalidate_user_context() so the assistant doesn't answer
+from stale data for the rest of the TTL.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from services.ai_data_service import (
+    get_org_stats_snapshot,
+    get_user_profile_summary,
+    list_assignments_for_user,
+    list_candidates_created_by_user,
+)
+from utils.cache import TTLCache
+from utils.db import release_thread_connection
+
+
+CHAT_CONTEXT_WORKERS = max(1, int(os.getenv("CHAT_CONTEXT_WORKERS", "4")))
+CHAT_CONTEXT_TTL = float(os.getenv("CHAT_CONTEXT_TTL_SECONDS", "30"))
+
+_ORG_STATS_KEY = ("org_stats",)
+
+_cache = TTLCache(maxsize=1024, ttl=CHAT_CONTEXT_TTL)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=CHAT_CONTEXT_WORKERS,
+                    thread_name_prefix="chat-context",
+                )
+    return _executor
+
+
+def _run_task(fn: Callable[[], Any]) -> Any:
+    try:
+        return fn()
+    finally:
+        # Pool threads outlive the request; hand the connection back right away
+        release_thread_connection()
+
+
+def fetch_parallel(tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Run independent zero-argument fetches concurrently and return {name: result}.
+    Re-raises the first failure, like the equivalent serial code would.
+
+    Must not be called from inside a task: nested fan-out on the same bounded
+    pool can deadlock once every worker is waiting on queued children.
+    """
+    if len(tasks) <= 1:
+        return {name: fn() for name, fn in tasks.items()}
+
+    executor = _get_executor()
+    futures = {name: executor.submit(_run_task, fn) for name, fn in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def _org_stats() -> Dict[str, int]:
+    # Org-wide numbers are the same for every admin, so they share one entry
+    stats = _cache.get(_ORG_STATS_KEY)
+    if stats is None:
+        stats = get_org_stats_snapshot()
+        _cache.set(_ORG_STATS_KEY, stats)
+    return stats
+
+
+def get_user_self_context(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Self profile, assignments and created candidates (plus org stats for admins/DMs); cached and fetched concurrently."""
+    if not user or not user.get("id"):
+        return {}
+
+    user_id = user.get("id")
+    role = (user.get("role") or "").upper()
+    key = ("self", str(user_id), role)
+
+    cached = _cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    tasks: Dict[str, Callable[[], Any]] = {
+        "self_profile": lambda: get_user_profile_summary(user_id),
+        "self_assignments": lambda: list_assignments_for_user(user_id),
+        "self_candidates": lambda: list_candidates_created_by_user(user_id),
+    }
+    if role in ("ADMIN", "DELIVERY_MANAGER"):
+        tasks["self_org_stats"] = _org_stats
+
+    context = fetch_parallel(tasks)
+    _cache.set(key, context)
+    return dict(context)
+
+
+def invalidate_user_context(user_id: Any = None) -> None:
+    """
+    Drop cached chat context after a write. With a user id only that user's
+    entry (plus the shared org stats) is dropped; without one everything is.
+    """
+    if user_id is None:
+        _cache.clear()
+        return
+    user_key = str(user_id)
+    _cache.invalidate_where(lambda k: k == _ORG_STATS_KEY or (k[0] == "self" and k[1] == user_key))
@@ -0,0 +1,259 @@
+"""
+Vectorized candidate <-> requirement match scoring.
+
+Keeps a sparse candidate x skill matrix and a requirement x skill matrix
+(binary, CSR) and scores whole rows/columns at once with the same formula as
+utils.gemini._fallback_screening:
+
+    ratio = |candidate skills & required skills| / max(1, |required skills|)
+    score = clip(40 + 40 * ratio + 4 * experience_years, 20, 100)
+
+Skills come from the candidate_skills / requirement_skills link tables
+(canonical skill ids, see services/skill_catalog.py), so no TEXT column is
+parsed here. Used to pre-rank thousands of candidates locally before anything
+is sent to Gemini. The matrices are rebuilt lazily: candidate/requirement writes call
+invalidate_match_engine(), and a rebuild also happens every
+MATCH_ENGINE_REFRESH_SECONDS (default 300) to pick up other processes' writes.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pymysql.cursors
+from scipy import sparse
+
+from utils.db import db_connection
+
+
+MATCH_ENGINE_REFRESH_SECONDS = float(os.getenv("MATCH_ENGINE_REFRESH_SECONDS", "300"))
+
+# Same bands as _fallback_screening
+SHORTLIST_SCORE = 75
+REJECT_SCORE = 45
+
+_NO_OWNER = -1
+
+
+def _experience_years(value: Any) -> float:
+    # Mirrors _fallback_screening: anything that isn't a plain number counts as 0
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _recommendation(score: float) -> str:
+    if score >= SHORTLIST_SCORE:
+        return "SHORTLISTED"
+    if score <= REJECT_SCORE:
+        return "REJECTED"
+    return "NEEDS_INTERVIEW"
+
+
+def match_scores(overlap: np.ndarray, required: np.ndarray, experience: np.ndarray) -> np.ndarray:
+    """Vector form of the _fallback_screening score; arguments broadcast."""
+    ratio = overlap / required
+    return np.round(np.clip(40 + ratio * 40 + experience * 4, 20, 100), 2)
+
+
+class _MatchState:
+    """Immutable snapshot of both matrices; swapped atomically on rebuild."""
+
+    def __init__(
+        self,
+        candidates: Sequence[Dict[str, Any]],
+        requirements: Sequence[Dict[str, Any]],
+        candidate_skill_ids: Dict[int, List[int]],
+        requirement_skill_ids: Dict[str, List[int]],
+    ):
+        # skills.id -> matrix column
+        self.vocab: Dict[int, int] = {}
+
+        self.candidate_ids = np.array([int(c["id"]) for c in candidates], dtype=np.int64)
+        self.candidate_pos = {cid: i for i, cid in enumerate(self.candidate_ids.tolist())}
+        self.owners = np.array(
+            [int(c["created_by"]) if c.get("created_by") is not None else _NO_OWNER for c in candidates],
+            dtype=np.int64,
+        )
+        self.experience = np.array([_experience_years(c.get("experience")) for c in candidates], dtype=np.float64)
+
+        self.requirement_ids = [str(r["id"]) for r in requirements]
+        self.requirement_pos = {rid: j for j, rid in enumerate(self.requirement_ids)}
+        self.requirement_status = np.array([(r.get("status") or "").upper() for r in requirements], dtype=object)
+
+        candidate_skills = [candidate_skill_ids.get(int(c["id"]), []) for c in candidates]
+        requirement_skills = [requirement_skill_ids.get(str(r["id"]), []) for r in requirements]
+        for skills in candidate_skills + requirement_skills:
+            for skill in skills:
+                self.vocab.setdefault(skill, len(self.vocab))
+
+        self.C = self._encode(candidate_skills)
+        self.R = self._encode(requirement_skills)
+        # _fallback_screening divides by len(req_skills) or 1
+        self.required = np.maximum(np.asarray(self.R.sum(axis=1)).ravel(), 1.0)
+
+    def _encode(self, skill_sets: List[List[int]]) -> sparse.csr_matrix:
+        indptr = [0]
+        indices: List[int] = []
+        for skills in skill_sets:
+            indices.extend(sorted(self.vocab[s] for s in skills))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float64)
+        return sparse.csr_matrix(
+            (data, np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(skill_sets), max(1, len(self.vocab))),
+        )
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest finite scores, best first."""
+    valid = np.flatnonzero(np.isfinite(scores))
+    if valid.size == 0:
+        return valid
+    if valid.size > k:
+        part = np.argpartition(-scores[valid], k - 1)[:k]
+        valid = valid[part]
+    return valid[np.argsort(-scores[valid], kind="stable")]
+
+
+class MatchEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Optional[_MatchState] = None
+        self._built_at = 0.0
+        self._stale = True
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def _load(self) -> _MatchState:
+        with db_connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                cursor.execute("SELECT id, experience, created_by FROM candidates")
+                candidates = cursor.fetchall()
+                cursor.execute("SELECT id, status FROM requirements")
+                requirements = cursor.fetchall()
+                cursor.execute("SELECT candidate_id, skill_id FROM candidate_skills")
+                candidate_links = cursor.fetchall()
+                cursor.execute("SELECT requirement_id, skill_id FROM requirement_skills")
+                requirement_links = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        candidate_skill_ids: Dict[int, List[int]] = defaultdict(list)
+        for link in candidate_links:
+            candidate_skill_ids[int(link["candidate_id"])].append(int(link["skill_id"]))
+        requirement_skill_ids: Dict[str, List[int]] = defaultdict(list)
+        for link in requirement_links:
+            requirement_skill_ids[str(link["requirement_id"])].append(int(link["skill_id"]))
+        return _MatchState(candidates, requirements, candidate_skill_ids, requirement_skill_ids)
+
+    def _current(self) -> _MatchState:
+        state = self._state
+        if state is not None and not self._stale and time.monotonic() - self._built_at <= MATCH_ENGINE_REFRESH_SECONDS:
+            return state
+        with self._lock:
+            if self._state is None or self._stale or time.monotonic() - self._built_at > MATCH_ENGINE_REFRESH_SECONDS:
+                # Clear first: a write landing during the load marks the new snapshot stale again
+                self._stale = False
+                start = time.perf_counter()
+                self._state = self._load()
+                self._built_at = time.monotonic()
+                print(
+                    f"🧮 Match engine built: {len(self._state.candidate_ids)} candidates x "
+                    f"{len(self._state.requirement_ids)} requirements, {len(self._state.vocab)} skills "
+                    f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+                )
+            return self._state
+
+    def top_candidates_for_requirement(
+        self,
+        requirement_id: str,
+        k: int = 20,
+        owner: Optional[int] = None,
+        candidate_ids: Optional[Iterable[int]] = None,
+        min_score: Optional[float] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Best-matching candidates for one requirement, or None if the requirement is unknown."""
+        state = self._current()
+        j = state.requirement_pos.get(str(requirement_id))
+        if j is None:
+            return None
+
+        overlap = np.asarray((state.C @ state.R[j].T).todense()).ravel()
+        scores = match_scores(overlap, state.required[j], state.experience)
+
+        if owner is not None:
+            scores = np.where(state.owners == int(owner), scores, -np.inf)
+        if candidate_ids is not None:
+            allowed = [state.candidate_pos[c] for c in candidate_ids if c in state.candidate_pos]
+            mask = np.zeros(len(scores), dtype=bool)
+            mask[allowed] = True
+            scores = np.where(mask, scores, -np.inf)
+        if min_score is not None:
+            scores = np.where(scores >= min_score, scores, -np.inf)
+
+        return [
+            {
+                "candidate_id": int(state.candidate_ids[i]),
+                "score": float(scores[i]),
+                "matched_skills": int(overlap[i]),
+                "required_skills": int(state.required[j]),
+                "recommend": _recommendation(scores[i]),
+            }
+            for i in _top_k(scores, k)
+        ]
+
+    def top_requirements_for_candidate(
+        self,
+        candidate_id: int,
+        k: int = 10,
+        status: Optional[str] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Best-matching requirements for one candidate, or None if the candidate is unknown."""
+        state = self._current()
+        i = state.candidate_pos.get(int(candidate_id))
+        if i is None:
+            return None
+
+        overlap = np.asarray((state.R @ state.C[i].T).todense()).ravel()
+        scores = match_scores(overlap, state.required, state.experience[i])
+        if status:
+            scores = np.where(state.requirement_status == status.upper(), scores, -np.inf)
+
+        return [
+            {
+                "requirement_id": state.requirement_ids[j],
+                "score": float(scores[j]),
+                "matched_skills": int(overlap[j]),
+                "required_skills": int(state.required[j]),
+                "recommend": _recommendation(scores[j]),
+            }
+            for j in _top_k(scores, k)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            "built": state is not None,
+            "stale": self._stale,
+            "candidates": 0 if state is None else len(state.candidate_ids),
+            "requirements": 0 if state is None else len(state.requirement_ids),
+            "skills": 0 if state is None else len(state.vocab),
+            "age_seconds": None if state is None else round(time.monotonic() - self._built_at, 1),
+        }
+
+
+_engine = MatchEngine()
+
+
+def get_match_engine() -> MatchEngine:
+    return _engine
+
+
+def invalidate_match_engine() -> None:
+    _engine.invalidate()
@@ -0,0 +1,207 @@
+"""
+Materialized per-requirement pipeline funnel.
+
+`requirement_funnel` holds one row per requirement x stage x status with the
+number of candidate_progress rows in it, and `requirement_funnel_totals` holds
+the per-requirement distinct-candidate figures the reports show (mapped,
+in progress, qualified = completed the last round, rejected). Every route that
+writes candidate_progress wraps the write in `track_funnel(cursor, pairs)`,
+which locks the affected requirement rows, snapshots the (candidate,
+requirement) progress rows before and after and applies the difference in the
+same transaction, so reports read a handful of rows instead of grouping the
+whole progress table.
+
+Deleting a requirement cascades to both tables. If they ever drift (e.g. a
+manual SQL fix on candidate_progress), rebuild with:
+    python -m services.requirement_funnel rebuild
+"""
+import sys
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Tuple
+
+from utils.db import db_connection
+
+_PROGRESS_COLUMNS = ("candidate_id", "requirement_id", "stage_id", "stage_name", "status")
+_TOTAL_FLAGS = ("candidates", "in_progress", "qualified", "rejected")
+
+
+def _values(row, columns):
+    # Callers pass either tuple or dict cursors
+    if isinstance(row, dict):
+        return tuple(row[col] for col in columns)
+    return tuple(row)
+
+
+def _lock_requirements(cursor, requirement_ids: List[Any]):
+    """Row-lock the requirements in id order, so funnel writers for one requirement run one at a time."""
+    placeholders = ",".join(["%s"] * len(requirement_ids))
+    cursor.execute(
+        f"SELECT id FROM requirements WHERE id IN ({placeholders}) ORDER BY id FOR UPDATE",
+        tuple(requirement_ids),
+    )
+    cursor.fetchall()
+
+
+def _snapshot(cursor, pairs: List[Tuple[Any, Any]]) -> List[Tuple]:
+    """Progress rows for the pairs as (candidate_id, requirement_id, stage_id, stage_name, status)."""
+    where = " OR ".join(["(candidate_id = %s AND requirement_id = %s)"] * len(pairs))
+    params = tuple(value for pair in pairs for value in pair)
+    # Plain read, not FOR UPDATE: for pairs without a progress row yet (every
+    # new screening) a locking read takes a gap lock on uniq_progress_stage, and
+    # two writers holding the same gap deadlock on their inserts. The
+    # requirement row locks taken first already keep other writers out.
+    cursor.execute(f"SELECT {', '.join(_PROGRESS_COLUMNS)} FROM candidate_progress WHERE {where}", params)
+    return [
+        (cid, rid, stage_id or 0, stage_name or "", status or "")
+        for cid, rid, stage_id, stage_name, status in (_values(row, _PROGRESS_COLUMNS) for row in cursor.fetchall())
+    ]
+
+
+def _last_stage_ids(cursor, requirement_ids: List[Any]) -> Dict[Any, set]:
+    """{requirement_id: {stage ids with stage_order = no_of_rounds}}."""
+    placeholders = ",".join(["%s"] * len(requirement_ids))
+    cursor.execute(f"""
+        SELECT rs.requirement_id, rs.id
+        FROM requirement_stages rs
+        JOIN requirements r ON r.id = rs.requirement_id
+        WHERE rs.requirement_id IN ({placeholders}) AND rs.stage_order = r.no_of_rounds
+    """, tuple(requirement_ids))
+    last = defaultdict(set)
+    for row in cursor.fetchall():
+        rid, stage_id = _values(row, ("requirement_id", "id"))
+        last[rid].add(stage_id)
+    return last
+
+
+def _candidate_flags(rows: List[Tuple], last_stage_ids: Dict[Any, set]) -> Counter:
+    """Per-requirement distinct-candidate totals for a snapshot."""
+    by_pair = defaultdict(list)
+    for cid, rid, stage_id, _stage_name, status in rows:
+        by_pair[(cid, rid)].append((stage_id, status))
+
+    totals = Counter()
+    for (_cid, rid), stages in by_pair.items():
+        statuses = {status for _stage_id, status in stages}
+        totals[(rid, "candidates")] += 1
+        totals[(rid, "in_progress")] += bool(statuses & {"PENDING", "IN_PROGRESS"})
+        totals[(rid, "qualified")] += any(
+            status == "COMPLETED" and stage_id in last_stage_ids.get(rid, ()) for stage_id, status in stages
+        )
+        totals[(rid, "rejected")] += "REJECTED" in statuses
+    return totals
+
+
+def _apply(cursor, before: List[Tuple], after: List[Tuple]):
+    stage_delta = Counter(row[1:] for row in after)
+    stage_delta.subtract(Counter(row[1:] for row in before))
+    stage_rows = [(rid, sid, name, status, delta) for (rid, sid, name, status), delta in stage_delta.items() if delta]
+
+    requirement_ids = sorted({row[1] for row in before + after}, key=str)
+    totals_delta = Counter()
+    if requirement_ids:
+        last = _last_stage_ids(cursor, requirement_ids)
+        totals_delta.update(_candidate_flags(after, last))
+        totals_delta.subtract(_candidate_flags(before, last))
+
+    if stage_rows:
+        cursor.executemany("""
+            INSERT INTO requirement_funnel (requirement_id, stage_id, stage_name, status, progress_count)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE progress_count = progress_count + VALUES(progress_count)
+        """, stage_rows)
+        touched = sorted({row[0] for row in stage_rows}, key=str)
+        placeholders = ",".join(["%s"] * len(touched))
+        cursor.execute(
+            f"DELETE FROM requirement_funnel WHERE requirement_id IN ({placeholders}) AND progress_count <= 0",
+            tuple(touched),
+        )
+
+    total_rows = [
+        (rid, *(totals_delta[(rid, flag)] for flag in _TOTAL_FLAGS))
+        for rid in requirement_ids
+        if any(totals_delta[(rid, flag)] for flag in _TOTAL_FLAGS)
+    ]
+    if total_rows:
+        cursor.executemany("""
+            INSERT INTO requirement_funnel_totals (requirement_id, candidates, in_progress, qualified, rejected)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                candidates = candidates + VALUES(candidates),
+                in_progress = in_progress + VALUES(in_progress),
+                qualified = qualified + VALUES(qualified),
+                rejected = rejected + VALUES(rejected)
+        """, total_rows)
+
+
+@contextmanager
+def track_funnel(cursor, pairs: Iterable[Tuple[Any, Any]]):
+    """
+    Keep the funnel in step with candidate_progress writes made inside the block.
+
+    `pairs` are the (candidate_id, requirement_id) pairs the block writes. Their
+    requirement rows stay locked for the rest of the caller's transaction.
+
+    The snapshots are consistent reads. Under REPEATABLE READ they reuse the
+    transaction's first read view, so enter the block before any other plain
+    SELECT in the transaction (commit after read-only lookups).
+    """
+    pairs = list(dict.fromkeys((cid, rid) for cid, rid in pairs if cid is not None and rid is not None))
+    if not pairs:
+        yield
+        return
+    _lock_requirements(cursor, sorted({str(rid) for _cid, rid in pairs}))
+    before = _snapshot(cursor, pairs)
+    yield
+    _apply(cursor, before, _snapshot(cursor, pairs))
+
+
+def rebuild_requirement_funnel(cursor):
+    """Recompute both funnel tables from candidate_progress (tuple or dict cursor). Returns the funnel row count."""
+    cursor.execute("DELETE FROM requirement_funnel")
+    cursor.execute("DELETE FROM requirement_funnel_totals")
+    cursor.execute("""
+        INSERT INTO requirement_funnel (requirement_id, stage_id, stage_name, status, progress_count)
+        SELECT requirement_id, COALESCE(stage_id, 0), COALESCE(stage_name, ''), COALESCE(status, ''), COUNT(*)
+        FROM candidate_progress
+        WHERE requirement_id IS NOT NULL
+        GROUP BY requirement_id, COALESCE(stage_id, 0), COALESCE(stage_name, ''), COALESCE(status, '')
+    """)
+    rows = cursor.rowcount
+    cursor.execute("""
+        INSERT INTO requirement_funnel_totals (requirement_id, candidates, in_progress, qualified, rejected)
+        SELECT
+            cp.requirement_id,
+            COUNT(DISTINCT cp.candidate_id),
+            COUNT(DISTINCT CASE WHEN cp.status IN ('PENDING', 'IN_PROGRESS') THEN cp.candidate_id END),
+            COUNT(DISTINCT CASE WHEN cp.status = 'COMPLETED' AND rs.stage_order = r.no_of_rounds THEN cp.candidate_id END),
+            COUNT(DISTINCT CASE WHEN cp.status = 'REJECTED' THEN cp.candidate_id END)
+        FROM candidate_progress cp
+        JOIN requirements r ON r.id = cp.requirement_id
+        LEFT JOIN requirement_stages rs ON rs.id = cp.stage_id
+        GROUP BY cp.requirement_id
+    """)
+    return rows
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ["rebuild"]:
+        print("usage: python -m services.requirement_funnel rebuild")
+        return 2
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            rows = rebuild_requirement_funnel(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    print(f"✅ Rebuilt requirement funnel ({rows} rows)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
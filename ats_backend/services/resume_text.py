@@ -0,0 +1,368 @@
+"""
+Resume text extraction.
+
+Uploaded resumes are hashed and parsed on a small background pool
+(RESUME_EXTRACT_WORKERS, default 1) so uploads never wait on PDF parsing.
+Plain text and section offsets are stored in `candidate_resume_text`, keyed by
+the sha256 of the file content; `candidates.resume_hash` points at that row, so
+an identical file (re-uploaded, or shared by two candidates) is only parsed
+once. Screening prompts get a size-bounded excerpt via get_resume_excerpt().
+
+PDF needs the optional `pypdf` package; DOCX is read with the standard library.
+Legacy .doc files are recorded as unsupported.
+
+CLI (run from the ats_backend folder), for resumes without extracted text:
+    python -m services.resume_text backfill [--folder ./uploads/resumes]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+import pymysql.cursors
+
+from utils.cache import TTLCache
+from utils.db import db_connection, release_thread_connection
+from utils.resume_store import resolve_resume_path
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+
+RESUME_EXTRACT_WORKERS = max(1, int(os.getenv("RESUME_EXTRACT_WORKERS", "1")))
+RESUME_EXCERPT_CHARS = int(os.getenv("RESUME_EXCERPT_CHARS", "3000"))
+RESUME_TEXT_MAX_CHARS = int(os.getenv("RESUME_TEXT_MAX_CHARS", "200000"))
+DEFAULT_UPLOAD_FOLDER = "./uploads/resumes"
+
+# Canonical section -> heading spellings (compared lower-case, punctuation stripped)
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "professional summary", "profile summary", "career summary",
+                "objective", "career objective", "about me"),
+    "skills": ("skills", "technical skills", "key skills", "core skills", "skill set", "skillset",
+               "core competencies", "technologies", "tech stack"),
+    "experience": ("experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment", "career history"),
+    "projects": ("projects", "key projects", "academic projects", "personal projects"),
+    "education": ("education", "academic background", "academics", "educational qualifications",
+                  "qualifications"),
+    "certifications": ("certifications", "certification", "certificates", "licenses and certifications"),
+}
+_HEADING_LOOKUP = {spelling: section for section, spellings in SECTION_HEADINGS.items() for spelling in spellings}
+
+# Order sections are taken in when building a prompt excerpt
+EXCERPT_SECTIONS = ("skills", "experience", "summary", "projects", "certifications", "education")
+
+_MAX_HEADING_LENGTH = 40
+# Don't start a section in the excerpt with less room than this left
+_MIN_EXCERPT_PART = 80
+_HEADING_CLEAN_RE = re.compile(r"[^a-z ]+")
+_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Parsed text is immutable per content hash, so entries only leave by LRU/TTL
+_excerpts = TTLCache(maxsize=512, ttl=3600)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=RESUME_EXTRACT_WORKERS,
+                    thread_name_prefix="resume-extract",
+                )
+    return _executor
+
+
+# ------------------------------------------------------------------
+# Extraction
+# ------------------------------------------------------------------
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _extract_pdf(path: str) -> str:
+    if PdfReader is None:
+        raise ValueError("PDF extraction needs the 'pypdf' package")
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _extract_docx(path: str) -> str:
+    with zipfile.ZipFile(path) as archive:
+        xml = archive.read("word/document.xml")
+    paragraphs = []
+    for paragraph in ElementTree.fromstring(xml).iter(f"{_W}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{_W}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_W}br", f"{_W}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+_EXTRACTORS = {"pdf": _extract_pdf, "docx": _extract_docx}
+
+
+def _clean(text: str) -> str:
+    lines = [_SPACES_RE.sub(" ", line).strip() for line in text.replace("\r", "\n").split("\n")]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()[:RESUME_TEXT_MAX_CHARS]
+
+
+def extract_text(path: str) -> Tuple[str, str]:
+    """Return (plain text, extractor name). Raises ValueError for unsupported files."""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    extractor = _EXTRACTORS.get(ext)
+    if extractor is None:
+        raise ValueError(f"Unsupported resume format: .{ext or '?'}")
+    return _clean(extractor(path)), ext
+
+
+def find_sections(text: str) -> Dict[str, List[int]]:
+    """{section: [start, end]} character offsets of each recognised section body."""
+    headings = []
+    offset = 0
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped and len(stripped) <= _MAX_HEADING_LENGTH:
+            key = _HEADING_CLEAN_RE.sub("", stripped.lower()).strip()
+            section = _HEADING_LOOKUP.get(" ".join(key.split()))
+            if section:
+                headings.append((section, offset, offset + len(line) + 1))
+        offset += len(line) + 1
+
+    sections = {}
+    for i, (section, _, body_start) in enumerate(headings):
+        end = headings[i + 1][1] if i + 1 < len(headings) else len(text)
+        # First occurrence wins; later repeats ("Skills" inside a project) are ignored
+        if section not in sections and end > body_start:
+            sections[section] = [body_start, end]
+    return sections
+
+
+# ------------------------------------------------------------------
+# Storage
+# ------------------------------------------------------------------
+
+def _extraction_status(cursor, content_hash: str) -> Optional[str]:
+    cursor.execute("SELECT status FROM candidate_resume_text WHERE content_hash = %s", (content_hash,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _store_text(cursor, content_hash: str, status: str, extractor: Optional[str],
+                text: Optional[str], sections: Optional[Dict[str, List[int]]], error: Optional[str]) -> None:
+    cursor.execute("""
+        INSERT INTO candidate_resume_text
+            (content_hash, status, extractor, text, sections, char_count, error)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            status = VALUES(status), extractor = VALUES(extractor), text = VALUES(text),
+            sections = VALUES(sections), char_count = VALUES(char_count), error = VALUES(error)
+    """, (
+        content_hash, status, extractor, text,
+        json.dumps(sections) if sections is not None else None,
+        len(text or ""), (error or "")[:500] or None,
+    ))
+
+
+def extract_candidate_resume(candidate_id: int, path: str, content_hash: Optional[str] = None) -> str:
+    """Hash, extract (unless already done for this content) and link one resume. Returns the content hash."""
+    # Content-addressed uploads (utils/resume_store.py) already know their hash
+    content_hash = content_hash or file_sha256(path)
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            status = _extraction_status(cursor, content_hash)
+        finally:
+            cursor.close()
+
+    if status == "DONE":
+        print(f"📄 Resume for candidate {candidate_id} already extracted ({content_hash[:12]})")
+    else:
+        # Parse with no connection held; a large PDF can take a while
+        try:
+            text, extractor = extract_text(path)
+            record = ("DONE", extractor, text, find_sections(text), None)
+        except Exception as e:
+            print(f"⚠️ Resume extraction failed for candidate {candidate_id}: {e}")
+            record = ("ERROR", None, None, None, str(e))
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            if status != "DONE":
+                _store_text(cursor, content_hash, *record)
+            cursor.execute("UPDATE candidates SET resume_hash = %s WHERE id = %s", (content_hash, candidate_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    if status != "DONE" and record[0] == "DONE":
+        print(f"📄 Extracted {len(record[2])} chars from resume of candidate {candidate_id} ({content_hash[:12]})")
+    return content_hash
+
+
+def _run_extraction(candidate_id: int, path: str, content_hash: Optional[str]) -> None:
+    try:
+        extract_candidate_resume(candidate_id, path, content_hash)
+    except Exception as e:
+        print(f"❌ Resume extraction job for candidate {candidate_id} failed: {e}")
+    finally:
+        # Worker threads have no request teardown to reclaim a leaked connection
+        release_thread_connection()
+
+
+def schedule_resume_extraction(candidate_id: int, path: str, content_hash: Optional[str] = None) -> None:
+    """Queue extraction of a just-saved resume. Returns immediately; never raises."""
+    try:
+        _get_executor().submit(_run_extraction, candidate_id, path, content_hash)
+    except Exception as e:
+        print(f"⚠️ Could not queue resume extraction for candidate {candidate_id}: {e}")
+
+
+# ------------------------------------------------------------------
+# Prompt excerpts
+# ------------------------------------------------------------------
+
+def build_excerpt(text: str, sections: Dict[str, List[int]], max_chars: int) -> str:
+    """Most useful sections first (skills, experience, summary, ...), cut to max_chars."""
+    head = text if len(text) <= max_chars else text[:max_chars].rstrip() + " …"
+    if not sections:
+        return head
+
+    parts = []
+    used = 0
+    for name in EXCERPT_SECTIONS:
+        if name not in sections:
+            continue
+        start, end = sections[name]
+        body = text[start:end].strip()
+        if not body:
+            continue
+        part = f"[{name.title()}]\n{body}"
+        room = max_chars - used
+        if len(part) > room:
+            if room < _MIN_EXCERPT_PART:
+                break
+            part = part[:room].rstrip() + " …"
+        parts.append(part)
+        used += len(part) + 2
+    return "\n\n".join(parts) if parts else head
+
+
+def get_resume_excerpt(candidate: Dict[str, Any], max_chars: Optional[int] = None) -> Optional[str]:
+    """Bounded resume excerpt for a candidate row (needs resume_hash), or None. Never raises."""
+    content_hash = (candidate or {}).get("resume_hash")
+    max_chars = RESUME_EXCERPT_CHARS if max_chars is None else max_chars
+    if not content_hash or max_chars <= 0:
+        return None
+
+    key = (content_hash, max_chars)
+    value, age = _excerpts.get_entry(key)
+    if age is not None:
+        return value
+
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                cursor.execute("""
+                    SELECT text, sections FROM candidate_resume_text
+                    WHERE content_hash = %s AND status = 'DONE'
+                """, (content_hash,))
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+    except Exception as e:
+        print(f"⚠️ Resume excerpt lookup failed: {e}")
+        return None
+
+    excerpt = None
+    if row and row.get("text"):
+        try:
+            sections = json.loads(row.get("sections") or "{}")
+        except (TypeError, ValueError):
+            sections = {}
+        excerpt = build_excerpt(row["text"], sections, max_chars)
+    # Only cache hits: a resume still being extracted should show up on the next call
+    if excerpt is not None:
+        _excerpts.set(key, excerpt)
+    return excerpt
+
+
+# ------------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------------
+
+def backfill(folder: str = DEFAULT_UPLOAD_FOLDER) -> int:
+    """Extract resumes of candidates whose file has no extracted text (or only a failed attempt). Returns the count processed."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT c.id, c.resume_filename FROM candidates c
+                WHERE c.resume_filename IS NOT NULL AND c.resume_filename <> ''
+                  AND NOT EXISTS (
+                      SELECT 1 FROM candidate_resume_text t WHERE t.content_hash = c.resume_hash AND t.status = 'DONE'
+                  )
+                ORDER BY c.id
+            """)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+    done = 0
+    for candidate_id, filename in rows:
+        path = resolve_resume_path(folder, filename)
+        if not path:
+            print(f"⚠️ Resume file missing for candidate {candidate_id}: {filename}")
+            continue
+        extract_candidate_resume(candidate_id, path)
+        done += 1
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume text extraction")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = sub.add_parser("backfill", help="extract resumes uploaded before extraction existed")
+    backfill_parser.add_argument("--folder", default=DEFAULT_UPLOAD_FOLDER)
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        count = backfill(args.folder)
+        print(f"✅ Processed {count} resume(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
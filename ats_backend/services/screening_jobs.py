@@ -0,0 +1,218 @@
+"""
+Background screening jobs.
+
+/api/screen-candidate in job mode inserts a row into `screening_jobs` and
+returns immediately; a bounded pool of worker threads (SCREENING_WORKERS,
+default 2) runs the Gemini screening and stores the outcome on the job row.
+This keeps slow Gemini calls off the waitress request threads.
+
+Each process tags the jobs it claims with its owner id and refreshes their
+heartbeat_at while they run, so a restarting worker only requeues RUNNING
+jobs whose owner stopped heartbeating (SCREENING_JOB_STALE_SECONDS), not the
+ones other live processes are still working on.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import pymysql.cursors
+
+from utils.db import db_connection, release_thread_connection
+
+
+SCREENING_WORKERS = max(1, int(os.getenv("SCREENING_WORKERS", "2")))
+SCREENING_JOB_STALE_SECONDS = max(10, int(os.getenv("SCREENING_JOB_STALE_SECONDS", "120")))
+# Several beats per stale window, so one slow UPDATE does not get a job requeued
+_HEARTBEAT_INTERVAL = SCREENING_JOB_STALE_SECONDS / 4
+
+# Unique per process, even when a container restarts with the same pid
+OWNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"[:100]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_heartbeat_thread: Optional[threading.Thread] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=SCREENING_WORKERS,
+                    thread_name_prefix="screening-worker",
+                )
+                _start_heartbeat()
+    return _executor
+
+
+def _heartbeat_once() -> None:
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE screening_jobs SET heartbeat_at = CURRENT_TIMESTAMP
+                WHERE owner = %s AND status = 'RUNNING'
+            """, (OWNER_ID,))
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+def _heartbeat_loop() -> None:
+    while True:
+        time.sleep(_HEARTBEAT_INTERVAL)
+        try:
+            _heartbeat_once()
+        except Exception as e:
+            print(f"⚠️ Screening job heartbeat failed: {e}")
+        finally:
+            release_thread_connection()
+
+
+def _start_heartbeat() -> None:
+    global _heartbeat_thread
+    if _heartbeat_thread is None:
+        _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="screening-heartbeat", daemon=True)
+        _heartbeat_thread.start()
+
+
+def enqueue_screening_job(candidate_id: int, requirement_id: str) -> str:
+    """Persist a QUEUED job and hand it to the worker pool. Returns the job id."""
+    job_id = str(uuid.uuid4())
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO screening_jobs (id, candidate_id, requirement_id, status)
+                VALUES (%s, %s, %s, 'QUEUED')
+            """, (job_id, candidate_id, requirement_id))
+            conn.commit()
+        finally:
+            cursor.close()
+
+    _get_executor().submit(_run_job, job_id)
+    return job_id
+
+
+def _claim_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Move a job QUEUED -> RUNNING. Returns None if someone else already claimed it."""
+    with db_connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        try:
+            cursor.execute("""
+                UPDATE screening_jobs
+                SET status = 'RUNNING', started_at = CURRENT_TIMESTAMP, attempts = attempts + 1,
+                    owner = %s, heartbeat_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND status = 'QUEUED'
+            """, (OWNER_ID, job_id))
+            claimed = cursor.rowcount == 1
+            conn.commit()
+            if not claimed:
+                return None
+            cursor.execute(
+                "SELECT id, candidate_id, requirement_id FROM screening_jobs WHERE id = %s",
+                (job_id,),
+            )
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+def _finish_job(job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE screening_jobs
+                SET status = %s, result = %s, error = %s, finished_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (status, json.dumps(result) if result is not None else None, error, job_id))
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+def _run_job(job_id: str) -> None:
+    # Imported lazily: the controller imports this module at load time
+    from controllers.ai_screening import screen_candidate_now
+
+    try:
+        job = _claim_job(job_id)
+        if not job:
+            return
+
+        outcome = screen_candidate_now(job["candidate_id"], job["requirement_id"])
+        if outcome.get("error"):
+            _finish_job(job_id, "ERROR", None, outcome["error"])
+        else:
+            _finish_job(job_id, "DONE", {
+                "ai_success": outcome["ai_success"],
+                "result": outcome["result"],
+            }, outcome.get("ai_error"))
+    except Exception as e:
+        print(f"❌ Screening job {job_id} failed: {e}")
+        try:
+            _finish_job(job_id, "ERROR", None, str(e))
+        except Exception as finish_error:
+            print(f"❌ Could not record failure for job {job_id}: {finish_error}")
+    finally:
+        # Worker threads have no request teardown to reclaim a leaked connection
+        release_thread_connection()
+
+
+def get_screening_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with db_connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        try:
+            cursor.execute("""
+                SELECT id, candidate_id, requirement_id, status, result, error, attempts,
+                       created_at, started_at, finished_at
+                FROM screening_jobs
+                WHERE id = %s
+            """, (job_id,))
+            job = cursor.fetchone()
+        finally:
+            cursor.close()
+
+    if job and job.get("result"):
+        try:
+            job["result"] = json.loads(job["result"])
+        except (TypeError, ValueError):
+            pass
+    return job
+
+
+def resume_screening_jobs() -> int:
+    """
+    Re-submit jobs left behind by a previous process (call once at startup).
+    RUNNING jobs are retried only once their heartbeat is older than
+    SCREENING_JOB_STALE_SECONDS; fresher ones belong to a live process.
+    QUEUED jobs are submitted here too; the atomic claim keeps a job that
+    another process also picks up from running twice.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE screening_jobs SET status = 'QUEUED', owner = NULL
+                WHERE status = 'RUNNING'
+                  AND (heartbeat_at IS NULL OR heartbeat_at < CURRENT_TIMESTAMP - INTERVAL %s SECOND)
+            """, (SCREENING_JOB_STALE_SECONDS,))
+            cursor.execute("SELECT id FROM screening_jobs WHERE status = 'QUEUED' ORDER BY created_at")
+            job_ids = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+        finally:
+            cursor.close()
+
+    executor = _get_executor()
+    for job_id in job_ids:
+        executor.submit(_run_job, job_id)
+    if job_ids:
+        print(f"🔁 Resumed {len(job_ids)} pending screening job(s)")
+    return len(job_ids)
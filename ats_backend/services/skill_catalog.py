@@ -0,0 +1,106 @@
+"""
+Canonical skills tables.
+
+`skills` holds one row per canonical skill (slug + display name),
+`skill_aliases` maps alternative spellings to a skill, and
+`candidate_skills` / `requirement_skills` link rows to skill ids. The
+candidate and requirement write routes call sync_candidate_skills /
+sync_requirement_skills inside their transaction, so matching can join on
+integer ids instead of re-parsing the TEXT columns. Parsing and the alias trie
+live in utils/skills.py.
+"""
+import threading
+from typing import Any, Dict, List
+
+import pymysql.cursors
+
+from utils.db import db_connection
+from utils.skills import install_aliases, parse_skills_with_names
+
+# slug -> skills.id for skills already seen in the table. Ids never change once
+# assigned, so this only grows.
+_skill_ids: Dict[str, int] = {}
+_skill_ids_lock = threading.Lock()
+
+
+def _select_skill_ids(cursor, slugs: List[str], locking: bool = False) -> Dict[str, int]:
+    placeholders = ",".join(["%s"] * len(slugs))
+    lock = " LOCK IN SHARE MODE" if locking else ""
+    cursor.execute(f"SELECT id, slug FROM skills WHERE slug IN ({placeholders}){lock}", tuple(slugs))
+    # Callers pass either tuple or dict cursors
+    return {
+        (row["slug"] if isinstance(row, dict) else row[1]): (row["id"] if isinstance(row, dict) else row[0])
+        for row in cursor.fetchall()
+    }
+
+
+def ensure_skill_ids(cursor, skills: Dict[str, str]) -> Dict[str, int]:
+    """{slug: display name} -> {slug: skills.id}, inserting unknown skills."""
+    with _skill_ids_lock:
+        ids = {slug: _skill_ids[slug] for slug in skills if slug in _skill_ids}
+    missing = [slug for slug in skills if slug not in ids]
+    if not missing:
+        return ids
+
+    existing = _select_skill_ids(cursor, missing)
+    with _skill_ids_lock:
+        _skill_ids.update(existing)
+    ids.update(existing)
+
+    new = [slug for slug in missing if slug not in existing]
+    if new:
+        cursor.executemany(
+            "INSERT IGNORE INTO skills (slug, name) VALUES (%s, %s)",
+            [(slug, skills[slug]) for slug in new],
+        )
+        # Locking read: a slug another request committed after our read view
+        # was created is ignored by the INSERT and invisible to a plain SELECT.
+        # Not cached yet: the caller's transaction may still roll back.
+        ids.update(_select_skill_ids(cursor, new, locking=True))
+        unresolved = [slug for slug in new if slug not in ids]
+        if unresolved:
+            raise RuntimeError(f"Could not resolve skill ids for: {', '.join(unresolved)}")
+    return ids
+
+
+def _sync_links(cursor, table: str, owner_column: str, owner_id: Any, skills_text: Any) -> List[int]:
+    skill_ids = sorted(set(ensure_skill_ids(cursor, parse_skills_with_names(skills_text)).values()))
+    cursor.execute(f"DELETE FROM {table} WHERE {owner_column} = %s", (owner_id,))
+    if skill_ids:
+        cursor.executemany(
+            f"INSERT INTO {table} ({owner_column}, skill_id) VALUES (%s, %s)",
+            [(owner_id, skill_id) for skill_id in skill_ids],
+        )
+    return skill_ids
+
+
+def sync_candidate_skills(cursor, candidate_id: int, skills_text: Any) -> List[int]:
+    """Replace a candidate's candidate_skills rows from its skills text. Runs in the caller's transaction."""
+    return _sync_links(cursor, "candidate_skills", "candidate_id", candidate_id, skills_text)
+
+
+def sync_requirement_skills(cursor, requirement_id: str, skills_text: Any) -> List[int]:
+    """Replace a requirement's requirement_skills rows from skills_required. Runs in the caller's transaction."""
+    return _sync_links(cursor, "requirement_skills", "requirement_id", requirement_id, skills_text)
+
+
+def load_skill_aliases() -> int:
+    """Merge skill_aliases rows into the in-memory alias trie. Returns the alias count; never raises."""
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                cursor.execute("""
+                    SELECT a.alias, s.slug
+                    FROM skill_aliases a
+                    JOIN skills s ON s.id = a.skill_id
+                """)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        count = install_aliases({row["alias"]: row["slug"] for row in rows})
+        print(f"✅ Skill aliases loaded ({count} spellings)")
+        return count
+    except Exception as e:
+        print(f"⚠️ Could not load skill aliases, using built-in dictionary: {e}")
+        return 0
@@ -1,9 +1,85 @@
 # ats_backend/utils/auth.py
 from flask import request, session
+import hashlib
 import pymysql
 import os
+import threading
+from utils.cache import TTLCache
 from utils.db import get_db_connection
 
+# Session token -> users row, so authenticated requests skip the users lookup.
+# Keyed by sha256(token); logout, login and user status/profile/delete routes
+# invalidate entries explicitly, the TTL bounds anything else (e.g. manual SQL).
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "60"))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "5000"))
+
+_session_cache = TTLCache(maxsize=SESSION_CACHE_MAX_ENTRIES, ttl=SESSION_CACHE_TTL_SECONDS)
+
+# Bumped by every invalidation. A lookup only caches its DB row if no
+# invalidation happened while it was reading, so a lookup racing /logout
+# cannot put the old token back after invalidate_session() removed it.
+_session_generation = 0
+_session_generation_lock = threading.Lock()
+
+
+def _bump_session_generation():
+    global _session_generation
+    with _session_generation_lock:
+        _session_generation += 1
+
+
+def _token_key(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_session_user(token):
+    """
+    users row (id, name, email, role, phone, status) for a session token, or None.
+    Served from the session cache when possible; the caller gets its own copy.
+    """
+    if not token:
+        return None
+    key = _token_key(token)
+    user = _session_cache.get(key)
+    if user is not None:
+        return dict(user)
+
+    generation = _session_generation
+    conn = get_db_connection()
+    if not conn:
+        return None
+    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    try:
+        cursor.execute("SELECT id, name, email, role, phone, status FROM users WHERE session_token = %s", (token,))
+        user = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+    if not user:
+        return None
+    with _session_generation_lock:
+        if generation == _session_generation:
+            _session_cache.set(key, user)
+    return dict(user)
+
+
+def invalidate_session(token):
+    """Forget a cached session token (logout)."""
+    if token:
+        _bump_session_generation()
+        _session_cache.invalidate(_token_key(token))
+
+
+def invalidate_user_sessions(user_id):
+    """Forget every cached token of a user (login, status/profile change, delete)."""
+    _bump_session_generation()
+    _session_cache.invalidate_values(lambda user: str(user.get("id")) == str(user_id))
+
+
+def get_session_cache_stats():
+    return _session_cache.stats()
+
 
 def get_current_user():
     """
@@ -15,15 +91,7 @@ def get_current_user():
     if auth_header and auth_header.startswith("Bearer "):
         token = auth_header.split(" ")[1]
         try:
-            conn = get_db_connection()
-            if not conn:
-                return None
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-            cursor.execute("SELECT id, name, email, role, phone, status FROM users WHERE session_token = %s", (token,))
-            user = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            
+            user = get_session_user(token)
             if user:
                 return user
         except Exception as e:
@@ -0,0 +1,128 @@
+import json
+import os
+
+# Packs the chat context dict into a compact JSON string that fits a per-model
+# token budget. Datasets are ranked by relevance to the detected intent, lists
+# of rows are sent column-wise ({"columns": [...], "rows": [[...], ...]}) so keys
+# aren't repeated per row, and whatever doesn't fit is cut with counts recorded
+# under "_truncated" so the model knows the data exists but was not included.
+
+# Context budgets (tokens) per model. Deliberately far below the context
+# window: prompt size drives latency and cost long before it hits the limit.
+MODEL_CONTEXT_BUDGETS = {
+    "gemini-2.5-pro": 48000,
+    "gemini-2.5-flash": 32000,
+    "gemini-1.5-pro": 48000,
+    "gemini-1.5-flash": 24000,
+    "gemini-pro": 8000,
+}
+DEFAULT_CONTEXT_BUDGET = 16000
+
+# Rough tokens-per-character ratio for JSON-ish English text
+CHARS_PER_TOKEN = 4
+
+# Keys that always go first (small, and needed to answer anything)
+ALWAYS_FIRST = ("user", "query", "self_profile")
+
+# Datasets most relevant to each intent from ai_chat_controller._detect_intent, in priority order
+INTENT_DATASETS = {
+    "requirement": ("requirement", "tracking_stats", "candidate_progress", "candidates_in_last_round",
+                    "qualified_candidates", "allocations", "requirements"),
+    "client": ("client", "clients", "requirements"),
+    "allocations": ("requirements", "self_assignments"),
+    "candidates": ("candidate", "candidates", "self_candidates"),
+    "interview": ("interviews",),
+    "screening": ("screenings",),
+    "logs": ("logs",),
+    "users": ("users", "recruiters", "usersdata"),
+    "general": ("self_org_stats", "requirements", "candidates", "clients", "allocations", "users", "usersdata"),
+}
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token); no tokenizer round trip."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def token_budget_for(model):
+    override = os.getenv("LLM_CONTEXT_TOKEN_BUDGET")
+    if override:
+        return int(override)
+    model = (model or "").lower()
+    # Longest prefix wins so "gemini-2.5-flash-lite" maps to gemini-2.5-flash
+    for name in sorted(MODEL_CONTEXT_BUDGETS, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_CONTEXT_BUDGETS[name]
+    return DEFAULT_CONTEXT_BUDGET
+
+
+def _dumps(value):
+    return json.dumps(value, default=str, separators=(",", ":"), ensure_ascii=False)
+
+
+def rank_datasets(context, intent=None):
+    """Context keys ordered by relevance: always-first keys, intent datasets, then the rest in original order."""
+    ordered = [k for k in ALWAYS_FIRST if k in context]
+    for key in INTENT_DATASETS.get(intent or "general", ()):
+        if key in context and key not in ordered:
+            ordered.append(key)
+    ordered.extend(k for k in context if k not in ordered)
+    return ordered
+
+
+def _is_table(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(row, dict) for row in value)
+
+
+def _pack_table(rows, remaining):
+    """Columnar form of a list of dicts, keeping as many leading rows as fit. Returns (table, tokens_used)."""
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+
+    used = estimate_tokens(_dumps(columns)) + 8  # + {"columns":,"rows":[]}
+    packed_rows = []
+    for row in rows:
+        values = [row.get(c) for c in columns]
+        cost = estimate_tokens(_dumps(values)) + 1
+        if used + cost > remaining:
+            break
+        packed_rows.append(values)
+        used += cost
+
+    return {"columns": columns, "rows": packed_rows}, used
+
+
+def pack_context(context, model=None, intent=None, budget=None):
+    """Serialize `context` compactly within the model's token budget."""
+    if not context:
+        return "{}"
+
+    remaining = budget if budget is not None else token_budget_for(model)
+    packed = {}
+    truncated = {}
+
+    for name in rank_datasets(context, intent):
+        value = context[name]
+
+        if _is_table(value):
+            table, used = _pack_table(value, remaining)
+            if table["rows"]:
+                packed[name] = table
+                remaining -= used
+            if len(table["rows"]) < len(value):
+                truncated[name] = {"total": len(value), "included": len(table["rows"])}
+            continue
+
+        cost = estimate_tokens(_dumps(value))
+        if cost <= remaining:
+            packed[name] = value
+            remaining -= cost
+        else:
+            truncated[name] = {"total": len(value) if isinstance(value, (list, dict)) else 1, "included": 0}
+
+    if truncated:
+        packed["_truncated"] = truncated
+    return _dumps(packed)
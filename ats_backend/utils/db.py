@@ -1,8 +1,13 @@
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
 
 import pymysql
 import pymysql.cursors
+from pymysql.constants import SERVER_STATUS
 from pymysql.err import Error
 
 try:
@@ -21,14 +26,6 @@ if load_dotenv:
         load_dotenv(dotenv_path=env_file, override=True)
 
 
-# -------------------------------------
-# Database connection configuration
-# -------------------------------------
-import pymysql
-import pymysql.cursors
-from pymysql.err import Error
-import time
-
 # -------------------------------------
 # Database connection configuration
 # -------------------------------------
@@ -47,119 +44,359 @@ def get_db_config():
     }
 
 
-
-
-class RobustConnection:
+def get_pool_config():
     """
-    A wrapper around the pymysql connection to handle:
-    1. Automatic reconnection on timeout/error.
-    2. Preventing premature closure by 'with' blocks or explicit .close() calls.
+    Pool sizing/timeouts from environment.
+
+    DB_POOL_MIN_SIZE        connections kept open even when idle (default 2)
+    DB_POOL_MAX_SIZE        hard cap on open sockets (default 10: waitress threads + background workers)
+    DB_POOL_TIMEOUT         seconds to wait for a free connection before failing (default 10)
+    DB_POOL_IDLE_TIMEOUT    idle seconds after which surplus connections are closed (default 300)
+    DB_POOL_VALIDATE_AFTER  idle seconds after which a connection is pinged on checkout (default 30)
     """
-    def __init__(self, config):
-        self.config = config
-        self._conn = None
-        self._connect()
+    max_size = max(1, int(os.getenv("DB_POOL_MAX_SIZE", "10")))
+    return {
+        "min_size": min(max_size, max(0, int(os.getenv("DB_POOL_MIN_SIZE", "2")))),
+        "max_size": max_size,
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "idle_timeout": float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+        "validate_after": float(os.getenv("DB_POOL_VALIDATE_AFTER", "30")),
+    }
 
-    def _connect(self):
-        """Establish the database connection with retries."""
-        retries = 3
-        while retries > 0:
-            try:
-                print("🔌 Connecting to Database...")
-                self._conn = pymysql.connect(**self.config)
-                print("✅ Database Connected Successfully")
-                return
-            except Error as e:
-                print(f"❌ Database connection failed: {e}")
-                retries -= 1
-                if retries > 0:
-                    print(f"🔄 Retrying in 2 seconds... ({retries} left)")
-                    time.sleep(2)
-                else:
-                    print("🚨 Could not connect to database after retries.")
-                    # Don't raise, just let _conn be None / broken, handled in ping
 
-    def ping(self, reconnect=True, attempts=1, delay=0):
-        """Ensure connection is alive."""
-        try:
-            if self._conn is None:
-                self._connect()
-            else:
-                self._conn.ping(reconnect=reconnect)
-        except Exception as e:
-            print(f"⚠️ Ping failed, attempting reconnect: {e}")
-            self._connect()
+class PoolExhaustedError(Error):
+    """Raised when no pooled connection becomes free within DB_POOL_TIMEOUT."""
+
+
+class PooledConnection:
+    """
+    A pool-managed wrapper around a pymysql connection.
+
+    Keeps the interface the routes already use (cursor(dictionary=True), commit,
+    rollback, close, is_connected) but close() hands the socket back to the pool
+    instead of closing it. No ping is issued per call; liveness is only checked
+    by the pool when a connection has been idle for a while.
+    """
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._conn = raw_conn
+        self._depth = 0
+        self.last_used = time.monotonic()
 
     def cursor(self, *args, **kwargs):
-        """Get a cursor, ensuring connection is alive first."""
-        self.ping(reconnect=True)
-        
         # Handle dictionary=True compatibility for pymysql
         if kwargs.pop('dictionary', False):
-             kwargs['cursor'] = pymysql.cursors.DictCursor
-             
+            kwargs['cursor'] = pymysql.cursors.DictCursor
         return self._conn.cursor(*args, **kwargs)
 
     def commit(self):
-        self.ping(reconnect=True)
         return self._conn.commit()
 
     def rollback(self):
-        self.ping(reconnect=True)
         return self._conn.rollback()
 
+    def ping(self, reconnect=True):
+        """Explicit liveness check (the pool does this itself after idle periods)."""
+        self._conn.ping(reconnect=reconnect)
+
     def close(self):
-        """
-        Intercept close() to keep the persistent connection alive.
-        Does NOT close the actual socket.
-        """
-        # print("🛡️ Ignoring request to close persistent DB connection.")
-        pass
+        """Return the connection to the pool. The socket stays open."""
+        self._pool.release(self)
 
     def is_connected(self):
         """Compatibility method for mysql-connector."""
-        if not self._conn:
-            return False
-        return self._conn.open
+        return bool(self._conn and self._conn.open)
 
     def force_close(self):
-        """Actually close the connection (for app shutdown)."""
+        """Actually close the underlying socket (used by the pool and at shutdown)."""
         if self._conn:
             try:
                 self._conn.close()
-                print("🔌 Database connection closed (force).")
             except Exception:
                 pass
             self._conn = None
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def __getattr__(self, name):
         """Delegate other methods to the underlying connection object."""
-        # Removed automatic ping() here to improve performance.
-        # Callers rely on cursor(), commit(), or explicit ping() 
-        # to ensure connectivity.
-        return getattr(self._conn, name)
+        return getattr(self.__dict__.get("_conn"), name)
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of MySQL connections.
+
+    - At most `max_size` sockets are ever open; callers beyond that wait up to
+      `timeout` seconds (tracked in stats) and then get PoolExhaustedError.
+    - A thread that already holds a connection gets the same one back from
+      nested get_db_connection() calls, so helpers that open their own
+      connection inside a route never deadlock against the pool.
+    - Connections idle longer than `validate_after` are pinged on checkout;
+      connections idle longer than `idle_timeout` are closed down to `min_size`.
+    - Any open transaction is rolled back on checkin so the next borrower never
+      sees a stale REPEATABLE READ snapshot.
+    """
+    def __init__(self, config, min_size=2, max_size=10, timeout=10.0,
+                 idle_timeout=300.0, validate_after=30.0):
+        self.config = config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.validate_after = validate_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # newest on the right; oldest reaped from the left
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._local = threading.local()
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    # ---------------- connection lifecycle ----------------
+
+    def _connect(self):
+        """Open a new socket, with the same retry policy the old wrapper used."""
+        retries = 3
+        while True:
+            try:
+                print("🔌 Connecting to Database...")
+                raw = pymysql.connect(**self.config)
+                print("✅ Database Connected Successfully")
+                return raw
+            except Error as e:
+                print(f"❌ Database connection failed: {e}")
+                retries -= 1
+                if retries <= 0:
+                    print("🚨 Could not connect to database after retries.")
+                    raise
+                print(f"🔄 Retrying in 2 seconds... ({retries} left)")
+                time.sleep(2)
+
+    def _open(self):
+        return PooledConnection(self, self._connect())
+
+    def _reap_idle_locked(self):
+        """Pop connections idle past idle_timeout (caller holds the lock, closes them)."""
+        now = time.monotonic()
+        expired = []
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0].last_used > self.idle_timeout):
+            expired.append(self._idle.popleft())
+            self._size -= 1
+        return expired
+
+    def warm(self):
+        """Open connections up to min_size so the first requests don't pay connect latency."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._open()
+            except Error:
+                with self._cond:
+                    self._size -= 1
+                return
+            with self._cond:
+                self._idle.append(conn)
+                self._cond.notify()
+
+    # ---------------- checkout / checkin ----------------
+
+    def _checkout(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        conn = None
+        with self._cond:
+            expired = self._reap_idle_locked()
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolExhaustedError(
+                        f"No database connection available within {self.timeout}s "
+                        f"(pool max_size={self.max_size})"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            waited = time.monotonic() - start
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._in_use += 1
+
+        for stale in expired:
+            stale.force_close()
+
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        elif time.monotonic() - conn.last_used > self.validate_after:
+            try:
+                conn._conn.ping(reconnect=True)
+            except Exception as e:
+                print(f"⚠️ Pooled connection failed validation, reconnecting: {e}")
+                conn.force_close()
+                try:
+                    conn._conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+        return conn
+
+    def _checkin(self, conn):
+        healthy = conn._conn is not None and conn._conn.open
+        if healthy:
+            try:
+                if conn._conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    conn._conn.rollback()
+            except Exception:
+                healthy = False
+
+        conn.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if not healthy:
+                self._size -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+        if not healthy:
+            conn.force_close()
+
+    def acquire(self):
+        """Check out a connection (re-entrant per thread)."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            held._depth += 1
+            return held
+        conn = self._checkout()
+        conn._depth = 1
+        self._local.conn = conn
+        return conn
+
+    def release(self, conn):
+        """Undo one acquire(); the last one returns the connection to the pool."""
+        if conn._depth <= 0:
+            return
+        conn._depth -= 1
+        if conn._depth > 0:
+            return
+        if getattr(self._local, "conn", None) is conn:
+            self._local.conn = None
+        self._checkin(conn)
+
+    def release_thread_connection(self):
+        """Return whatever the current thread still holds (guards against leaked checkouts)."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            held._depth = 1
+            self.release(held)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every idle connection (for app shutdown)."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn in idle:
+            conn.force_close()
+        print("🔌 Database pool closed.")
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "total_wait_ms": round(self._total_wait * 1000, 2),
+                "avg_wait_ms": round(self._total_wait * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating (and warming) it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(get_db_config(), **get_pool_config())
+                pool.warm()
+                _pool = pool
+    return _pool
 
-# Thread-local storage for persistent connections per thread
-import threading
-_thread_locals = threading.local()
 
 def get_db_connection():
     """
-    Returns a thread-local RobustConnection instance.
-    This ensures each thread has its own persistent connection, preventing race conditions
-    while maintaining the "persistent" and "auto-reconnect" behavior.
+    Check out a pooled connection. Call conn.close() when done to return it
+    to the pool; nested calls on the same thread share one connection.
     """
-    if not hasattr(_thread_locals, 'connection'):
-        _thread_locals.connection = RobustConnection(get_db_config())
-    
-    # Ensure it's alive on every request retrieval
-    try:
-        _thread_locals.connection.ping(reconnect=True)
-    except Exception:
-        # If ping fails violently, try re-creating the wrapper
-        _thread_locals.connection = RobustConnection(get_db_config())
-
-    return _thread_locals.connection
+    return get_pool().acquire()
+
+
+@contextmanager
+def db_connection():
+    """Context-manager form: `with db_connection() as conn: ...`"""
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def release_thread_connection():
+    """Return any connection the current thread forgot to close (request teardown hook)."""
+    if _pool is not None:
+        _pool.release_thread_connection()
+
+
+def get_pool_stats():
+    return get_pool().stats()
 
 # Backwards-compatible export for existing imports in app.py
 db_config = get_db_config()
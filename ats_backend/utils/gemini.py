@@ -3,6 +3,9 @@ import json
 import os
 import re
 from utils.prompt_builder import build_prompt
+from utils.skills import parse_skills
+from utils.llm_transport import post_json, CircuitOpenError
+from utils.screening_cache import screening_cache_key, get_cached_screening, store_screening
 
 # Load API key & model
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -21,17 +24,11 @@ def extract_json(text: str):
 
 
 def _skills_set(value):
-    if not value:
-        return set()
-    if isinstance(value, (list, tuple)):
-        items = value
-    else:
-        items = re.split(r"[,/|]", str(value))
-    return {item.strip().lower() for item in items if item.strip()}
+    return parse_skills(value)
 
 
-def _fallback_screening(candidate, req, cause="Missing Gemini API"):
-    """Return a deterministic screening payload when Gemini is unavailable."""
+def heuristic_signals(candidate, req):
+    """Skill overlap, experience and the heuristic score behind _fallback_screening (and the pre-screen)."""
     cand_skills = _skills_set(candidate.get("skills"))
     req_skills = _skills_set(req.get("skills_required"))
     overlap = len(cand_skills & req_skills)
@@ -43,7 +40,24 @@ def _fallback_screening(candidate, req, cause="Missing Gemini API"):
         experience = 0.0
 
     overlap_ratio = overlap / required
-    score = min(100, max(20, 40 + overlap_ratio * 40 + experience * 4))
+    return {
+        "candidate_skills": len(cand_skills),
+        "required_skills": len(req_skills),
+        "overlap": overlap,
+        "overlap_ratio": overlap_ratio,
+        "experience": experience,
+        "score": min(100, max(20, 40 + overlap_ratio * 40 + experience * 4)),
+    }
+
+
+def _fallback_screening(candidate, req, cause="Missing Gemini API"):
+    """Return a deterministic screening payload when Gemini is unavailable."""
+    signals = heuristic_signals(candidate, req)
+    overlap = signals["overlap"]
+    required = signals["required_skills"] or 1
+    experience = signals["experience"]
+    overlap_ratio = signals["overlap_ratio"]
+    score = signals["score"]
 
     rationale = [
         f"Matched {overlap} out of {required} required skills",
@@ -84,6 +98,13 @@ def run_gemini_screening(candidate, req):
     # Build prompt safely
     prompt = build_prompt(candidate, req)
 
+    # Same model + same prompt -> same question; reuse the earlier answer
+    cache_key = screening_cache_key(MODEL, prompt)
+    cached = get_cached_screening(cache_key)
+    if cached is not None:
+        cached["model_version"] = f"{MODEL}+cache"
+        return cached
+
     payload = {
         "contents": [
             {"parts": [{"text": prompt}]}
@@ -91,12 +112,16 @@ def run_gemini_screening(candidate, req):
     }
 
     try:
-        response = requests.post(
-            f"{GEMINI_URL}?key={GEMINI_API_KEY}",
-            json=payload,
-            headers={"Content-Type": "application/json"},
+        response = post_json(
+            GEMINI_URL,
+            payload,
+            params={"key": GEMINI_API_KEY},
             timeout=20,
+            label="screening",
         )
+    except CircuitOpenError:
+        # Gemini is known to be down; answer immediately instead of waiting on a timeout
+        return _fallback_screening(candidate, req, cause="Gemini temporarily unavailable")
     except requests.RequestException as exc:
         print("⚠️ Gemini request failed:", exc)
         return _fallback_screening(candidate, req, cause=str(exc))
@@ -118,7 +143,12 @@ def run_gemini_screening(candidate, req):
     # Extract JSON inside the output
     try:
         parsed = extract_json(text_output)
-        return parsed
     except Exception as e:
         print("⚠️ Gemini returned invalid JSON:", e)
         return _fallback_screening(candidate, req, cause="Invalid JSON")
+
+    # Only genuine Gemini answers are cached; fallbacks must be retried later
+    if isinstance(parsed, dict) and not parsed.get("error"):
+        store_screening(cache_key, MODEL, parsed)
+        parsed = dict(parsed, model_version=MODEL)
+    return parsed
@@ -0,0 +1,165 @@
+"""
+Index advisor (dev tool).
+
+Finds the SQL string literals in the backend's Python files (via the AST, so
+comments and docstrings that merely mention SQL are ignored), runs EXPLAIN on
+each SELECT / UPDATE / DELETE against the configured database and reports the
+ones with a full table scan (type ALL) or full index scan (type index).
+Nothing is executed: `%s` placeholders are replaced with sample literals and
+only the plan is read.
+
+Queries assembled at runtime (string concatenation, `+=` clauses) are only
+seen in their static parts; f-strings are explained with every `{...}` replaced
+by a placeholder and are reported as skipped when that does not parse.
+
+CLI (run from the ats_backend folder):
+    python -m utils.index_advisor [--min-rows N] [--show-skipped] [--fail] [paths...]
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+from collections import namedtuple
+
+import pymysql.cursors
+
+from utils.db import db_connection
+
+DEFAULT_PATHS = ["app.py", "controllers", "services", "utils"]
+_SKIP_DIRS = {"__pycache__", "venv", ".venv", "node_modules", "uploads"}
+_SQL_START = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\s")  # upper case only, so UI text like "Select a..." is ignored
+_SCAN_TYPES = {"ALL", "index"}
+_QUOTED = re.compile(r"('(?:[^'\\]|\\.|'')*')")
+
+SqlSite = namedtuple("SqlSite", ["path", "line", "sql"])
+Finding = namedtuple("Finding", ["site", "table", "scan_type", "rows", "possible_keys", "extra"])
+
+
+def _string_value(node):
+    """The literal text of a str constant or f-string (fields become %s), else None."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(str(value.value))
+            else:
+                parts.append("%s")
+        return "".join(parts)
+    return None
+
+
+def find_sql(path):
+    """SqlSite for every SQL-looking string literal in one Python file."""
+    with open(path, "r", encoding="utf-8") as fh:
+        tree = ast.parse(fh.read(), filename=path)
+
+    sites = []
+    nested = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.JoinedStr):
+            nested.update(id(value) for value in node.values)
+    for node in ast.walk(tree):
+        if id(node) in nested:
+            continue
+        text = _string_value(node)
+        if text and _SQL_START.match(text):
+            sites.append(SqlSite(path, node.lineno, text.strip()))
+    return sorted(sites, key=lambda site: site.line)
+
+
+def iter_python_files(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            if path.endswith(".py"):
+                yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in _SKIP_DIRS)
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    yield os.path.join(root, name)
+
+
+def _fill_placeholders(sql):
+    sql = re.sub(r"\bLIMIT\s+%(\(\w+\))?s", "LIMIT 10", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bOFFSET\s+%(\(\w+\))?s", "OFFSET 0", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"%(\(\w+\))?s", "'0'", sql)
+    return sql.replace("%%", "%")
+
+
+def explainable(sql):
+    """Replace DB-API placeholders with sample literals so the statement can be EXPLAINed."""
+    # Quoted literals (e.g. DATE_FORMAT patterns) are left alone
+    parts = _QUOTED.split(sql)
+    return "".join(part if i % 2 else _fill_placeholders(part) for i, part in enumerate(parts))
+
+
+def explain(cursor, site, min_rows=0):
+    """Findings for one statement; raises the driver error if it cannot be EXPLAINed."""
+    cursor.execute("EXPLAIN " + explainable(site.sql))
+    findings = []
+    for row in cursor.fetchall():
+        scan_type = row.get("type")
+        rows = row.get("rows") or 0
+        if scan_type in _SCAN_TYPES and rows >= min_rows:
+            findings.append(Finding(
+                site, row.get("table"), scan_type, rows, row.get("possible_keys"), row.get("Extra"),
+            ))
+    return findings
+
+
+def _snippet(sql, width=100):
+    flat = " ".join(sql.split())
+    return flat if len(flat) <= width else flat[:width - 1] + "…"
+
+
+def run(paths, min_rows=0, show_skipped=False):
+    """Explain every statement found under `paths`. Returns (statements, findings, skipped)."""
+    sites = [site for path in iter_python_files(paths) for site in find_sql(path)]
+    findings, skipped = [], []
+
+    with db_connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        try:
+            for site in sites:
+                try:
+                    findings.extend(explain(cursor, site, min_rows))
+                except Exception as e:
+                    skipped.append((site, str(e)))
+        finally:
+            cursor.close()
+        # EXPLAIN never writes, but leave the pooled connection clean
+        conn.rollback()
+
+    for f in findings:
+        scan = "full table scan" if f.scan_type == "ALL" else "full index scan"
+        print(f"⚠️ {f.site.path}:{f.site.line} {scan} on {f.table} (~{f.rows} rows, possible keys: {f.possible_keys or '-'})")
+        print(f"     {_snippet(f.site.sql)}")
+        if f.extra:
+            print(f"     Extra: {f.extra}")
+    if show_skipped:
+        for site, error in skipped:
+            print(f"⏭️ {site.path}:{site.line} not explainable: {error}")
+            print(f"     {_snippet(site.sql)}")
+    return len(sites), findings, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN every SQL statement in the codebase and flag full scans")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    parser.add_argument("--min-rows", type=int, default=0, help="only flag scans estimated at this many rows or more")
+    parser.add_argument("--show-skipped", action="store_true", help="list statements EXPLAIN could not run")
+    parser.add_argument("--fail", action="store_true", help="exit with status 1 when any scan is flagged")
+    args = parser.parse_args(argv)
+
+    total, findings, skipped = run(args.paths, args.min_rows, args.show_skipped)
+    flagged = len({f.site for f in findings})
+    print(f"🔎 {total} statement(s) explained: {flagged} with full scans, {len(skipped)} skipped")
+    return 1 if args.fail and findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,61 @@
 import os
 import json
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional
+
+from utils.context_packer import pack_context
+from utils.llm_transport import post_json, stream_sse, CircuitOpenError
 
 # Google Gemini API client wrapper. Requires GEMINI_API_KEY environment variable.
 # Falls back to a safe mock response if API key is not configured.
 # Get your API key from: https://aistudio.google.com/app/apikey
 
+CONTEXT_FORMAT_NOTE = (
+	"Lists in the context are columnar: {\"columns\": [...], \"rows\": [[...], ...]}. "
+	"\"_truncated\" gives total vs included counts for datasets cut to fit; use the totals for counts "
+	"and say when a record may be among the omitted rows."
+)
+
+
+def _mock_reply(context: Dict[str, Any]) -> str:
+	# Safe deterministic mock: do not hallucinate; summarize only from context
+	preview = json.dumps(context, default=str)
+	preview = (preview[:800] + "...") if len(preview) > 800 else preview
+	return (
+		"[Mocked AI Reply] Based only on provided ATS context and your question, "
+		"here is a concise summary. If the requested data is missing, it may not "
+		"exist or you are not authorized. Context preview: " + preview
+	)
+
+
+def _build_payload(system: str, context: Dict[str, Any], user_message: str, model: str, intent: Optional[str] = None) -> Dict[str, Any]:
+	# Build the full prompt with system instructions, user message, and context.
+	# The context is packed to the model's token budget (see utils/context_packer.py).
+	packed_context = pack_context(context, model=model, intent=intent)
+	full_prompt = (
+		f"{system}\n\nUser Question: {user_message}\n\n"
+		f"{CONTEXT_FORMAT_NOTE}\n"
+		f"Context Data (JSON):\n{packed_context}"
+	)
+
+	# Gemini API payload format
+	return {
+		"contents": [
+			{
+				"parts": [
+					{
+						"text": full_prompt
+					}
+				]
+			}
+		],
+		"generationConfig": {
+			"temperature": 0.2,
+			"maxOutputTokens": 2000,
+		}
+	}
 
-def call_llm(system: str, context: Dict[str, Any], user_message: str) -> str:
+
+def call_llm(system: str, context: Dict[str, Any], user_message: str, intent: Optional[str] = None) -> str:
 
 	# Get Gemini API key (required)
 	api_key = os.getenv("GEMINI_API_KEY")
@@ -21,49 +69,21 @@ def call_llm(system: str, context: Dict[str, Any], user_message: str) -> str:
 
 
 	if not api_key:
-		# Safe deterministic mock: do not hallucinate; summarize only from context
-		preview = json.dumps(context, default=str)
-		preview = (preview[:800] + "...") if len(preview) > 800 else preview
 		print("⚠️ LLM: No GEMINI_API_KEY configured, using mock response")
-		return (
-			"[Mocked AI Reply] Based only on provided ATS context and your question, "
-			"here is a concise summary. If the requested data is missing, it may not "
-			"exist or you are not authorized. Context preview: " + preview
-		)
+		return _mock_reply(context)
 
 	# Gemini API call
 	try:
 		import requests  # type: ignore
 		
-		# Build the full prompt with system instructions, user message, and context
-		full_prompt = f"{system}\n\nUser Question: {user_message}\n\nContext Data (JSON):\n{json.dumps(context, default=str, indent=2)}"
-		
-		# Gemini API payload format
-		payload = {
-			"contents": [
-				{
-					"parts": [
-						{
-							"text": full_prompt
-						}
-					]
-				}
-			],
-			"generationConfig": {
-				"temperature": 0.2,
-				"maxOutputTokens": 2000,
-			}
-		}
-		
-		# Gemini API requires Content-Type header and API key as query parameter
-		headers = {
-			"Content-Type": "application/json",
-		}
+		payload = _build_payload(system, context, user_message, model, intent)
+
+		# Gemini API requires the API key as query parameter (Content-Type is set on the shared session)
 		params = {"key": api_key}
 		
 		print(f"🤖 LLM: Calling Gemini API with model {model}")
 		print(f"🔑 API Key: {api_key[:10]}...{api_key[-5:] if len(api_key) > 15 else '***'}")
-		resp = requests.post(api_url, json=payload, headers=headers, params=params, timeout=30)
+		resp = post_json(api_url, payload, params=params, timeout=30, label="chat")
 		
 		# Error handling
 		if resp.status_code != 200:
@@ -119,6 +139,10 @@ def call_llm(system: str, context: Dict[str, Any], user_message: str) -> str:
 		
 		return "The AI did not return a response. Please try again."
 		
+	except CircuitOpenError:
+		# Gemini is failing; reply immediately instead of holding the request thread
+		print("🔌 LLM: Gemini circuit open, using mock response")
+		return _mock_reply(context)
 	except requests.exceptions.RequestException as e:
 		error_msg = str(e)
 		print(f"❌ Gemini API Request Error: {error_msg}")
@@ -129,3 +153,48 @@ def call_llm(system: str, context: Dict[str, Any], user_message: str) -> str:
 		return f"AI service error: {error_msg}. Please contact support if this persists."
 
 
+def stream_llm(system: str, context: Dict[str, Any], user_message: str, intent: Optional[str] = None) -> Iterator[str]:
+	"""
+	Streaming variant of call_llm: yields text chunks as Gemini produces them
+	(streamGenerateContent, alt=sse). Failures are yielded as a single text
+	chunk, mirroring the error strings call_llm returns.
+	"""
+	api_key = os.getenv("GEMINI_API_KEY")
+	model = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+	api_url = f"https://generativelanguage.googleapis.com/v1/models/{model}:streamGenerateContent"
+
+	if not api_key:
+		print("⚠️ LLM: No GEMINI_API_KEY configured, using mock response")
+		yield _mock_reply(context)
+		return
+
+	try:
+		import requests  # type: ignore
+
+		payload = _build_payload(system, context, user_message, model, intent)
+		print(f"🤖 LLM: Streaming from Gemini API with model {model}")
+
+		produced = False
+		for event in stream_sse(api_url, payload, params={"key": api_key, "alt": "sse"}, timeout=30, label="chat-stream"):
+			for candidate in event.get("candidates", [])[:1]:
+				for part in (candidate.get("content") or {}).get("parts", []):
+					text = part.get("text")
+					if text:
+						produced = True
+						yield text
+
+		if not produced:
+			yield "The AI did not return a response. Please try again."
+
+	except CircuitOpenError:
+		print("🔌 LLM: Gemini circuit open, using mock response")
+		yield _mock_reply(context)
+	except requests.exceptions.HTTPError as e:
+		print(f"❌ Gemini API Stream Error: {e}")
+		yield f"AI service error: {e}. Please check your API key and configuration."
+	except requests.exceptions.RequestException as e:
+		print(f"❌ Gemini API Request Error: {e}")
+		yield f"AI service connection error: {e}. Please check your internet connection and Gemini API endpoint."
+	except Exception as e:
+		print(f"❌ Gemini API Unexpected Error: {e}")
+		yield f"AI service error: {e}. Please contact support if this persists."
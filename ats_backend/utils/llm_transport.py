@@ -0,0 +1,332 @@
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared HTTP transport for Gemini calls (utils/llm_client.py, utils/gemini.py).
+# One pooled Session keeps TLS connections to generativelanguage.googleapis.com
+# alive between calls; 429/5xx responses and connection errors are retried with
+# jittered exponential backoff, honouring Retry-After when the API sends it, all
+# within the caller's timeout. Read timeouts are never retried (calls are billed).
+# A shared circuit breaker fails calls fast while Gemini is down, so request
+# threads are not parked in timeouts during an upstream outage.
+
+LLM_HTTP_POOL_SIZE = int(os.getenv("LLM_HTTP_POOL_SIZE", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "20"))
+
+GEMINI_CB_FAILURE_THRESHOLD = int(os.getenv("GEMINI_CB_FAILURE_THRESHOLD", "5"))
+GEMINI_CB_RESET_SECONDS = float(os.getenv("GEMINI_CB_RESET_SECONDS", "30"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+
+def get_session():
+    """Process-wide requests.Session with a keep-alive connection pool."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=2,
+                    pool_maxsize=LLM_HTTP_POOL_SIZE,
+                    max_retries=0,  # retries are handled below so backoff is visible in metrics
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Content-Type": "application/json"})
+                _session = session
+    return _session
+
+
+def _backoff_delay(attempt):
+    """Full-jitter exponential backoff: uniform(0, min(max, base * 2^attempt))."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _retry_after_seconds(resp):
+    """Parse a Retry-After header (delta-seconds or HTTP date). Returns None if absent/invalid."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed     calls go through; `failure_threshold` consecutive failures trip it
+    open       calls fail fast until `reset_timeout` seconds have passed
+    half_open  a single probe call is let through; success closes the circuit,
+               failure re-opens it for another `reset_timeout`
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.trips = 0
+
+    def allow(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"✅ Circuit '{self.name}' closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                    print(f"🔌 Circuit '{self.name}' opened after {self._failures} consecutive failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def stats(self):
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "trips": self.trips,
+            }
+
+
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=GEMINI_CB_FAILURE_THRESHOLD,
+    reset_timeout=GEMINI_CB_RESET_SECONDS,
+)
+
+
+def _label_metrics(label):
+    # caller holds _metrics_lock
+    return _metrics.setdefault(label, {
+        "calls": 0, "errors": 0, "retries": 0, "short_circuited": 0,
+        "total_latency_ms": 0.0, "max_latency_ms": 0.0, "total_ttft_ms": 0.0,
+        "prompt_tokens": 0, "output_tokens": 0, "total_tokens": 0,
+    })
+
+
+def _record(label, latency_ms, attempts, status, usage, ttft_ms=None):
+    usage = usage or {}
+    with _metrics_lock:
+        m = _label_metrics(label)
+        m["calls"] += 1
+        m["retries"] += attempts - 1
+        if status != 200:
+            m["errors"] += 1
+        m["total_latency_ms"] += latency_ms
+        m["max_latency_ms"] = max(m["max_latency_ms"], latency_ms)
+        m["total_ttft_ms"] += ttft_ms if ttft_ms is not None else latency_ms
+        m["prompt_tokens"] += usage.get("promptTokenCount") or 0
+        m["output_tokens"] += usage.get("candidatesTokenCount") or 0
+        m["total_tokens"] += usage.get("totalTokenCount") or 0
+
+    ttft = f" ttft={ttft_ms:.0f}ms" if ttft_ms is not None else ""
+    print(
+        f"📡 LLM {label}: status={status} latency={latency_ms:.0f}ms{ttft} attempts={attempts} "
+        f"tokens={usage.get('promptTokenCount', '-')}/{usage.get('candidatesTokenCount', '-')}"
+    )
+
+
+def _post_with_retries(url, payload, params, timeout, label, breaker, stream=False):
+    """
+    Returns (response, attempts). `timeout` is one deadline for the whole call,
+    retries and backoff included. Every attempt is reported to the breaker.
+
+    Gemini POSTs are billed and not idempotent, so only failures where the
+    request cannot have been processed are retried: connection errors
+    (including connect timeouts) and 429/5xx. A read timeout is raised at once.
+    """
+    session = get_session()
+    start = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    attempt = 0
+
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            resp = session.post(url, json=payload, params=params, timeout=remaining, stream=stream)
+        except requests.RequestException as exc:
+            # Every failure is recorded, or a half-open breaker would keep its probe in flight forever
+            breaker.record_failure()
+            # ConnectTimeout is a ConnectionError; a ReadTimeout may have reached the model
+            retryable = isinstance(exc, requests.ConnectionError)
+            delay = _backoff_delay(attempt)
+            if (
+                not retryable
+                or attempt >= LLM_MAX_RETRIES
+                or delay >= deadline - time.monotonic()
+                or not breaker.allow()
+            ):
+                _record(label, (time.perf_counter() - start) * 1000, attempt + 1, type(exc).__name__, None)
+                raise
+            print(f"⚠️ LLM {label}: {type(exc).__name__}, retrying in {delay:.2f}s")
+        else:
+            if resp.status_code not in RETRY_STATUSES:
+                # 4xx (bad key, unknown model) is a configuration problem, not an outage
+                breaker.record_success()
+                return resp, attempt + 1
+            breaker.record_failure()
+            if attempt >= LLM_MAX_RETRIES:
+                return resp, attempt + 1
+            retry_after = _retry_after_seconds(resp)
+            if retry_after is not None and retry_after > LLM_BACKOFF_MAX:
+                # The API asked us to wait longer than we are willing to; give up now
+                return resp, attempt + 1
+            delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+            if delay >= deadline - time.monotonic() or not breaker.allow():
+                return resp, attempt + 1
+            print(f"⚠️ LLM {label}: HTTP {resp.status_code}, retrying in {delay:.2f}s")
+            resp.close()
+
+        time.sleep(delay)
+        attempt += 1
+
+
+def _check_breaker(breaker, label):
+    if not breaker.allow():
+        with _metrics_lock:
+            _label_metrics(label)["short_circuited"] += 1
+        raise CircuitOpenError(f"Circuit '{breaker.name}' is open; skipping upstream call")
+
+
+def post_json(url, payload, params=None, timeout=30, label="gemini", breaker=gemini_breaker):
+    """
+    POST a JSON payload through the pooled session, retrying 429/5xx and
+    connection errors within one `timeout` deadline. Returns the final requests.Response (which may still be
+    an error status); raises requests.RequestException once retries run out,
+    or CircuitOpenError without calling upstream while the breaker is open.
+    """
+    _check_breaker(breaker, label)
+
+    start = time.perf_counter()
+    resp, attempts = _post_with_retries(url, payload, params, timeout, label, breaker)
+
+    usage = None
+    if resp.status_code == 200:
+        try:
+            usage = resp.json().get("usageMetadata")
+        except ValueError:
+            pass
+    _record(label, (time.perf_counter() - start) * 1000, attempts, resp.status_code, usage)
+    return resp
+
+
+def stream_sse(url, payload, params=None, timeout=60, label="gemini-stream", breaker=gemini_breaker):
+    """
+    POST a JSON payload and yield each Server-Sent Event `data:` payload as a
+    parsed dict (Gemini streamGenerateContent with alt=sse). Retries only apply
+    before the first byte arrives. A non-2xx final status raises requests.HTTPError.
+    """
+    _check_breaker(breaker, label)
+
+    start = time.perf_counter()
+    resp, attempts = _post_with_retries(url, payload, params, timeout, label, breaker, stream=True)
+
+    if resp.status_code != 200:
+        _record(label, (time.perf_counter() - start) * 1000, attempts, resp.status_code, None)
+        try:
+            resp.raise_for_status()
+        finally:
+            resp.close()
+
+    ttft_ms = None
+    usage = None
+    resp.encoding = "utf-8"
+    try:
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            try:
+                event = json.loads(line[5:].strip())
+            except ValueError:
+                continue
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - start) * 1000
+            # Gemini repeats usageMetadata on chunks; the last one holds the totals
+            usage = event.get("usageMetadata") or usage
+            yield event
+    finally:
+        resp.close()
+        _record(label, (time.perf_counter() - start) * 1000, attempts, resp.status_code, usage, ttft_ms=ttft_ms)
+
+
+def get_llm_metrics():
+    with _metrics_lock:
+        snapshot = {}
+        for label, m in _metrics.items():
+            entry = dict(m)
+            entry["avg_latency_ms"] = round(m["total_latency_ms"] / m["calls"], 1) if m["calls"] else 0.0
+            entry["total_latency_ms"] = round(m["total_latency_ms"], 1)
+            entry["max_latency_ms"] = round(m["max_latency_ms"], 1)
+            entry["avg_ttft_ms"] = round(m["total_ttft_ms"] / m["calls"], 1) if m["calls"] else 0.0
+            entry["total_ttft_ms"] = round(m["total_ttft_ms"], 1)
+            snapshot[label] = entry
+    return {
+        "pool_size": LLM_HTTP_POOL_SIZE,
+        "max_retries": LLM_MAX_RETRIES,
+        "circuit": gemini_breaker.stats(),
+        "calls": snapshot,
+    }
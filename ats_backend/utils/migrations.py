@@ -0,0 +1,844 @@
+"""
+Versioned schema migrations backed by a `schema_migrations` table.
+
+Each migration runs exactly once, in version order. Once a database is up to
+date, startup costs a single `SELECT MAX(version)`; DDL only runs for pending
+steps. Add new schema changes as a new @migration at the bottom of this file;
+never edit one that has already shipped.
+
+CLI (run from the ats_backend folder):
+    python -m utils.migrations status
+    python -m utils.migrations migrate [--to VERSION]
+"""
+import argparse
+import re
+import sys
+from collections import namedtuple
+
+from pymysql.err import ProgrammingError
+
+Migration = namedtuple("Migration", ["version", "name", "apply"])
+
+MIGRATIONS = []
+
+# Serializes concurrent workers that boot against an out-of-date schema
+_LOCK_NAME = "ats_schema_migrations"
+_LOCK_TIMEOUT = 60
+
+
+def migration(version, name):
+    """Register `fn(cursor)` as schema migration `version`."""
+    def decorator(fn):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append(Migration(version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+    return decorator
+
+
+# --------------------- Introspection helpers (only used inside migrations) ---------------------
+
+def _existing_columns(cursor, table):
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _existing_indexes(cursor, table):
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _add_columns_if_missing(cursor, table, columns):
+    """columns: list of (column_name, column_ddl) pairs."""
+    existing = _existing_columns(cursor, table)
+    for column, ddl in columns:
+        if column not in existing:
+            print(f"   -> Adding '{column}' column to {table}...")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def _add_indexes_if_missing(cursor, table, indexes):
+    """indexes: list of (index_name, column_list_sql) pairs."""
+    existing = _existing_indexes(cursor, table)
+    for name, columns in indexes:
+        if name not in existing:
+            print(f"   -> Adding index '{name}' on {table}{columns}...")
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX {name} {columns}")
+
+
+# --------------------- Migrations ---------------------
+
+@migration(1, "baseline schema")
+def _baseline_schema(cursor):
+    # ---------------------------
+    # USERS TABLE
+    # ---------------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            email VARCHAR(150) NOT NULL UNIQUE,
+            password_hash VARCHAR(255) NOT NULL,
+            role ENUM('ADMIN','DELIVERY_MANAGER','TEAM_LEAD','RECRUITER','CLIENT','CANDIDATE') DEFAULT 'RECRUITER',
+            phone VARCHAR(20),
+            status VARCHAR(20) DEFAULT 'ACTIVE',
+            session_token VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    # ---------------------------
+    # USERSDATA TABLE
+    # ---------------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS usersdata (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100),
+            email VARCHAR(150) UNIQUE,
+            phone VARCHAR(20),
+            role VARCHAR(50),
+            status VARCHAR(20) DEFAULT 'ACTIVE',
+            password_hash VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    # ---------------------------
+    # CLIENTS TABLE
+    # ---------------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clients (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            contact_person VARCHAR(255),
+            email VARCHAR(255),
+            phone VARCHAR(50),
+            address TEXT,
+            status ENUM('ACTIVE','INACTIVE') DEFAULT 'ACTIVE',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    # ---------------------------
+    # INTERVIEWS TABLE
+    # ---------------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS interviews (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            candidate_id INT NOT NULL,
+            requirement_id VARCHAR(64),
+            category VARCHAR(50),
+            stage VARCHAR(100),
+            date DATE,
+            time TIME,
+            duration VARCHAR(50),
+            mode VARCHAR(50),
+            location VARCHAR(255),
+            interviewer VARCHAR(255),
+            notes TEXT,
+            status VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # ---------------------------
+    # REQUIREMENTS TABLE
+    # ---------------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirements (
+            id VARCHAR(50) PRIMARY KEY,
+            client_id INT,
+            title VARCHAR(255),
+            description TEXT,
+            location VARCHAR(100),
+            skills_required VARCHAR(255),
+            experience_required FLOAT,
+            ctc_range VARCHAR(100),
+            no_of_rounds INT DEFAULT 1,
+            status VARCHAR(50) DEFAULT 'OPEN',
+            amount INT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_by VARCHAR(100),
+            FOREIGN KEY (client_id) REFERENCES clients(id)
+        );
+    """)
+
+    # ---------------------------
+    # REQUIREMENT_ALLOCATIONS
+    # ---------------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirement_allocations (
+            id VARCHAR(50) PRIMARY KEY,
+            requirement_id VARCHAR(50),
+            recruiter_id INT,
+            assigned_by INT,
+            status VARCHAR(20) DEFAULT 'ASSIGNED',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id),
+            FOREIGN KEY (recruiter_id) REFERENCES users(id),
+            FOREIGN KEY (assigned_by) REFERENCES users(id)
+        );
+    """)
+
+    # ---------------------------
+    # CANDIDATES TABLE
+    # ---------------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidates (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255),
+            email VARCHAR(255),
+            phone VARCHAR(20),
+            skills TEXT,
+            education TEXT,
+            experience TEXT,
+            ctc VARCHAR(50),
+            ectc VARCHAR(50),
+            resume_filename VARCHAR(255),
+            created_by INT,
+            source VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (created_by) REFERENCES users(id)
+        );
+    """)
+
+    # ---------------------------
+    # REQUIREMENT STAGES
+    # ---------------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirement_stages (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            requirement_id VARCHAR(50),
+            stage_order INT,
+            stage_name VARCHAR(255),
+            is_mandatory BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+        );
+    """)
+
+    # ---------------------------
+    # CANDIDATE PROGRESS
+    # ---------------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_progress (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            candidate_id INT,
+            requirement_id VARCHAR(50),
+            stage_id BIGINT,
+            stage_name VARCHAR(255),
+            status ENUM('PENDING','IN_PROGRESS','COMPLETED','REJECTED','REVIEW_REQUIRED') DEFAULT 'PENDING',
+            decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE',
+            manual_decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE',
+            category VARCHAR(50),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY uniq_progress_stage (candidate_id, requirement_id, stage_id),
+            FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id),
+            FOREIGN KEY (stage_id) REFERENCES requirement_stages(id)
+        );
+    """)
+
+    # ---------------- CANDIDATE SCREENING ----------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_screening (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            candidate_id INT,
+            requirement_id VARCHAR(64),
+            ai_score FLOAT,
+            ai_rationale TEXT,
+            recommend VARCHAR(32),
+            red_flags TEXT,
+            model_version VARCHAR(50),
+            status ENUM('PENDING','DONE','ERROR') DEFAULT 'PENDING',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+        );
+    """)
+
+    # ---------------- ASSESSMENT QUEUE ----------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS assesment_queue (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            candidate_id INT NOT NULL,
+            requirement_id VARCHAR(64) NOT NULL,
+            status VARCHAR(32) DEFAULT 'PENDING',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+        );
+    """)
+
+    # ---------------- INTERACTION LOGS (AVATAR) ----------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS interaction_logs (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            session_id VARCHAR(64),
+            user_id INT,
+            user_role VARCHAR(50),
+            message_in TEXT,
+            message_out TEXT,
+            emotion VARCHAR(32),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+@migration(2, "backfill columns missing from pre-migration databases")
+def _backfill_legacy_columns(cursor):
+    # Databases created before these columns existed skip them in the
+    # CREATE TABLE IF NOT EXISTS above; add them once here.
+    _add_columns_if_missing(cursor, "users", [
+        ("session_token", "VARCHAR(255)"),
+    ])
+    _add_columns_if_missing(cursor, "requirements", [
+        ("no_of_rounds", "INT DEFAULT 1"),
+        ("amount", "INT"),
+    ])
+    _add_columns_if_missing(cursor, "requirement_allocations", [
+        ("status", "VARCHAR(20) DEFAULT 'ASSIGNED'"),
+        ("created_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+    ])
+
+    progress_columns = _existing_columns(cursor, "candidate_progress")
+    _add_columns_if_missing(cursor, "candidate_progress", [
+        ("stage_id", "BIGINT"),
+        ("stage_name", "VARCHAR(255)"),
+        ("decision", "ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE'"),
+        ("manual_decision", "ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE'"),
+        ("category", "VARCHAR(50)"),
+    ])
+    if "stage_id" not in progress_columns:
+        cursor.execute(
+            "ALTER TABLE candidate_progress ADD CONSTRAINT fk_cp_stage "
+            "FOREIGN KEY (stage_id) REFERENCES requirement_stages(id)"
+        )
+
+
+@migration(3, "candidate_progress unique key per stage")
+def _progress_unique_per_stage(cursor):
+    indexes = _existing_indexes(cursor, "candidate_progress")
+    if "uniq_progress" in indexes:
+        cursor.execute("ALTER TABLE candidate_progress DROP INDEX uniq_progress")
+        print("   ✅ Dropped old unique key 'uniq_progress'")
+    if "uniq_progress_stage" not in indexes:
+        cursor.execute(
+            "ALTER TABLE candidate_progress "
+            "ADD UNIQUE KEY uniq_progress_stage (candidate_id, requirement_id, stage_id)"
+        )
+        print("   ✅ Added unique key 'uniq_progress_stage'")
+
+
+@migration(4, "users.status NOT NULL DEFAULT 'ACTIVE'")
+def _users_status_default(cursor):
+    # Normalize existing rows, then enforce the default at schema level
+    cursor.execute("UPDATE users SET status = 'ACTIVE' WHERE status IS NULL OR status = ''")
+    try:
+        cursor.execute("ALTER TABLE users MODIFY status VARCHAR(20) NOT NULL DEFAULT 'ACTIVE'")
+    except Exception as e:
+        # Ignore if permissions are missing; the UPDATE above still normalized the rows
+        print(f"   ⚠️ Could not enforce users.status default: {e}")
+
+
+@migration(5, "candidates ctc/ectc columns and created_by listing index")
+def _candidates_listing(cursor):
+    # Previously ensured on every /get-candidates call via INFORMATION_SCHEMA
+    _add_columns_if_missing(cursor, "candidates", [
+        ("ctc", "VARCHAR(50)"),
+        ("ectc", "VARCHAR(50)"),
+    ])
+    _add_indexes_if_missing(cursor, "candidates", [
+        ("idx_candidates_created_by", "(created_by, id)"),
+    ])
+
+
+@migration(6, "candidates source filter index")
+def _candidates_source_index(cursor):
+    # Keyset pages filtered by source: WHERE source = ? AND id < ? ORDER BY id DESC
+    _add_indexes_if_missing(cursor, "candidates", [
+        ("idx_candidates_source", "(source, id)"),
+    ])
+
+
+@migration(7, "screening_jobs table for asynchronous screening")
+def _screening_jobs(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS screening_jobs (
+            id VARCHAR(36) PRIMARY KEY,
+            candidate_id INT NOT NULL,
+            requirement_id VARCHAR(64) NOT NULL,
+            status ENUM('QUEUED','RUNNING','DONE','ERROR') DEFAULT 'QUEUED',
+            result TEXT,
+            error TEXT,
+            attempts INT DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP NULL,
+            finished_at TIMESTAMP NULL,
+            INDEX idx_screening_jobs_status (status, created_at),
+            FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+        )
+    """)
+
+
+@migration(8, "screening_cache table for content-addressed Gemini results")
+def _screening_cache(cursor):
+    # cache_key = sha256(model + prompt); see utils/screening_cache.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS screening_cache (
+            cache_key CHAR(64) PRIMARY KEY,
+            model VARCHAR(100) NOT NULL,
+            result TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_screening_cache_created (created_at)
+        )
+    """)
+
+
+# Skill dictionary and parsing rules as of migrations 9/10, frozen here so the
+# migrations give the same result whenever they run. utils/skills.py may evolve.
+_V9_SKILLS = {
+    "JavaScript": ("JS", "ES6", "ES2015", "ECMAScript", "Vanilla JS"),
+    "TypeScript": ("TS",),
+    "React": ("ReactJS", "React.js", "React JS"),
+    "React Native": ("ReactNative", "RN"),
+    "Angular": ("AngularJS", "Angular.js", "Angular 2+"),
+    "Vue": ("VueJS", "Vue.js"),
+    "Next.js": ("NextJS",),
+    "Node.js": ("Node", "NodeJS", "Node JS"),
+    "Express": ("ExpressJS", "Express.js"),
+    "Python": ("Py",),
+    "Django": ("Django REST Framework", "DRF"),
+    "Java": ("Core Java", "J2EE", "Java EE"),
+    "Spring Boot": ("SpringBoot", "Spring-Boot"),
+    "C++": ("CPP", "CPlusPlus"),
+    "C#": ("CSharp", "C Sharp"),
+    ".NET": ("DotNet", "Dot Net", "ASP.NET", ".NET Core", "ASP.NET Core"),
+    "Go": ("Golang",),
+    "Kotlin": (),
+    "Swift": (),
+    "PHP": (),
+    "Ruby on Rails": ("Rails", "RoR"),
+    "SQL": ("Structured Query Language",),
+    "MySQL": (),
+    "PostgreSQL": ("Postgres", "PSQL"),
+    "MongoDB": ("Mongo",),
+    "Redis": (),
+    "HTML": ("HTML5",),
+    "CSS": ("CSS3",),
+    "AWS": ("Amazon Web Services",),
+    "Azure": ("Microsoft Azure",),
+    "GCP": ("Google Cloud", "Google Cloud Platform"),
+    "Docker": (),
+    "Kubernetes": ("K8s",),
+    "CI/CD": ("CICD", "CI CD"),
+    "Git": ("GitHub", "GitLab"),
+    "REST API": ("REST", "RESTful", "REST APIs", "RESTful APIs"),
+    "GraphQL": (),
+    "Machine Learning": ("ML",),
+    "Deep Learning": ("DL",),
+    "Artificial Intelligence": ("AI",),
+    "Natural Language Processing": ("NLP",),
+    "Data Science": (),
+    "Power BI": ("PowerBI",),
+    "Tableau": (),
+    "Excel": ("MS Excel", "Microsoft Excel", "Advanced Excel"),
+    "Selenium": (),
+    "Manual Testing": (),
+    "Automation Testing": ("Test Automation",),
+    "Linux": ("Unix",),
+    "Salesforce": ("SFDC",),
+    "SAP": (),
+}
+
+_V9_SLUG_STRIP_RE = re.compile(r"[^a-z0-9+#]+")
+_V10_SPLIT_RE = re.compile(r"[,/|]")
+_V10_SLASH_SKILLS_RE = re.compile(r"(?<![\w/])CI\s*/\s*CD(?![\w/])", re.IGNORECASE)
+
+
+def _v9_slug(text):
+    return _V9_SLUG_STRIP_RE.sub("", str(text or "").lower())[:100]
+
+
+def _v9_aliases():
+    """{alias slug: canonical slug} for the frozen dictionary, canonical names included."""
+    aliases = {}
+    for name, spellings in _V9_SKILLS.items():
+        for spelling in (name,) + spellings:
+            aliases[_v9_slug(spelling)] = _v9_slug(name)
+    return aliases
+
+
+@migration(9, "canonical skills, aliases and candidate/requirement skill links")
+def _skills_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS skills (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            slug VARCHAR(100) NOT NULL UNIQUE,
+            name VARCHAR(100) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS skill_aliases (
+            alias VARCHAR(100) PRIMARY KEY,
+            skill_id INT NOT NULL,
+            FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_skills (
+            candidate_id INT NOT NULL,
+            skill_id INT NOT NULL,
+            PRIMARY KEY (candidate_id, skill_id),
+            INDEX idx_candidate_skills_skill (skill_id, candidate_id),
+            FOREIGN KEY (candidate_id) REFERENCES candidates(id) ON DELETE CASCADE,
+            FOREIGN KEY (skill_id) REFERENCES skills(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirement_skills (
+            requirement_id VARCHAR(50) NOT NULL,
+            skill_id INT NOT NULL,
+            PRIMARY KEY (requirement_id, skill_id),
+            INDEX idx_requirement_skills_skill (skill_id, requirement_id),
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id) ON DELETE CASCADE,
+            FOREIGN KEY (skill_id) REFERENCES skills(id)
+        )
+    """)
+
+    # Seed the frozen built-in dictionary
+    cursor.executemany(
+        "INSERT IGNORE INTO skills (slug, name) VALUES (%s, %s)",
+        [(_v9_slug(name), name) for name in _V9_SKILLS],
+    )
+    cursor.executemany("""
+        INSERT IGNORE INTO skill_aliases (alias, skill_id)
+        SELECT %s, id FROM skills WHERE slug = %s
+    """, [(alias, canonical) for alias, canonical in _v9_aliases().items() if alias != canonical])
+
+
+def _v10_resolve(slug, aliases):
+    """Canonical slug: an alias, optionally followed by a version number ("python3"); else the slug."""
+    for end in range(len(slug), 0, -1):
+        canonical = aliases.get(slug[:end])
+        if canonical:
+            return canonical if slug[end:].isdigit() or end == len(slug) else slug
+    return slug
+
+
+def _v10_link(cursor, source_sql, link_table, owner_column, aliases, skill_ids):
+    cursor.execute(source_sql)
+    rows = cursor.fetchall()
+    for owner_id, text in rows:
+        links = {}
+        for item in _V10_SPLIT_RE.split(_V10_SLASH_SKILLS_RE.sub("CICD", str(text or ""))):
+            slug = _v9_slug(item.strip())
+            if slug:
+                links.setdefault(_v10_resolve(slug, aliases), item.strip()[:100])
+        for slug, name in links.items():
+            if slug not in skill_ids:
+                cursor.execute("INSERT IGNORE INTO skills (slug, name) VALUES (%s, %s)", (slug, name))
+                cursor.execute("SELECT id FROM skills WHERE slug = %s", (slug,))
+                skill_ids[slug] = cursor.fetchone()[0]
+        cursor.execute(f"DELETE FROM {link_table} WHERE {owner_column} = %s", (owner_id,))
+        if links:
+            cursor.executemany(
+                f"INSERT IGNORE INTO {link_table} ({owner_column}, skill_id) VALUES (%s, %s)",
+                [(owner_id, skill_ids[slug]) for slug in links],
+            )
+    return len(rows)
+
+
+@migration(10, "backfill candidate_skills / requirement_skills from skills text")
+def _skills_backfill(cursor):
+    # Uses the aliases seeded by migration 9 and the frozen parsing rules above
+    cursor.execute("""
+        SELECT a.alias, s.slug FROM skill_aliases a JOIN skills s ON s.id = a.skill_id
+    """)
+    aliases = {slug: slug for slug in _v9_aliases().values()}
+    aliases.update({alias: slug for alias, slug in cursor.fetchall()})
+    cursor.execute("SELECT slug, id FROM skills")
+    skill_ids = dict(cursor.fetchall())
+
+    candidates = _v10_link(
+        cursor, "SELECT id, skills FROM candidates ORDER BY id",
+        "candidate_skills", "candidate_id", aliases, skill_ids,
+    )
+    requirements = _v10_link(
+        cursor, "SELECT id, skills_required FROM requirements ORDER BY id",
+        "requirement_skills", "requirement_id", aliases, skill_ids,
+    )
+    print(f"   -> Linked skills for {candidates} candidates and {requirements} requirements")
+
+
+@migration(11, "candidate_resume_text table and candidates.resume_hash")
+def _resume_text(cursor):
+    # Keyed by sha256 of the resume file; see services/resume_text.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_resume_text (
+            content_hash CHAR(64) PRIMARY KEY,
+            status ENUM('DONE','ERROR') NOT NULL,
+            extractor VARCHAR(20),
+            text MEDIUMTEXT,
+            sections TEXT,
+            char_count INT DEFAULT 0,
+            error VARCHAR(500),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+    _add_columns_if_missing(cursor, "candidates", [
+        ("resume_hash", "CHAR(64) NULL"),
+    ])
+    _add_indexes_if_missing(cursor, "candidates", [
+        ("idx_candidates_resume_hash", "(resume_hash)"),
+    ])
+
+
+@migration(12, "resume_files table for content-addressed resume storage")
+def _resume_files(cursor):
+    # stored_path is relative to the upload root (aa/bb/<hash>.<ext>); see utils/resume_store.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resume_files (
+            content_hash CHAR(64) PRIMARY KEY,
+            ext VARCHAR(10) NOT NULL,
+            stored_path VARCHAR(255) NOT NULL,
+            size_bytes BIGINT NOT NULL,
+            original_filename VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_resume_files_original (original_filename, created_at)
+        )
+    """)
+
+
+@migration(13, "requirement_funnel tables maintained from candidate_progress writes")
+def _requirement_funnel(cursor):
+    # stage_id 0 / stage_name '' stand in for NULL so they can be part of the key;
+    # see services/requirement_funnel.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirement_funnel (
+            requirement_id VARCHAR(50) NOT NULL,
+            stage_id BIGINT NOT NULL DEFAULT 0,
+            stage_name VARCHAR(255) NOT NULL DEFAULT '',
+            status VARCHAR(20) NOT NULL DEFAULT '',
+            progress_count INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (requirement_id, stage_id, stage_name, status),
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirement_funnel_totals (
+            requirement_id VARCHAR(50) PRIMARY KEY,
+            candidates INT NOT NULL DEFAULT 0,
+            in_progress INT NOT NULL DEFAULT 0,
+            qualified INT NOT NULL DEFAULT 0,
+            rejected INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Backfill; same queries as services.requirement_funnel.rebuild_requirement_funnel, frozen here
+    cursor.execute("""
+        INSERT INTO requirement_funnel (requirement_id, stage_id, stage_name, status, progress_count)
+        SELECT requirement_id, COALESCE(stage_id, 0), COALESCE(stage_name, ''), COALESCE(status, ''), COUNT(*)
+        FROM candidate_progress
+        WHERE requirement_id IS NOT NULL
+        GROUP BY requirement_id, COALESCE(stage_id, 0), COALESCE(stage_name, ''), COALESCE(status, '')
+    """)
+    rows = cursor.rowcount
+    cursor.execute("""
+        INSERT INTO requirement_funnel_totals (requirement_id, candidates, in_progress, qualified, rejected)
+        SELECT
+            cp.requirement_id,
+            COUNT(DISTINCT cp.candidate_id),
+            COUNT(DISTINCT CASE WHEN cp.status IN ('PENDING', 'IN_PROGRESS') THEN cp.candidate_id END),
+            COUNT(DISTINCT CASE WHEN cp.status = 'COMPLETED' AND rs.stage_order = r.no_of_rounds THEN cp.candidate_id END),
+            COUNT(DISTINCT CASE WHEN cp.status = 'REJECTED' THEN cp.candidate_id END)
+        FROM candidate_progress cp
+        JOIN requirements r ON r.id = cp.requirement_id
+        LEFT JOIN requirement_stages rs ON rs.id = cp.stage_id
+        GROUP BY cp.requirement_id
+    """)
+    print(f"   -> Backfilled {rows} requirement_funnel rows")
+
+
+@migration(14, "secondary indexes for hot filters (see python -m utils.index_advisor)")
+def _hot_path_indexes(cursor):
+    # candidates.created_by is covered by idx_candidates_created_by (migration 5);
+    # users.email / usersdata.email are UNIQUE, so the login/profile joins are indexed.
+    _add_indexes_if_missing(cursor, "users", [
+        # verify-session / get_current_user: WHERE session_token = ?
+        ("idx_users_session_token", "(session_token)"),
+    ])
+    _add_indexes_if_missing(cursor, "requirements", [
+        # Client reports: WHERE client_id = ? ORDER BY created_at DESC
+        ("idx_requirements_client_created", "(client_id, created_at)"),
+        # Status counts and filtered listings
+        ("idx_requirements_status_created", "(status, created_at)"),
+        # /get-requirements: ORDER BY created_at DESC
+        ("idx_requirements_created", "(created_at)"),
+    ])
+    _add_indexes_if_missing(cursor, "candidate_progress", [
+        # Per-requirement status filters; covers COUNT(DISTINCT candidate_id)
+        ("idx_progress_requirement_status", "(requirement_id, status, candidate_id)"),
+    ])
+    _add_indexes_if_missing(cursor, "candidate_screening", [
+        # Latest screening for a candidate/requirement, and the bulk NOT EXISTS probe
+        ("idx_screening_candidate_requirement", "(candidate_id, requirement_id, created_at)"),
+        # Distinct screened candidates per requirement
+        ("idx_screening_requirement_candidate", "(requirement_id, candidate_id)"),
+    ])
+    _add_indexes_if_missing(cursor, "interviews", [
+        # Interview lists: ORDER BY date DESC, time DESC
+        ("idx_interviews_date_time", "(date, time)"),
+        ("idx_interviews_candidate_requirement", "(candidate_id, requirement_id, date, time)"),
+    ])
+    _add_indexes_if_missing(cursor, "requirement_allocations", [
+        # Recruiter assignment lists: WHERE recruiter_id = ? ORDER BY created_at DESC
+        ("idx_allocations_recruiter_created", "(recruiter_id, created_at)"),
+    ])
+
+
+
+@migration(15, "screening_jobs owner and heartbeat for multi-process resume")
+def _screening_job_heartbeat(cursor):
+    # The process running a job refreshes heartbeat_at; startup only requeues
+    # RUNNING jobs whose heartbeat went stale (see services/screening_jobs.py).
+    _add_columns_if_missing(cursor, "screening_jobs", [
+        ("owner", "VARCHAR(100) NULL"),
+        ("heartbeat_at", "TIMESTAMP NULL"),
+    ])
+    _add_indexes_if_missing(cursor, "screening_jobs", [
+        ("idx_screening_jobs_heartbeat", "(status, heartbeat_at)"),
+    ])
+
+# --------------------- Runner ---------------------
+
+def _ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def get_schema_version(cursor):
+    """Return the highest applied version, or None if schema_migrations doesn't exist yet."""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_migrations")
+    except ProgrammingError:
+        return None
+    row = cursor.fetchone()
+    return (row[0] if row else None) or 0
+
+
+def latest_version():
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def pending_migrations(current, target=None):
+    return [
+        m for m in MIGRATIONS
+        if m.version > (current or 0) and (target is None or m.version <= target)
+    ]
+
+
+def run_migrations(conn=None, target=None):
+    """
+    Apply pending migrations in order and return the list that ran.
+
+    When the schema is current this is a single version query.
+    """
+    from utils.db import get_db_connection
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    cursor = conn.cursor()
+    applied = []
+    try:
+        current = get_schema_version(cursor)
+        if current is not None and not pending_migrations(current, target):
+            return applied
+
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (_LOCK_NAME, _LOCK_TIMEOUT))
+        try:
+            # Re-read under the lock: another worker may have just migrated
+            _ensure_migrations_table(cursor)
+            current = get_schema_version(cursor)
+            for m in pending_migrations(current, target):
+                print(f"🛠️ Applying migration {m.version}: {m.name}")
+                m.apply(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (m.version, m.name),
+                )
+                conn.commit()
+                applied.append(m)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NAME,))
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        if own_conn:
+            conn.close()
+
+
+def migration_status(conn=None):
+    """Return (current_version, pending_migrations)."""
+    from utils.db import get_db_connection
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        current = get_schema_version(cursor) or 0
+        return current, pending_migrations(current)
+    finally:
+        cursor.close()
+        if own_conn:
+            conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ATS schema migrations")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Show the applied version and pending migrations")
+    migrate_cmd = sub.add_parser("migrate", help="Apply pending migrations")
+    migrate_cmd.add_argument("--to", type=int, default=None, help="Stop after this version")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        current, pending = migration_status()
+        print(f"Schema version: {current} (latest: {latest_version()})")
+        for m in pending:
+            print(f"  pending  {m.version:>4}  {m.name}")
+        return 0
+
+    applied = run_migrations(target=args.to)
+    if applied:
+        print(f"✅ Applied {len(applied)} migration(s); schema now at version {applied[-1].version}")
+    else:
+        print("✅ Schema already up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import os
+
+from utils.gemini import heuristic_signals
+
+# Local pre-screen run before Gemini. Candidates that are clearly outside the
+# requirement are rejected, and clearly strong ones are queued for assessment,
+# using the same signals as _fallback_screening. Only the ambiguous middle band
+# is sent to Gemini. Decisions are recorded with their own model_version so they
+# can be told apart from (and re-run through) Gemini later.
+
+PRESCREEN_MODEL_VERSION = "prescreen-v1"
+
+# Opt-in: pre-screen rejections close out candidates without a model or human check
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Reject: skill-overlap ratio at or below this (requirement and candidate both list skills)
+PRESCREEN_REJECT_MAX_OVERLAP = float(os.getenv("PRESCREEN_REJECT_MAX_OVERLAP", "0"))
+# Reject: candidate has at least this many years less than experience_required
+PRESCREEN_REJECT_EXPERIENCE_GAP = float(os.getenv("PRESCREEN_REJECT_EXPERIENCE_GAP", "3"))
+# Queue: heuristic score and overlap ratio both at or above these
+PRESCREEN_QUEUE_MIN_SCORE = float(os.getenv("PRESCREEN_QUEUE_MIN_SCORE", "90"))
+PRESCREEN_QUEUE_MIN_OVERLAP = float(os.getenv("PRESCREEN_QUEUE_MIN_OVERLAP", "0.8"))
+
+REJECT = "REJECT"
+QUEUE = "QUEUE"
+
+def _years(value):
+    """
+    Years of experience when the whole value is a number ("5", "4.5", 5).
+    None for anything else: `experience` is a free-text summary, and a number
+    picked out of prose ("Led a team of 2 ...") says nothing about tenure.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return None
+
+
+def prescreen(candidate, req):
+    """
+    Return a screening payload (score, rationale, red_flags, recommend,
+    model_version, prescreen) for clear-cut candidates, or None when the
+    candidate falls in the ambiguous band and should go to Gemini.
+    """
+    if not PRESCREEN_ENABLED:
+        return None
+
+    candidate_years = _years(candidate.get("experience"))
+    if candidate_years is None:
+        # Free-text or missing experience: only Gemini (and a human) can read it
+        return None
+
+    signals = heuristic_signals(candidate, req)
+    overlap_line = f"Matched {signals['overlap']} out of {signals['required_skills']} required skills"
+
+    required_years = _years(req.get("experience_required"))
+    experience_gap = (
+        required_years - candidate_years
+        if required_years is not None
+        else None
+    )
+
+    reasons = []
+    # Missing data is never grounds for a local rejection; Gemini (and a human) decide those
+    if (
+        signals["required_skills"]
+        and signals["candidate_skills"]
+        and signals["overlap_ratio"] <= PRESCREEN_REJECT_MAX_OVERLAP
+    ):
+        reasons.append("Little or no overlap with required skills")
+    if experience_gap is not None and experience_gap >= PRESCREEN_REJECT_EXPERIENCE_GAP:
+        reasons.append(f"{candidate_years:g} years of experience against {required_years:g} required")
+
+    if reasons:
+        return {
+            "score": round(min(signals["score"], 45), 2),
+            "rationale": [overlap_line, "Rejected by local pre-screen before AI screening."],
+            "red_flags": reasons,
+            "recommend": "REJECTED",
+            "model_version": PRESCREEN_MODEL_VERSION,
+            "prescreen": REJECT,
+        }
+
+    if (
+        signals["score"] >= PRESCREEN_QUEUE_MIN_SCORE
+        and signals["overlap_ratio"] >= PRESCREEN_QUEUE_MIN_OVERLAP
+        and (experience_gap is None or experience_gap <= 0)
+    ):
+        return {
+            "score": round(signals["score"], 2),
+            "rationale": [
+                overlap_line,
+                f"Candidate experience considered at {signals['experience']} years",
+                "Queued for assessment by local pre-screen without AI screening.",
+            ],
+            "red_flags": [],
+            "recommend": "SHORTLISTED",
+            "model_version": PRESCREEN_MODEL_VERSION,
+            "prescreen": QUEUE,
+        }
+
+    return None
@@ -4,6 +4,14 @@ def _safe_get(record, key, fallback=""):
 	return record.get(key) or fallback
 
 
+def _resume_block(candidate):
+	"""Resume excerpt section (see services/resume_text.py); empty when no text was extracted."""
+	excerpt = _safe_get(candidate, "resume_excerpt")
+	if not excerpt:
+		return ""
+	return f"\nResume (extracted text, may be truncated):\n{excerpt}\n"
+
+
 def build_prompt(candidate, req):
 	"""
 	Build a resilient prompt for Gemini. Any missing DB fields are replaced
@@ -36,7 +44,7 @@ Name: {candidate_name}
 Skills: {candidate_skills}
 Experience: {candidate_experience}
 Education: {candidate_education}
-
+{_resume_block(candidate)}
 Requirement:
 Title: {req_title}
 Skills Required: {req_skills}
@@ -60,7 +68,7 @@ Name: {candidate['name']}
 Skills: {candidate['skills']}
 Experience: {candidate['experience']}
 Education: {candidate['education']}
-
+{_resume_block(candidate)}
 Requirement:
 Title: {req['title']}
 Skills Required: {req['skills_required']}
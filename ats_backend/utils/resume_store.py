@@ -0,0 +1,195 @@
+"""
+Content-addressed resume storage.
+
+Uploads are streamed to a temp file while being hashed, then moved to
+`<root>/<aa>/<bb>/<sha256>.<ext>` (two levels of sharding keep directories
+small). Identical files are stored once. `candidates.resume_filename` holds the
+`<sha256>.<ext>` name, and the `resume_files` table maps each hash to its
+stored path and the original upload name, so `/uploads/resumes/<filename>`
+keeps working for both new names and names handed out before this existed.
+
+CLI (run from the ats_backend folder), to move legacy flat files into shards:
+    python -m utils.resume_store migrate-legacy [--root ./uploads/resumes]
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from collections import namedtuple
+
+from utils.db import db_connection
+
+DEFAULT_ROOT = "./uploads/resumes"
+_CHUNK_SIZE = 64 * 1024
+_INCOMING_DIR = ".incoming"
+
+_CAS_NAME_RE = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]{1,10})$")
+
+StoredResume = namedtuple("StoredResume", ["content_hash", "filename", "relative_path", "size", "deduplicated"])
+
+
+def sharded_path(content_hash, ext):
+    """Path relative to the storage root: aa/bb/<hash>.<ext>."""
+    return os.path.join(content_hash[:2], content_hash[2:4], f"{content_hash}.{ext}")
+
+
+def parse_cas_name(filename):
+    """(content_hash, ext) for a content-addressed name, else None."""
+    match = _CAS_NAME_RE.match(filename or "")
+    return (match.group(1), match.group(2)) if match else None
+
+
+def _move_into_place(root, tmp_path, content_hash, ext):
+    """Move a hashed temp file to its shard, or drop it if that content is already stored."""
+    relative = sharded_path(content_hash, ext)
+    final_path = os.path.join(root, relative)
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+        return relative, True
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(tmp_path, final_path)  # atomic on the same filesystem
+    return relative, False
+
+
+def store_stream(stream, root, ext):
+    """Write a readable binary stream into the store, hashing as it is written. Returns StoredResume."""
+    incoming = os.path.join(root, _INCOMING_DIR)
+    os.makedirs(incoming, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=incoming, suffix=f".{ext}")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        content_hash = digest.hexdigest()
+        relative, deduplicated = _move_into_place(root, tmp_path, content_hash, ext)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return StoredResume(content_hash, f"{content_hash}.{ext}", relative, size, deduplicated)
+
+
+def save_resume(file_storage, root):
+    """Store an uploaded werkzeug FileStorage (extension already checked by allowed_file)."""
+    ext = file_storage.filename.rsplit(".", 1)[1].lower()
+    return store_stream(file_storage.stream, root, ext)
+
+
+def record_resume_file(cursor, stored, original_filename):
+    """Insert the resume_files row for a stored resume (no-op for content already recorded)."""
+    cursor.execute("""
+        INSERT IGNORE INTO resume_files (content_hash, ext, stored_path, size_bytes, original_filename)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (
+        stored.content_hash,
+        stored.filename.rsplit(".", 1)[1],
+        stored.relative_path,
+        stored.size,
+        (original_filename or "")[:255] or None,
+    ))
+
+
+def resolve_resume_path(root, filename):
+    """
+    Absolute path of a resume by its public name, or None.
+
+    Content-addressed names map straight to their shard. Other names are legacy:
+    first the flat file, then the most recent upload with that original name.
+    """
+    if not filename or filename.startswith(".") or "/" in filename or "\\" in filename:
+        return None
+
+    cas = parse_cas_name(filename)
+    if cas:
+        path = os.path.join(root, sharded_path(*cas))
+        if os.path.isfile(path):
+            return os.path.abspath(path)
+
+    flat = os.path.join(root, filename)
+    if os.path.isfile(flat):
+        return os.path.abspath(flat)
+
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                if cas:
+                    cursor.execute("SELECT stored_path FROM resume_files WHERE content_hash = %s", (cas[0],))
+                else:
+                    cursor.execute("""
+                        SELECT stored_path FROM resume_files
+                        WHERE original_filename = %s
+                        ORDER BY created_at DESC
+                        LIMIT 1
+                    """, (filename,))
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+    except Exception as e:
+        print(f"⚠️ Resume lookup failed for {filename}: {e}")
+        return None
+
+    if row:
+        path = os.path.join(root, row[0])
+        if os.path.isfile(path):
+            return os.path.abspath(path)
+    return None
+
+
+# --------------------- CLI ---------------------
+
+def migrate_legacy(root=DEFAULT_ROOT):
+    """Move flat uploads into shards and repoint candidates.resume_filename. Returns the number of files moved."""
+    moved = 0
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if not os.path.isfile(path) or parse_cas_name(name) or "." not in name:
+            continue
+        ext = name.rsplit(".", 1)[1].lower()
+        with open(path, "rb") as fh:
+            stored = store_stream(fh, root, ext)
+
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                record_resume_file(cursor, stored, name)
+                cursor.execute("""
+                    UPDATE candidates SET resume_filename = %s, resume_hash = %s
+                    WHERE resume_filename = %s
+                """, (stored.filename, stored.content_hash, name))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+        os.remove(path)
+        moved += 1
+        print(f"   -> {name} -> {stored.relative_path}{' (duplicate)' if stored.deduplicated else ''}")
+    return moved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume storage")
+    sub = parser.add_subparsers(dest="command", required=True)
+    legacy = sub.add_parser("migrate-legacy", help="move flat uploads into content-addressed shards")
+    legacy.add_argument("--root", default=DEFAULT_ROOT)
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate-legacy":
+        count = migrate_legacy(args.root)
+        print(f"✅ Moved {count} resume file(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+from utils.cache import TTLCache
+from utils.db import db_connection
+
+# Screening results keyed by sha256(model + prompt). A prompt only changes when
+# the candidate or requirement data feeding build_prompt changes, so an
+# identical key means Gemini would be asked the exact same question again.
+#
+# Tier 1: in-process TTL/LRU cache.  Tier 2: `screening_cache` MySQL table,
+# shared across restarts and workers.
+SCREENING_CACHE_TTL = int(os.getenv("SCREENING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+SCREENING_CACHE_MAX_ENTRIES = int(os.getenv("SCREENING_CACHE_MAX_ENTRIES", "2000"))
+SCREENING_CACHE_ENABLED = os.getenv("SCREENING_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+_memory = TTLCache(maxsize=SCREENING_CACHE_MAX_ENTRIES, ttl=SCREENING_CACHE_TTL)
+
+
+def screening_cache_key(model, prompt):
+    return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+def get_cached_screening(key):
+    """Return a cached screening dict, or None. Never raises."""
+    if not SCREENING_CACHE_ENABLED:
+        return None
+
+    cached = _memory.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    SELECT result FROM screening_cache
+                    WHERE cache_key = %s AND created_at >= NOW() - INTERVAL %s SECOND
+                """, (key, SCREENING_CACHE_TTL))
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+    except Exception as e:
+        print(f"⚠️ Screening cache lookup failed: {e}")
+        return None
+
+    if not row:
+        return None
+    try:
+        result = json.loads(row[0])
+    except (TypeError, ValueError):
+        return None
+    _memory.set(key, result)
+    return dict(result)
+
+
+def store_screening(key, model, result):
+    """Write a successful Gemini screening to both tiers. Never raises."""
+    if not SCREENING_CACHE_ENABLED:
+        return
+
+    _memory.set(key, dict(result))
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    INSERT INTO screening_cache (cache_key, model, result)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE result = VALUES(result), model = VALUES(model), created_at = CURRENT_TIMESTAMP
+                """, (key, model, json.dumps(result)))
+                conn.commit()
+            finally:
+                cursor.close()
+    except Exception as e:
+        print(f"⚠️ Screening cache write failed: {e}")
+
+
+def screening_cache_stats():
+    return _memory.stats()
@@ -0,0 +1,202 @@
+import re
+import threading
+from functools import lru_cache
+
+# Skill-list parsing shared by the screening fallback, the match engine, the
+# candidate index and the skills tables, so they all agree on what counts as
+# "the same skill".
+#
+# Every skill is identified by a slug: lower-case, with everything but letters,
+# digits, "+" and "#" removed ("React.js" -> "reactjs"). Slugs are then mapped to
+# a canonical skill through an alias trie ("reactjs" -> "react"). Unknown skills
+# are their own canonical slug. The built-in dictionary below is seeded into the
+# skills / skill_aliases tables by utils/migrations.py; extra rows added there are
+# merged in at startup by services.skill_catalog.load_skill_aliases().
+
+_SKILL_SPLIT_RE = re.compile(r"[,/|]")
+_SLUG_STRIP_RE = re.compile(r"[^a-z0-9+#]+")
+
+# Longest slug stored in skills.slug / skill_aliases.alias
+MAX_SLUG_LENGTH = 100
+
+# Canonical display name -> common spellings
+CANONICAL_SKILLS = {
+    "JavaScript": ("JS", "ES6", "ES2015", "ECMAScript", "Vanilla JS"),
+    "TypeScript": ("TS",),
+    "React": ("ReactJS", "React.js", "React JS"),
+    "React Native": ("ReactNative", "RN"),
+    "Angular": ("AngularJS", "Angular.js", "Angular 2+"),
+    "Vue": ("VueJS", "Vue.js"),
+    "Next.js": ("NextJS",),
+    "Node.js": ("Node", "NodeJS", "Node JS"),
+    "Express": ("ExpressJS", "Express.js"),
+    "Python": ("Py",),
+    "Django": ("Django REST Framework", "DRF"),
+    "Java": ("Core Java", "J2EE", "Java EE"),
+    "Spring Boot": ("SpringBoot", "Spring-Boot"),
+    "C++": ("CPP", "CPlusPlus"),
+    "C#": ("CSharp", "C Sharp"),
+    ".NET": ("DotNet", "Dot Net", "ASP.NET", ".NET Core", "ASP.NET Core"),
+    "Go": ("Golang",),
+    "Kotlin": (),
+    "Swift": (),
+    "PHP": (),
+    "Ruby on Rails": ("Rails", "RoR"),
+    "SQL": ("Structured Query Language",),
+    "MySQL": (),
+    "PostgreSQL": ("Postgres", "PSQL"),
+    "MongoDB": ("Mongo",),
+    "Redis": (),
+    "HTML": ("HTML5",),
+    "CSS": ("CSS3",),
+    "AWS": ("Amazon Web Services",),
+    "Azure": ("Microsoft Azure",),
+    "GCP": ("Google Cloud", "Google Cloud Platform"),
+    "Docker": (),
+    "Kubernetes": ("K8s",),
+    "CI/CD": ("CICD", "CI CD"),
+    "Git": ("GitHub", "GitLab"),
+    "REST API": ("REST", "RESTful", "REST APIs", "RESTful APIs"),
+    "GraphQL": (),
+    "Machine Learning": ("ML",),
+    "Deep Learning": ("DL",),
+    "Artificial Intelligence": ("AI",),
+    "Natural Language Processing": ("NLP",),
+    "Data Science": (),
+    "Power BI": ("PowerBI",),
+    "Tableau": (),
+    "Excel": ("MS Excel", "Microsoft Excel", "Advanced Excel"),
+    "Selenium": (),
+    "Manual Testing": (),
+    "Automation Testing": ("Test Automation",),
+    "Linux": ("Unix",),
+    "Salesforce": ("SFDC",),
+    "SAP": (),
+}
+
+_TERMINAL = "\0"
+
+
+def skill_slug(text):
+    """Identity key for a skill spelling: "React.js", "react js", "REACTJS" -> "reactjs"."""
+    return _SLUG_STRIP_RE.sub("", str(text or "").lower())[:MAX_SLUG_LENGTH]
+
+
+def _builtin_aliases():
+    aliases = {}
+    for name, spellings in CANONICAL_SKILLS.items():
+        canonical = skill_slug(name)
+        for spelling in (name,) + tuple(spellings):
+            aliases[skill_slug(spelling)] = canonical
+    return aliases
+
+
+class AliasTrie:
+    """
+    Character trie over alias slugs. lookup() returns the canonical slug for an
+    exact alias, or for an alias followed only by a version number
+    ("python3", "java8", "angular14").
+    """
+
+    def __init__(self, aliases):
+        self._root = {}
+        for alias, canonical in aliases.items():
+            node = self._root
+            for ch in alias:
+                node = node.setdefault(ch, {})
+            node[_TERMINAL] = canonical
+        self.size = len(aliases)
+
+    def lookup(self, slug):
+        node = self._root
+        last_match, last_end = None, 0
+        for i, ch in enumerate(slug):
+            node = node.get(ch)
+            if node is None:
+                break
+            if _TERMINAL in node:
+                last_match, last_end = node[_TERMINAL], i + 1
+        if last_match is None:
+            return None
+        rest = slug[last_end:]
+        if not rest or rest.isdigit():
+            return last_match
+        return None
+
+
+_lock = threading.Lock()
+_aliases = _builtin_aliases()
+_trie = AliasTrie(_aliases)
+_display_names = {skill_slug(name): name for name in CANONICAL_SKILLS}
+
+# "/" separates skills ("Java/Python"), except inside known names like "CI/CD":
+# those are rewritten without the slash before splitting.
+_SLASH_SKILLS_RE = re.compile(
+    r"(?<![\w/])(" + "|".join(
+        r"\s*/\s*".join(re.escape(part.strip()) for part in spelling.split("/"))
+        for name, spellings in CANONICAL_SKILLS.items()
+        for spelling in (name,) + tuple(spellings)
+        if "/" in spelling
+    ) + r")(?![\w/])",
+    re.IGNORECASE,
+)
+
+
+def _join_slash_skills(text):
+    return _SLASH_SKILLS_RE.sub(lambda m: re.sub(r"\s*/\s*", "", m.group(0)), text)
+
+
+def install_aliases(extra):
+    """Merge {alias_slug: canonical_slug} (e.g. from skill_aliases) over the built-ins and recompile the trie."""
+    global _aliases, _trie
+    with _lock:
+        merged = dict(_builtin_aliases())
+        merged.update({skill_slug(a): skill_slug(c) for a, c in extra.items() if skill_slug(a) and skill_slug(c)})
+        _aliases = merged
+        _trie = AliasTrie(merged)
+        canonical_skill.cache_clear()
+    return len(merged)
+
+
+@lru_cache(maxsize=4096)
+def canonical_skill(text):
+    """Canonical slug for one skill spelling, or None for blank input."""
+    slug = skill_slug(text)
+    if not slug:
+        return None
+    return _trie.lookup(slug) or slug
+
+
+def display_name(slug, fallback=None):
+    """Readable name for a canonical slug (built-in name, else `fallback`, else the slug)."""
+    return _display_names.get(slug) or (str(fallback).strip()[:MAX_SLUG_LENGTH] if fallback else slug)
+
+
+def split_skills(value):
+    """Comma/slash/pipe separated text (or a list) -> stripped, non-empty items in order ("CI/CD" stays one item)."""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        items = value
+    else:
+        items = _SKILL_SPLIT_RE.split(_join_slash_skills(str(value)))
+    return [str(item).strip() for item in items if str(item).strip()]
+
+
+def parse_skills(value):
+    """Comma/slash/pipe separated text (or a list) -> set of canonical skill slugs."""
+    return {skill for skill in map(canonical_skill, split_skills(value)) if skill}
+
+
+def alias_count():
+    return len(_aliases)
+
+
+def parse_skills_with_names(value):
+    """Like parse_skills, but {canonical_slug: display name} (first spelling seen for unknown skills)."""
+    skills = {}
+    for item in split_skills(value):
+        slug = canonical_skill(item)
+        if slug and slug not in skills:
+            skills[slug] = display_name(slug, item)
+    return skills
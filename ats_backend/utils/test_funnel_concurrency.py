@@ -0,0 +1,151 @@
+"""
+Concurrency check for the requirement funnel (needs a migrated database).
+
+Screens pairs of brand-new candidates against one requirement at the same
+moment, the case where snapshotting with FOR UPDATE deadlocked on the
+uniq_progress_stage gap, and checks that every progress row was written and
+that the incrementally maintained funnel matches a full recount.
+
+Run from the ats_backend folder:
+    python -m utils.test_funnel_concurrency
+"""
+import threading
+import uuid
+
+import pymysql.cursors
+
+from controllers.ai_screening import _record_screening
+from utils.db import db_connection
+
+ROUNDS = 5
+
+_OUTCOME = {
+    "ai_success": True,
+    "result": {
+        "score": 70,
+        "rationale": ["funnel concurrency test"],
+        "recommend": "SHORTLISTED",
+        "red_flags": [],
+        "model_version": "funnel-test",
+    },
+    "ai_error": None,
+}
+
+
+def _create_fixtures(cursor, candidates):
+    req_id = f"TEST-FUNNEL-{uuid.uuid4().hex[:8]}"
+    cursor.execute("""
+        INSERT INTO requirements (id, title, skills_required, no_of_rounds, status)
+        VALUES (%s, 'Funnel concurrency test', 'Python', 1, 'OPEN')
+    """, (req_id,))
+    cursor.execute("""
+        INSERT INTO requirement_stages (requirement_id, stage_order, stage_name)
+        VALUES (%s, 1, 'Round 1')
+    """, (req_id,))
+    candidate_ids = []
+    for i in range(candidates):
+        cursor.execute(
+            "INSERT INTO candidates (name, email, skills) VALUES (%s, %s, 'Python')",
+            (f"Funnel Test {i}", f"funnel-test-{req_id.lower()}-{i}@example.com"),
+        )
+        candidate_ids.append(cursor.lastrowid)
+    return req_id, candidate_ids
+
+
+def _cleanup(cursor, req_id, candidate_ids):
+    placeholders = ",".join(["%s"] * len(candidate_ids))
+    for table in ("assesment_queue", "candidate_screening", "candidate_progress"):
+        cursor.execute(f"DELETE FROM {table} WHERE requirement_id = %s", (req_id,))
+    cursor.execute("DELETE FROM requirement_stages WHERE requirement_id = %s", (req_id,))
+    cursor.execute("DELETE FROM requirements WHERE id = %s", (req_id,))
+    cursor.execute(f"DELETE FROM candidates WHERE id IN ({placeholders})", tuple(candidate_ids))
+
+
+def _screen(candidate_id, requirement, barrier, errors):
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                barrier.wait()
+                _record_screening(cursor, candidate_id, requirement, _OUTCOME)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+    except Exception as e:
+        errors.append(f"candidate {candidate_id}: {e}")
+
+
+def _funnel_state(cursor, req_id):
+    cursor.execute("""
+        SELECT stage_name, status, progress_count FROM requirement_funnel
+        WHERE requirement_id = %s AND progress_count > 0
+        ORDER BY stage_name, status
+    """, (req_id,))
+    funnel = cursor.fetchall()
+    cursor.execute("""
+        SELECT COALESCE(stage_name, '') AS stage_name, COALESCE(status, '') AS status, COUNT(*) AS progress_count
+        FROM candidate_progress WHERE requirement_id = %s
+        GROUP BY COALESCE(stage_name, ''), COALESCE(status, '')
+        ORDER BY stage_name, status
+    """, (req_id,))
+    recount = cursor.fetchall()
+    cursor.execute(
+        "SELECT candidates, in_progress FROM requirement_funnel_totals WHERE requirement_id = %s",
+        (req_id,),
+    )
+    totals = cursor.fetchone()
+    return funnel, recount, totals
+
+
+def test_concurrent_screenings_for_one_requirement():
+    with db_connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        try:
+            req_id, candidate_ids = _create_fixtures(cursor, 2 * ROUNDS)
+            conn.commit()
+            cursor.execute("SELECT * FROM requirements WHERE id = %s", (req_id,))
+            requirement = cursor.fetchone()
+            conn.commit()
+        finally:
+            cursor.close()
+
+    try:
+        errors = []
+        for start in range(0, len(candidate_ids), 2):
+            barrier = threading.Barrier(2)
+            threads = [
+                threading.Thread(target=_screen, args=(cid, requirement, barrier, errors))
+                for cid in candidate_ids[start:start + 2]
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(timeout=60)
+        assert not errors, f"concurrent screenings failed: {errors}"
+
+        with db_connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                funnel, recount, totals = _funnel_state(cursor, req_id)
+            finally:
+                cursor.close()
+        written = sum(row["progress_count"] for row in recount)
+        assert written == len(candidate_ids), f"expected {len(candidate_ids)} progress rows, found {written}"
+        assert [tuple(r.values()) for r in funnel] == [tuple(r.values()) for r in recount], (funnel, recount)
+        assert totals and totals["candidates"] == len(candidate_ids), totals
+        print(f"✅ {ROUNDS} rounds of two concurrent screenings: funnel matches candidate_progress")
+    finally:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                _cleanup(cursor, req_id, candidate_ids)
+                conn.commit()
+            finally:
+                cursor.close()
+
+
+if __name__ == "__main__":
+    test_concurrent_screenings_for_one_requirement()
@@ -27,7 +27,7 @@ def test_main_db():
         result = cursor.fetchone()
         print(f"✅ Main DB Connection Test: {result}")
         cursor.close()
-        # conn.close() # robust connection doesn't really close but good to call
+        conn.close()  # returns the connection to the pool
     except Exception as e:
         print(f"❌ Main DB Test Failed: {e}")
 